@@ -0,0 +1,182 @@
+"""Benchmark of the grouped and depthwise convolutions.
+
+Runs a ShuffleNet (g = 3) with random weights, whose units are made of 1x1
+Conv nodes of 3 groups and 3x3 depthwise Conv nodes, converted with
+native_grouped_conv, which convolves the groups by a single TF op
+(optimized), and with the input and the weights of each Conv node split into
+the groups, which are convolved one by one and concatenated (baseline).
+
+Usage:
+  python benchmark/grouped_conv.py --batch_size 1 --iterations 20
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import time
+
+import numpy as np
+from onnx import helper
+from onnx import numpy_helper
+from onnx import TensorProto
+
+from onnx_tf.backend import prepare
+from onnx_tf.handlers.backend.conv_mixin import ConvMixin
+
+GROUPS = 3
+
+
+class ShuffleNetBuilder(object):
+
+  def __init__(self):
+    self.nodes = []
+    self.initializers = []
+    self.rng = np.random.RandomState(0)
+
+  def add_initializer(self, name, shape, std=1.):
+    self.initializers.append(
+        numpy_helper.from_array(
+            (self.rng.randn(*shape) * std).astype(np.float32), name))
+
+  def conv(self, x, name, in_channels, out_channels, kernel, stride=1,
+           group=1, relu=True):
+    self.add_initializer(name + "_w",
+                         [out_channels, in_channels // group, kernel, kernel],
+                         std=np.sqrt(2. / (in_channels // group * kernel**2)))
+    self.add_initializer(name + "_b", [out_channels], std=.1)
+    self.nodes.append(
+        helper.make_node("Conv", [x, name + "_w", name + "_b"],
+                         [name + "_conv" if relu else name],
+                         kernel_shape=[kernel, kernel],
+                         strides=[stride, stride],
+                         pads=[kernel // 2] * 4,
+                         group=group))
+    if relu:
+      self.nodes.append(helper.make_node("Relu", [name + "_conv"], [name]))
+    return name
+
+  def channel_shuffle(self, x, name, channels, size):
+    self.initializers.append(
+        numpy_helper.from_array(
+            np.array([0, GROUPS, channels // GROUPS, -1], np.int64),
+            name + "_grouped_shape"))
+    self.initializers.append(
+        numpy_helper.from_array(np.array([0, channels, size, size], np.int64),
+                                name + "_shape"))
+    self.nodes.extend([
+        helper.make_node("Reshape", [x, name + "_grouped_shape"],
+                         [name + "_grouped"]),
+        helper.make_node("Transpose", [name + "_grouped"],
+                         [name + "_shuffled"],
+                         perm=[0, 2, 1, 3]),
+        helper.make_node("Reshape", [name + "_shuffled", name + "_shape"],
+                         [name])
+    ])
+    return name
+
+  def unit(self, x, name, in_channels, out_channels, size, stride, group):
+    bottleneck = out_channels // 4
+    if stride == 2:
+      # the shortcut is concatenated to the output channels
+      out_channels -= in_channels
+    y = self.conv(x, name + "_a", in_channels, bottleneck, 1, group=group)
+    y = self.channel_shuffle(y, name + "_shuffle", bottleneck, size)
+    y = self.conv(y, name + "_dw", bottleneck, bottleneck, 3, stride,
+                  group=bottleneck, relu=False)
+    y = self.conv(y, name + "_b", bottleneck, out_channels, 1, group=GROUPS,
+                  relu=False)
+    if stride == 2:
+      # the padding is averaged as in TF
+      self.nodes.append(
+          helper.make_node("AveragePool", [x], [name + "_pool"],
+                           kernel_shape=[3, 3],
+                           strides=[2, 2],
+                           pads=[1, 1, 1, 1],
+                           count_include_pad=1))
+      self.nodes.append(
+          helper.make_node("Concat", [name + "_pool", y], [name + "_sum"],
+                           axis=1))
+    else:
+      self.nodes.append(helper.make_node("Add", [x, y], [name + "_sum"]))
+    self.nodes.append(helper.make_node("Relu", [name + "_sum"], [name]))
+    return name
+
+  def build(self, batch_size, image_size):
+    x = self.conv("X", "stem", 3, 24, 3, 2)
+    self.nodes.append(
+        helper.make_node("MaxPool", [x], ["pool"],
+                         kernel_shape=[3, 3],
+                         strides=[2, 2],
+                         pads=[1, 1, 1, 1]))
+    x = "pool"
+    in_channels = 24
+    size = (image_size + 3) // 4
+    for stage, (out_channels,
+                repeats) in enumerate([(240, 4), (480, 8), (960, 4)]):
+      for i in range(repeats):
+        # the first 1x1 Conv node of the network has too few input channels
+        # to be grouped
+        x = self.unit(x, "stage{}_{}".format(stage, i), in_channels,
+                      out_channels, size, 2 if i == 0 else 1,
+                      1 if stage == 0 and i == 0 else GROUPS)
+        in_channels = out_channels
+        size = (size + 1) // 2 if i == 0 else size
+    self.nodes.append(helper.make_node("GlobalAveragePool", [x], ["gap"]))
+    self.nodes.append(helper.make_node("Flatten", ["gap"], ["flat"]))
+    self.add_initializer("fc_w", [1000, 960], std=.01)
+    self.add_initializer("fc_b", [1000], std=.01)
+    self.nodes.append(
+        helper.make_node("Gemm", ["flat", "fc_w", "fc_b"], ["Y"], transB=1))
+    graph = helper.make_graph(
+        self.nodes, "shufflenet", [
+            helper.make_tensor_value_info(
+                "X", TensorProto.FLOAT, [batch_size, 3, image_size, image_size])
+        ], [helper.make_tensor_value_info("Y", TensorProto.FLOAT,
+                                          [batch_size, 1000])],
+        initializer=self.initializers)
+    return helper.make_model(graph, opset_imports=[helper.make_opsetid("", 11)])
+
+
+def split_groups(*args):
+  return False
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+  parser.add_argument("--batch_size", type=int, default=1)
+  parser.add_argument("--image_size", type=int, default=224)
+  parser.add_argument("--iterations", type=int, default=20,
+                      help="Number of timed runs of each implementation.")
+  args = parser.parse_args()
+
+  model = ShuffleNetBuilder().build(args.batch_size, args.image_size)
+  x = np.random.rand(args.batch_size, 3, args.image_size,
+                     args.image_size).astype(np.float32)
+  outputs = {}
+  is_depthwise = ConvMixin.__dict__["_is_depthwise"]
+  supports_grouped_conv = ConvMixin.__dict__["_supports_grouped_conv"]
+  for impl in ["baseline", "optimized"]:
+    if impl == "baseline":
+      ConvMixin._is_depthwise = classmethod(split_groups)
+      ConvMixin._supports_grouped_conv = classmethod(split_groups)
+    else:
+      ConvMixin._is_depthwise = is_depthwise
+      ConvMixin._supports_grouped_conv = supports_grouped_conv
+    tf_rep = prepare(model, native_grouped_conv=True)
+    start = time.time()
+    outputs[impl] = tf_rep.run(x).Y
+    convert_time = time.time() - start
+    start = time.time()
+    for _ in range(args.iterations):
+      tf_rep.run(x)
+    elapsed = (time.time() - start) / args.iterations
+    print("{:<9} {:8.2f} ms/run  {:8.2f} s first run".format(
+        impl, elapsed * 1000, convert_time))
+  print("max abs diff {:.2e}".format(
+      np.abs(outputs["baseline"] - outputs["optimized"]).max()))
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,84 @@
+"""Benchmark of importing onnx_tf.backend and converting a small model.
+
+Compares the lazy loading of handler modules, which imports only the
+handlers of the ops of the model (lazy), against importing all of them
+when onnx_tf.backend is imported (eager). Each run is done in a fresh
+process so that no module is already imported.
+
+Usage:
+  python benchmark/import_time.py --repeat 5
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import subprocess
+import sys
+import time
+
+
+def run(impl):
+  start = time.time()
+  import tensorflow as tf  # noqa
+  tf_import = time.time() - start
+
+  start = time.time()
+  import onnx_tf.backend
+  if impl == "eager":
+    from onnx_tf.common.handler_helper import import_all_backend_handlers
+    import_all_backend_handlers()
+  backend_import = time.time() - start
+
+  import numpy as np
+  from onnx import helper
+  from onnx import TensorProto
+
+  graph = helper.make_graph(
+      [
+          helper.make_node("Conv", ["X", "W"], ["Y"], pads=[1, 1, 1, 1]),
+          helper.make_node("Relu", ["Y"], ["Z"])
+      ],
+      "import_time",
+      [helper.make_tensor_value_info("X", TensorProto.FLOAT, [1, 3, 8, 8])],
+      [helper.make_tensor_value_info("Z", TensorProto.FLOAT, [1, 4, 8, 8])],
+      initializer=[
+          helper.make_tensor("W", TensorProto.FLOAT, [4, 3, 3, 3],
+                             np.ones(4 * 3 * 3 * 3).tolist())
+      ])
+  model = helper.make_model(graph,
+                            opset_imports=[helper.make_opsetid("", 13)])
+  start = time.time()
+  onnx_tf.backend.prepare(model).run(np.ones([1, 3, 8, 8], np.float32))
+  first_run = time.time() - start
+
+  handler_modules = [
+      name for name in sys.modules
+      if name.startswith("onnx_tf.handlers.backend.")
+  ]
+  print("{:<6} tensorflow {:6.3f}s  onnx_tf.backend {:6.3f}s  "
+        "first run {:6.3f}s  {} handler modules".format(
+            impl, tf_import, backend_import, first_run,
+            len(handler_modules)))
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+  parser.add_argument("--repeat", type=int, default=3,
+                      help="Number of runs of each implementation.")
+  parser.add_argument("--impl", choices=["lazy", "eager"],
+                      help=argparse.SUPPRESS)
+  args = parser.parse_args()
+
+  if args.impl:
+    run(args.impl)
+    return
+
+  for _ in range(args.repeat):
+    for impl in ["lazy", "eager"]:
+      subprocess.check_call([sys.executable, __file__, "--impl", impl])
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,142 @@
+"""Benchmark of loading an ONNX model and materializing its initializers.
+
+Compares TensorflowBackend._onnx_initializer_to_input_dict_items against
+the previous implementation going through Python lists (legacy), and the
+memory-mapped loading of external data files (mmap). Each run is done in
+a fresh process so that peak RSS is not shared.
+
+Usage:
+  python benchmark/initializers.py --size_mb 500 --num_tensors 50
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import onnx
+from onnx import helper
+from onnx import numpy_helper
+
+
+def make_model(path, size_mb, num_tensors, external_data=False):
+  size = size_mb * (1 << 20) // 4 // num_tensors
+  initializers = [
+      numpy_helper.from_array(
+          np.random.rand(size).astype(np.float32), "w{}".format(i))
+      for i in range(num_tensors)
+  ]
+  graph = helper.make_graph([], "initializers", [], [], initializers)
+  onnx.save(helper.make_model(graph),
+            path,
+            save_as_external_data=external_data,
+            location=os.path.basename(path) + ".data")
+
+
+def legacy_initializer_to_input_dict_items(initializer):
+  import tensorflow as tf
+  from onnx_tf.common import data_type
+
+  def tensor2list(onnx_tensor):
+    return numpy_helper.to_array(onnx_tensor).flatten().tolist()
+
+  return [(init.name,
+           tf.constant(tensor2list(init),
+                       shape=init.dims,
+                       dtype=data_type.onnx2tf(init.data_type)))
+          for init in initializer]
+
+
+def reset_peak_rss():
+  # Linux only, other platforms report the peak of the whole process
+  try:
+    with open("/proc/self/clear_refs", "w") as f:
+      f.write("5")
+  except (IOError, OSError):
+    pass
+
+
+def get_peak_rss_mb():
+  try:
+    with open("/proc/self/status") as f:
+      for line in f:
+        if line.startswith("VmHWM:"):
+          return int(line.split()[1]) / (1 << 10)
+  except (IOError, OSError):
+    pass
+  # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+  peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+  return peak / (1 << 20) if sys.platform == "darwin" else peak / (1 << 10)
+
+
+def run(path, impl):
+  import tensorflow as tf
+  from onnx_tf.backend import TensorflowBackend
+
+  # warm up TensorFlow so that its own allocations are not counted
+  tf.constant(np.zeros(1, np.float32))
+  reset_peak_rss()
+  rss_before = get_peak_rss_mb()
+  start = time.time()
+  if impl == "legacy":
+    model = onnx.load(path)
+    items = legacy_initializer_to_input_dict_items(model.graph.initializer)
+  elif impl == "current":
+    model = onnx.load(path)
+    items = TensorflowBackend._onnx_initializer_to_input_dict_items(
+        model.graph.initializer)
+  else:
+    model = onnx.load(path, load_external_data=False)
+    items = TensorflowBackend._onnx_initializer_to_input_dict_items(
+        model.graph.initializer, os.path.dirname(path))
+  elapsed = time.time() - start
+  print("{:<8} time {:8.3f}s  peak RSS {:8.1f} MB (+{:.1f} MB)  {} tensors".
+        format(impl, elapsed, get_peak_rss_mb(),
+               get_peak_rss_mb() - rss_before, len(items)))
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+  parser.add_argument("--size_mb", type=int, default=100,
+                      help="Total size of the initializers in MB.")
+  parser.add_argument("--num_tensors", type=int, default=10,
+                      help="Number of initializers.")
+  parser.add_argument("--impl", choices=["legacy", "current", "mmap"],
+                      help=argparse.SUPPRESS)
+  parser.add_argument("--model", help=argparse.SUPPRESS)
+  args = parser.parse_args()
+
+  if args.impl:
+    run(args.model, args.impl)
+    return
+
+  model_dir = tempfile.mkdtemp()
+  path = os.path.join(model_dir, "model.onnx")
+  external_path = os.path.join(model_dir, "external.onnx")
+  try:
+    make_model(path, args.size_mb, args.num_tensors)
+    make_model(external_path,
+               args.size_mb,
+               args.num_tensors,
+               external_data=True)
+    for impl, model_path in [("legacy", path), ("current", path),
+                             ("mmap", external_path)]:
+      subprocess.check_call([
+          sys.executable,
+          os.path.abspath(__file__), "--impl", impl, "--model", model_path
+      ])
+  finally:
+    shutil.rmtree(model_dir)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,151 @@
+"""Benchmark of the layout optimization of CNNs on CPU.
+
+Runs a ResNet-18 with random weights, made of Conv, BatchNormalization,
+Relu, MaxPool, Add, GlobalAveragePool and Gemm nodes, converted with the
+activations kept channels last between the nodes (optimized), and with
+the transposes to channels last and back around each Conv, MaxPool and
+BatchNormalization node (baseline). The number of transposes the output
+depends on is reported too.
+
+Usage:
+  python benchmark/layout.py --batch_size 1 --iterations 20
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import time
+
+import numpy as np
+from onnx import helper
+from onnx import numpy_helper
+from onnx import TensorProto
+import tensorflow as tf
+
+from onnx_tf.backend import prepare
+
+
+class ResNetBuilder(object):
+
+  def __init__(self):
+    self.nodes = []
+    self.initializers = []
+    self.rng = np.random.RandomState(0)
+
+  def add_initializer(self, name, shape, std=1.):
+    self.initializers.append(
+        numpy_helper.from_array(
+            (self.rng.randn(*shape) * std).astype(np.float32), name))
+
+  def conv_bn(self, x, name, in_channels, out_channels, kernel, stride,
+              relu=True):
+    self.add_initializer(name + "_w",
+                         [out_channels, in_channels, kernel, kernel],
+                         std=np.sqrt(2. / (in_channels * kernel * kernel)))
+    for param in ["scale", "bias", "mean"]:
+      self.add_initializer(name + "_" + param, [out_channels], std=.1)
+    self.initializers.append(
+        numpy_helper.from_array(np.ones(out_channels, np.float32),
+                                name + "_var"))
+    self.nodes.append(
+        helper.make_node("Conv", [x, name + "_w"], [name + "_conv"],
+                         kernel_shape=[kernel, kernel],
+                         strides=[stride, stride],
+                         pads=[kernel // 2] * 4))
+    self.nodes.append(
+        helper.make_node("BatchNormalization", [
+            name + "_conv", name + "_scale", name + "_bias", name + "_mean",
+            name + "_var"
+        ], [name + "_bn"]))
+    if not relu:
+      return name + "_bn"
+    self.nodes.append(helper.make_node("Relu", [name + "_bn"], [name]))
+    return name
+
+  def basic_block(self, x, name, in_channels, out_channels, stride):
+    y = self.conv_bn(x, name + "_a", in_channels, out_channels, 3, stride)
+    y = self.conv_bn(y, name + "_b", out_channels, out_channels, 3, 1,
+                     relu=False)
+    if stride != 1 or in_channels != out_channels:
+      x = self.conv_bn(x, name + "_down", in_channels, out_channels, 1,
+                       stride, relu=False)
+    self.nodes.append(helper.make_node("Add", [y, x], [name + "_add"]))
+    self.nodes.append(helper.make_node("Relu", [name + "_add"], [name]))
+    return name
+
+  def build(self, batch_size, image_size):
+    x = self.conv_bn("X", "stem", 3, 64, 7, 2)
+    self.nodes.append(
+        helper.make_node("MaxPool", [x], ["pool"],
+                         kernel_shape=[3, 3],
+                         strides=[2, 2],
+                         pads=[1, 1, 1, 1]))
+    x = "pool"
+    in_channels = 64
+    for stage, out_channels in enumerate([64, 128, 256, 512]):
+      for block in range(2):
+        stride = 2 if stage > 0 and block == 0 else 1
+        x = self.basic_block(x, "stage{}_{}".format(stage, block),
+                             in_channels, out_channels, stride)
+        in_channels = out_channels
+    self.nodes.append(helper.make_node("GlobalAveragePool", [x], ["gap"]))
+    self.nodes.append(helper.make_node("Flatten", ["gap"], ["flat"]))
+    self.add_initializer("fc_w", [1000, 512], std=.01)
+    self.add_initializer("fc_b", [1000], std=.01)
+    self.nodes.append(
+        helper.make_node("Gemm", ["flat", "fc_w", "fc_b"], ["Y"], transB=1))
+    graph = helper.make_graph(
+        self.nodes, "resnet18", [
+            helper.make_tensor_value_info(
+                "X", TensorProto.FLOAT, [batch_size, 3, image_size, image_size])
+        ], [helper.make_tensor_value_info("Y", TensorProto.FLOAT,
+                                          [batch_size, 1000])],
+        initializer=self.initializers)
+    return helper.make_model(graph, opset_imports=[helper.make_opsetid("", 11)])
+
+
+def count_transposes(tf_rep, input_shape):
+  graph = tf_rep.tf_module.__call__.get_concrete_function(
+      X=tf.TensorSpec(input_shape, tf.float32)).graph
+  ops = [tensor.op for tensor in graph.outputs]
+  seen = set()
+  count = 0
+  while ops:
+    op = ops.pop()
+    if op.name in seen:
+      continue
+    seen.add(op.name)
+    count += op.type == "Transpose"
+    ops.extend(tensor.op for tensor in op.inputs)
+  return count
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+  parser.add_argument("--batch_size", type=int, default=1)
+  parser.add_argument("--image_size", type=int, default=224)
+  parser.add_argument("--iterations", type=int, default=20,
+                      help="Number of timed runs of each implementation.")
+  args = parser.parse_args()
+
+  model = ResNetBuilder().build(args.batch_size, args.image_size)
+  input_shape = [args.batch_size, 3, args.image_size, args.image_size]
+  x = np.random.rand(*input_shape).astype(np.float32)
+  outputs = {}
+  for impl, optimize_layout in [("baseline", False), ("optimized", True)]:
+    tf_rep = prepare(model, optimize_layout=optimize_layout)
+    outputs[impl] = tf_rep.run(x).Y
+    start = time.time()
+    for _ in range(args.iterations):
+      tf_rep.run(x)
+    elapsed = (time.time() - start) / args.iterations
+    print("{:<9} {:8.2f} ms/run  {:3d} transposes".format(
+        impl, elapsed * 1000, count_transposes(tf_rep, input_shape)))
+  print("max abs diff {:.2e}".format(
+      np.abs(outputs["baseline"] - outputs["optimized"]).max()))
+
+
+if __name__ == "__main__":
+  main()
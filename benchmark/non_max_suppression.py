@@ -0,0 +1,120 @@
+"""Benchmark of the NonMaxSuppression handler.
+
+Runs a NonMaxSuppression node on random boxes and scores of a batch of
+images, converted by the handler (optimized), which selects the boxes of
+all the images and classes at once, and with one tf.image.non_max_suppression
+call per image and class whose results are concatenated (baseline).
+
+Usage:
+  python benchmark/non_max_suppression.py --batch_size 16 --num_classes 80
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import time
+
+import numpy as np
+from onnx import helper
+from onnx import numpy_helper
+from onnx import TensorProto
+import tensorflow as tf
+
+from onnx_tf.backend import prepare
+
+
+def make_model(args):
+  node = helper.make_node("NonMaxSuppression", [
+      "boxes", "scores", "max_output_boxes_per_class", "iou_threshold",
+      "score_threshold"
+  ], ["selected_indices"])
+  graph = helper.make_graph(
+      [node],
+      "non_max_suppression", [
+          helper.make_tensor_value_info(
+              "boxes", TensorProto.FLOAT,
+              [args.batch_size, args.num_boxes, 4]),
+          helper.make_tensor_value_info(
+              "scores", TensorProto.FLOAT,
+              [args.batch_size, args.num_classes, args.num_boxes])
+      ], [
+          helper.make_tensor_value_info("selected_indices", TensorProto.INT64,
+                                        [None, 3])
+      ],
+      initializer=[
+          numpy_helper.from_array(
+              np.array([args.max_output_boxes], np.int64),
+              "max_output_boxes_per_class"),
+          numpy_helper.from_array(np.array([args.iou_threshold], np.float32),
+                                  "iou_threshold"),
+          numpy_helper.from_array(
+              np.array([args.score_threshold], np.float32), "score_threshold")
+      ])
+  return helper.make_model(graph, opset_imports=[helper.make_opsetid("", 11)])
+
+
+def make_baseline(args):
+
+  @tf.function
+  def non_max_suppression(boxes, scores):
+    result = tf.zeros([0, 3], tf.int64)
+    for batch_i in tf.range(tf.shape(boxes)[0]):
+      tf.autograph.experimental.set_loop_options(
+          shape_invariants=[(result, tf.TensorShape([None, 3]))])
+      for class_j in tf.range(tf.shape(scores)[1]):
+        tf.autograph.experimental.set_loop_options(
+            shape_invariants=[(result, tf.TensorShape([None, 3]))])
+        selected = tf.image.non_max_suppression(boxes[batch_i],
+                                                scores[batch_i, class_j],
+                                                args.max_output_boxes,
+                                                args.iou_threshold,
+                                                args.score_threshold)
+        selected = tf.cast(tf.expand_dims(selected, 1), tf.int64)
+        indices = tf.cast(tf.tile([[batch_i, class_j]], [tf.size(selected),
+                                                         1]), tf.int64)
+        result = tf.concat([result, tf.concat([indices, selected], 1)], 0)
+    return result
+
+  return non_max_suppression
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+  parser.add_argument("--batch_size", type=int, default=16)
+  parser.add_argument("--num_classes", type=int, default=80)
+  parser.add_argument("--num_boxes", type=int, default=1000)
+  parser.add_argument("--max_output_boxes", type=int, default=100)
+  parser.add_argument("--iou_threshold", type=float, default=.5)
+  parser.add_argument("--score_threshold", type=float, default=.05)
+  parser.add_argument("--iterations", type=int, default=10,
+                      help="Number of timed runs of each implementation.")
+  args = parser.parse_args()
+
+  rng = np.random.RandomState(0)
+  corners = rng.rand(args.batch_size, args.num_boxes, 2) * 600
+  sizes = rng.rand(args.batch_size, args.num_boxes, 2) * 200 + 10
+  boxes = np.concatenate([corners, corners + sizes], 2).astype(np.float32)
+  scores = rng.rand(args.batch_size, args.num_classes,
+                    args.num_boxes).astype(np.float32)
+
+  tf_rep = prepare(make_model(args))
+  baseline = make_baseline(args)
+  outputs = {}
+  for impl, run in [("baseline", lambda: baseline(boxes, scores).numpy()),
+                    ("optimized",
+                     lambda: tf_rep.run([boxes, scores]).selected_indices)]:
+    outputs[impl] = run()
+    start = time.time()
+    for _ in range(args.iterations):
+      run()
+    elapsed = (time.time() - start) / args.iterations
+    print("{:<9} {:8.2f} ms/run  {:6d} boxes selected".format(
+        impl, elapsed * 1000, len(outputs[impl])))
+  print("same selection: {}".format(
+      np.array_equal(outputs["baseline"], outputs["optimized"])))
+
+
+if __name__ == "__main__":
+  main()
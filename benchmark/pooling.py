@@ -0,0 +1,94 @@
+"""Benchmark of the average pools excluding the padding.
+
+Runs AveragePool nodes with count_include_pad=0 whose padding the Tensorflow
+pooling ops can't exclude from the averages: explicit pads as in the
+Inception blocks, SAME_LOWER padding and ceil mode. They are converted by the
+handler (optimized), which divides the average of the padded input by the
+average of a padded mask of ones, and with tf.numpy_function running the
+numpy reference py_pool (baseline), as the pooling compatibility mode did.
+
+Usage:
+  python benchmark/pooling.py --batch_size 1 --channels 32 --size 28
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import time
+
+import numpy as np
+from onnx import helper
+from onnx import TensorProto
+import tensorflow as tf
+
+from onnx_tf.backend import prepare
+from onnx_tf.common.pooling_helper import py_pool
+
+CASES = [
+    ("pads", dict(kernel_shape=[3, 3], strides=[1, 1], pads=[1, 1, 1, 1])),
+    ("same_lower", dict(kernel_shape=[3, 3], strides=[2, 2],
+                        auto_pad="SAME_LOWER")),
+    ("ceil_mode", dict(kernel_shape=[3, 3], strides=[2, 2], ceil_mode=1)),
+]
+
+
+def make_model(args, attrs):
+  node = helper.make_node("AveragePool", ["X"], ["Y"],
+                          count_include_pad=0,
+                          **attrs)
+  graph = helper.make_graph([node], "average_pool", [
+      helper.make_tensor_value_info(
+          "X", TensorProto.FLOAT,
+          [args.batch_size, args.channels, args.size, args.size])
+  ], [
+      helper.make_tensor_value_info(
+          "Y", TensorProto.FLOAT, [args.batch_size, args.channels, None, None])
+  ])
+  return helper.make_model(graph, opset_imports=[helper.make_opsetid("", 11)])
+
+
+def make_baseline(attrs):
+  padding = attrs.get("pads", attrs.get("auto_pad", [0, 0, 0, 0]))
+  args = [
+      attrs["kernel_shape"], attrs["strides"], [1, 1], padding,
+      bool(attrs.get("ceil_mode", 0)), "AVG", False
+  ]
+
+  @tf.function
+  def average_pool(x):
+    return tf.numpy_function(py_pool, [x] + args, tf.float32)
+
+  return average_pool
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+  parser.add_argument("--batch_size", type=int, default=1)
+  parser.add_argument("--channels", type=int, default=32)
+  parser.add_argument("--size", type=int, default=28)
+  parser.add_argument("--iterations", type=int, default=5,
+                      help="Number of timed runs of each implementation.")
+  args = parser.parse_args()
+
+  x = np.random.RandomState(0).rand(args.batch_size, args.channels, args.size,
+                                    args.size).astype(np.float32)
+  for case, attrs in CASES:
+    tf_rep = prepare(make_model(args, attrs))
+    baseline = make_baseline(attrs)
+    outputs = {}
+    for impl, run in [("baseline", lambda: baseline(x).numpy()),
+                      ("optimized", lambda: tf_rep.run(x).Y)]:
+      outputs[impl] = run()
+      start = time.time()
+      for _ in range(args.iterations):
+        run()
+      elapsed = (time.time() - start) / args.iterations
+      print("{:<10} {:<9} {:10.2f} ms/run".format(case, impl, elapsed * 1000))
+    print("{:<10} max difference: {:.2e}".format(
+        case, np.abs(outputs["baseline"] - outputs["optimized"]).max()))
+
+
+if __name__ == "__main__":
+  main()
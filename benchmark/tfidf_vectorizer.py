@@ -0,0 +1,136 @@
+"""Benchmark of the TfIdfVectorizer handler.
+
+Runs a TfIdfVectorizer node counting a pool of random 1-grams and 2-grams in
+a batch of random token sequences, converted by the handler (optimized),
+which matches the ngrams of all the skips and rows against the pool by sorted
+searches, and with one tf.map_fn per ngram of the pool, skip and row
+(baseline). The time to trace the first run is reported with the time of the
+later runs, as it grows with the pool size in the baseline.
+
+Usage:
+  python benchmark/tfidf_vectorizer.py --pool_size 100 --batch_size 4
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import time
+
+import numpy as np
+from onnx import helper
+from onnx import TensorProto
+import tensorflow as tf
+
+from onnx_tf.backend import prepare
+
+
+def make_pool(args, rng):
+  # half 1-grams and half 2-grams, without duplicates
+  unigrams = rng.choice(args.vocabulary_size, args.pool_size // 2,
+                        replace=False)
+  bigrams = np.unique(
+      rng.randint(args.vocabulary_size**2, size=2 * args.pool_size))
+  bigrams = rng.permutation(bigrams)[:args.pool_size - len(unigrams)]
+  bigrams = np.stack([bigrams // args.vocabulary_size,
+                      bigrams % args.vocabulary_size], 1)
+  return unigrams.astype(np.int64), bigrams.astype(np.int64)
+
+
+def make_model(args, unigrams, bigrams):
+  node = helper.make_node(
+      "TfIdfVectorizer", ["X"], ["Y"],
+      mode="TF",
+      min_gram_length=1,
+      max_gram_length=2,
+      max_skip_count=args.max_skip_count,
+      ngram_counts=[0, len(unigrams)],
+      ngram_indexes=np.arange(args.pool_size),
+      pool_int64s=np.concatenate([unigrams, bigrams.ravel()]))
+  graph = helper.make_graph(
+      [node], "tfidf_vectorizer", [
+          helper.make_tensor_value_info("X", TensorProto.INT64,
+                                        [args.batch_size, args.length])
+      ], [
+          helper.make_tensor_value_info("Y", TensorProto.FLOAT,
+                                        [args.batch_size, args.pool_size])
+      ])
+  return helper.make_model(graph, opset_imports=[helper.make_opsetid("", 9)])
+
+
+def make_baseline(args, unigrams, bigrams):
+
+  def count(row, ngrams, skip):
+    n = ngrams.shape[1]
+    step = skip + 1
+    windows = tf.stack(
+        [row[i * step:args.length - (n - 1 - i) * step] for i in range(n)],
+        1)
+    counts = []
+    for ngram in ngrams:
+      matches = tf.map_fn(
+          lambda window: tf.cast(tf.reduce_all(tf.equal(window, ngram)),
+                                 tf.int32),
+          windows,
+          fn_output_signature=tf.int32)
+      counts.append(tf.reduce_sum(matches))
+    return tf.stack(counts)
+
+  @tf.function
+  def tfidf_vectorizer(x):
+    rows = []
+    for i in range(args.batch_size):
+      row = count(x[i], unigrams[:, np.newaxis], 0)
+      bigram_counts = [
+          count(x[i], bigrams, skip)
+          for skip in range(min(args.max_skip_count, args.length - 2) + 1)
+      ]
+      rows.append(tf.concat([row, tf.add_n(bigram_counts)], 0))
+    return tf.cast(tf.stack(rows), tf.float32)
+
+  return tfidf_vectorizer
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+  parser.add_argument("--pool_size", type=int, default=100)
+  parser.add_argument("--vocabulary_size", type=int, default=200)
+  parser.add_argument("--batch_size", type=int, default=4)
+  parser.add_argument("--length", type=int, default=64)
+  parser.add_argument("--max_skip_count", type=int, default=2)
+  parser.add_argument("--iterations", type=int, default=10,
+                      help="Number of timed runs of each implementation.")
+  parser.add_argument("--skip_baseline", action="store_true",
+                      help="Only run the optimized implementation, whose "
+                      "trace time does not grow with large pools.")
+  args = parser.parse_args()
+
+  rng = np.random.RandomState(0)
+  unigrams, bigrams = make_pool(args, rng)
+  x = rng.randint(args.vocabulary_size,
+                  size=[args.batch_size, args.length]).astype(np.int64)
+
+  tf_rep = prepare(make_model(args, unigrams, bigrams))
+  impls = [("optimized", lambda: tf_rep.run(x).Y)]
+  if not args.skip_baseline:
+    baseline = make_baseline(args, unigrams, bigrams)
+    impls.insert(0, ("baseline", lambda: baseline(x).numpy()))
+  outputs = {}
+  for impl, run in impls:
+    start = time.time()
+    outputs[impl] = run()
+    traced = time.time() - start
+    start = time.time()
+    for _ in range(args.iterations):
+      run()
+    elapsed = (time.time() - start) / args.iterations
+    print("{:<9} {:10.2f} ms first run {:8.2f} ms/run".format(
+        impl, traced * 1000, elapsed * 1000))
+  if not args.skip_baseline:
+    print("same counts: {}".format(
+        np.array_equal(outputs["baseline"], outputs["optimized"])))
+
+
+if __name__ == "__main__":
+  main()
@@ -12,19 +12,35 @@ try:
 except ImportError:  # will be 3.x series
   pass
 
+import concurrent.futures
+import os
+
+import numpy as np
+import onnx
 from onnx import defs
 from onnx import numpy_helper
+from onnx import TensorProto
 from onnx.backend.base import Backend
 from onnx.backend.base import namedtupledict
 from onnx.backend.test.runner import BackendIsNotSupposedToImplementIt
+from onnx.external_data_helper import ExternalDataInfo
 from onnx.helper import make_opsetid
 import tensorflow as tf
 
 from onnx_tf.backend_rep import TensorflowRep
+from onnx_tf.batch_norm_folding import BatchNormFolder
+from onnx_tf.common import ConversionContext
 from onnx_tf.common import data_type
 from onnx_tf.common import get_unique_suffix
 from onnx_tf.common import supports_device as common_supports_device
 from onnx_tf.common.handler_helper import get_all_backend_handlers
+from onnx_tf.common.layout_helper import sink_channels_first_transposes
+from onnx_tf.common.tf_helper import np_aligned_copy
+from onnx_tf.common.tf_helper import TF_ALIGNMENT_BYTES
+from onnx_tf.common.tf_helper import tf_tensor_from_value
+from onnx_tf.constant_folding import ConstantFolder
+from onnx_tf.conversion_cache import ConversionCache
+from onnx_tf.conversion_profiler import ConversionProfiler
 from onnx_tf.pb_wrapper import OnnxNode
 from onnx_tf.backend_tf_module import BackendTFModule, TFModule
 import onnx_tf.common as common
@@ -41,6 +57,11 @@ class TensorflowBackend(Backend):
               strict=True,
               logging_level='INFO',
               auto_cast=False,
+              jit_compile=False,
+              cache_dir=None,
+              profile=False,
+              fold_constants=False,
+              fold_batch_norm=False,
               **kwargs):
     """Prepare an ONNX model for Tensorflow Backend.
 
@@ -48,26 +69,199 @@ class TensorflowBackend(Backend):
     of the computational graph called TensorflowRep and returns
     the converted representation.
 
-    :param model: The ONNX model to be converted.
+    :param model: The ONNX model to be converted, or the path to it. Weights in
+      external data files that are not loaded into the model are memory-mapped
+      one tensor at a time, set external_data_dir in kwargs to the directory of
+      these files if model is not a path.
     :param device: The device to execute this model on. It can be either CPU (default) or CUDA.
+      On CPU, the activations are kept channels last from one node to the
+      next, set optimize_layout=False in kwargs to transpose them around each
+      node. The groups of grouped convolutions are convolved one by one, set
+      native_grouped_conv=True in kwargs to convolve them in a single op when
+      TF runs it for the dtype on this machine. The TF ops then depend on the
+      kernels of this TF build, so a model exported with it may not run on
+      other machines.
     :param strict: Whether to enforce semantic equivalence between the original model
       and the converted tensorflow model, defaults to True (yes, enforce semantic equivalence).
       Changing to False is strongly discouraged.
-      Currently, the strict flag only affects the behavior of MaxPool and AveragePool ops.
+      Currently, the strict flag does not affect the conversion of any op.
     :param logging_level: The logging level, default is INFO. Change it to DEBUG
       to see more conversion details or to WARNING to see less
     :param auto_cast: Whether to auto cast data types that might lose precision for the tensors
       with types not natively supported by Tensorflow, default is False
+    :param jit_compile: Whether to compile the model with XLA, default is False.
+      Nodes emitting ops that XLA can't compile are run outside of XLA.
+    :param cache_dir: Directory of an on-disk cache of converted models, default
+      is None (no cache). The model is stored as a SavedModel keyed by a hash of
+      the model and the arguments above, and loaded instead of converted on later
+      calls. A loaded model can't prune outputs and only runs inputs compatible
+      with its signatures. Set cache_max_bytes and cache_max_age (seconds) in
+      kwargs to evict entries by total size and age.
+    :param profile: Whether to profile the conversion of the nodes, default is
+      False. The nodes are converted when the model is first run, exported or
+      warmed up, then tf_rep.profiler reports the time, TF ops and memory of
+      each node and handler. A profiled model is not cached.
+    :param fold_constants: Whether to fold the nodes whose inputs are all
+      constants into initializers before the conversion, default is False.
+      A ModelProto is copied, set fold_constants_max_bytes in kwargs to keep
+      the nodes whose outputs are larger.
+    :param fold_batch_norm: Whether to fold the inference BatchNormalization
+      nodes into the weights and bias of the Conv, ConvTranspose or Gemm
+      nodes before them when these are initializers, default is False.
+      A ModelProto is copied.
 
     :returns: A TensorflowRep class object representing the ONNX model
     """
-    super(TensorflowBackend, cls).prepare(model, device, **kwargs)
+    # The checker looks for external data files next to a model path and in
+    # the current directory for a ModelProto, so a ModelProto with its own
+    # external_data_dir is checked by _check_model.
+    # a model loaded here is folded in place
+    loaded = isinstance(model, str)
+    if isinstance(model, str):
+      super(TensorflowBackend, cls).prepare(model, device, **kwargs)
+      if 'external_data_dir' not in kwargs:
+        kwargs['external_data_dir'] = os.path.dirname(os.path.abspath(model))
+      model = onnx.load(model, load_external_data=False)
+    elif 'external_data_dir' not in kwargs:
+      super(TensorflowBackend, cls).prepare(model, device, **kwargs)
+    else:
+      cls._check_model(model, kwargs['external_data_dir'])
     common.logger.setLevel(logging_level)
     common.logger.handlers[0].setLevel(logging_level)
-    common.sys_config.auto_cast = auto_cast
-    common.sys_config.device = device
 
-    return cls.onnx_model_to_tensorflow_rep(model, strict, **kwargs)
+    # tensor_dict for model debugging and profiles are not cached
+    gen_tensor_dict = kwargs[
+        'gen_tensor_dict'] if 'gen_tensor_dict' in kwargs else False
+    fold_constants_max_bytes = kwargs['fold_constants_max_bytes'] if (
+        'fold_constants_max_bytes' in kwargs) else None
+    optimize_layout = kwargs[
+        'optimize_layout'] if 'optimize_layout' in kwargs else True
+    native_grouped_conv = kwargs[
+        'native_grouped_conv'] if 'native_grouped_conv' in kwargs else False
+    if cache_dir is None or gen_tensor_dict or profile:
+      model = cls._fold_model(model, fold_constants, fold_constants_max_bytes,
+                              fold_batch_norm, loaded)
+      return cls.onnx_model_to_tensorflow_rep(model,
+                                              strict,
+                                              device=device,
+                                              auto_cast=auto_cast,
+                                              jit_compile=jit_compile,
+                                              profile=profile,
+                                              **kwargs)
+
+    cache = ConversionCache(
+        cache_dir,
+        max_bytes=kwargs['cache_max_bytes']
+        if 'cache_max_bytes' in kwargs else None,
+        max_age=kwargs['cache_max_age'] if 'cache_max_age' in kwargs else None)
+    key = cache.get_key(model,
+                        external_data_dir=kwargs['external_data_dir']
+                        if 'external_data_dir' in kwargs else None,
+                        device=device,
+                        strict=strict,
+                        auto_cast=auto_cast,
+                        jit_compile=jit_compile,
+                        # options at their default are left out of the key,
+                        # so that keys from before the options stay valid
+                        **({
+                            'fold_constants': True,
+                            'fold_constants_max_bytes': fold_constants_max_bytes
+                        } if fold_constants else {}),
+                        **({
+                            'fold_batch_norm': True
+                        } if fold_batch_norm else {}),
+                        **({
+                            'optimize_layout': False
+                        } if not optimize_layout else {}),
+                        **({
+                            'native_grouped_conv': True
+                        } if native_grouped_conv else {}))
+    cache.evict()
+    tf_rep = cache.load(key)
+    if tf_rep is None:
+      model = cls._fold_model(model, fold_constants, fold_constants_max_bytes,
+                              fold_batch_norm, loaded)
+      tf_rep = cls.onnx_model_to_tensorflow_rep(model,
+                                                strict,
+                                                device=device,
+                                                auto_cast=auto_cast,
+                                                jit_compile=jit_compile,
+                                                **kwargs)
+      cache.store(key, tf_rep)
+    return tf_rep
+
+  @classmethod
+  def prepare_many(cls, models, max_workers=None, **kwargs):
+    """Prepare ONNX models concurrently on a thread pool.
+
+    Each model is converted with its own conversion context, so models don't
+    share options or handler state. The nodes are converted to TF ops when a
+    model is first run, exported or warmed up, which may be done concurrently
+    on the returned models as well.
+
+    :param models: List of ONNX models to be converted, or paths to them.
+    :param max_workers: Maximum number of threads, default is the default of
+      concurrent.futures.ThreadPoolExecutor.
+    :param kwargs: Other args of prepare, used for all the models.
+
+    :returns: List of TensorflowRep class objects, in the order of models
+    """
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=max_workers) as executor:
+      futures = [
+          executor.submit(cls.prepare, model, **kwargs) for model in models
+      ]
+      return [future.result() for future in futures]
+
+  @classmethod
+  def fold_constants(cls, model, max_bytes=None, inplace=False):
+    """Fold the nodes of an ONNX model whose inputs are all constants.
+
+    The nodes of the main graph whose inputs are initializers, outputs of
+    Constant nodes or of other folded nodes, and Shape and Size nodes of
+    tensors with a static shape, are evaluated once and replaced with
+    initializers of their outputs.
+
+    :param model: ONNX ModelProto object.
+    :param max_bytes: Maximum size in bytes of the outputs of a folded node,
+      default is None (no limit).
+    :param inplace: Whether to fold the nodes of model instead of a copy of it,
+      default is False.
+
+    :returns: The folded ModelProto object and the number of folded nodes
+    """
+    return ConstantFolder(cls, max_bytes=max_bytes).fold(model, inplace=inplace)
+
+  @classmethod
+  def fold_batch_norm(cls, model, inplace=False):
+    """Fold the BatchNormalization nodes of an ONNX model into the nodes
+    before them.
+
+    The inference BatchNormalization nodes of the main graph following a Conv,
+    ConvTranspose or Gemm node, whose output they are the only user of, are
+    folded into the weights and bias of that node when these and the params
+    of the BatchNormalization node are initializers.
+
+    :param model: ONNX ModelProto object.
+    :param inplace: Whether to fold the nodes of model instead of a copy of it,
+      default is False.
+
+    :returns: The folded ModelProto object and the number of folded nodes
+    """
+    return BatchNormFolder(cls).fold(model, inplace=inplace)
+
+  @classmethod
+  def _fold_model(cls, model, fold_constants, fold_constants_max_bytes,
+                  fold_batch_norm, inplace):
+    # constants are folded first, they may be the weights of a Conv
+    if fold_constants:
+      model, _ = cls.fold_constants(model,
+                                    max_bytes=fold_constants_max_bytes,
+                                    inplace=inplace)
+      inplace = True
+    if fold_batch_norm:
+      model, _ = cls.fold_batch_norm(model, inplace=inplace)
+    return model
 
   @classmethod
   def onnx_model_to_tensorflow_rep(cls, model, strict, **kwargs):
@@ -107,6 +301,26 @@ class TensorflowBackend(Backend):
     # User provided input tensors, in the case the model inputs have unknown shapes
     input_tensor_dict = kwargs[
         'input_tensor_dict'] if 'input_tensor_dict' in kwargs else dict()
+    # To compile the model with XLA or not, default is False
+    jit_compile = kwargs[
+        'jit_compile'] if 'jit_compile' in kwargs else False
+    # Directory of the external data files of the initializers
+    external_data_dir = kwargs[
+        'external_data_dir'] if 'external_data_dir' in kwargs else None
+    # Device and auto_cast of prepare, sys_config if called directly
+    device = kwargs[
+        'device'] if 'device' in kwargs else common.sys_config.device
+    auto_cast = kwargs[
+        'auto_cast'] if 'auto_cast' in kwargs else common.sys_config.auto_cast
+    # To profile the conversion of the nodes or not, default is False
+    profile = kwargs['profile'] if 'profile' in kwargs else False
+    # To keep the activations channels last on CPU or not, default is True
+    optimize_layout = kwargs[
+        'optimize_layout'] if 'optimize_layout' in kwargs else True
+    # To convolve the groups of grouped convolutions in a single op or not,
+    # default is False
+    native_grouped_conv = kwargs[
+        'native_grouped_conv'] if 'native_grouped_conv' in kwargs else False
 
     handlers = cls._get_handlers(opset)
 
@@ -121,7 +335,18 @@ class TensorflowBackend(Backend):
 
     input_dict = dict()
 
-    module = BackendTFModule(handlers, opset, strict, graph_def, cls)
+    module = BackendTFModule(handlers,
+                             opset,
+                             strict,
+                             graph_def,
+                             cls,
+                             jit_compile,
+                             external_data_dir,
+                             device=device,
+                             auto_cast=auto_cast,
+                             profiler=ConversionProfiler() if profile else None,
+                             optimize_layout=optimize_layout,
+                             native_grouped_conv=native_grouped_conv)
     signatures = dict()
     for value_info in graph_def.input:
       if value_info.name in initialized:
@@ -160,30 +385,30 @@ class TensorflowBackend(Backend):
     tf_rep.signatures = signatures
     tf_rep.tensor_dict = module.gen_tensor_dict(
         input_dict) if gen_tensor_dict else None
-    tf_rep.onnx_op_list = cls._get_onnx_op_list(graph_def)
+    tf_rep.onnx_op_list = cls._get_onnx_op_list(graph_def, module.ctx)
+    tf_rep.profiler = module.ctx.profiler
     return tf_rep
 
   @classmethod
-  def _get_onnx_op_list(cls, graph_def):
+  def _get_onnx_op_list(cls, graph_def, ctx):
     """ Get ONNX operator counts of the model.
 
     :param graph_def: ONNX GraphProto object.
+    :param ctx: ConversionContext of the model.
     :return: Dictionary of all operators counts in the model.
     """
 
     def get_onnx_op_from_graph_and_subgraph(graph, op_list):
-      for node in graph.node:
+      for node in ctx.get_nodes(graph):
         op_list[node.op_type] = 1 if node.op_type not in op_list.keys(
         ) else op_list[node.op_type] + 1
         if node.op_type in ['Loop', 'Scan']:
-          onnx_node = OnnxNode(node)
-          body = onnx_node.attrs["body"]
+          body = node.attrs["body"]
           op_list = get_onnx_op_from_graph_and_subgraph(body, op_list)
         elif node.op_type == 'If':
-          onnx_node = OnnxNode(node)
-          then_branch = onnx_node.attrs['then_branch']
+          then_branch = node.attrs['then_branch']
           op_list = get_onnx_op_from_graph_and_subgraph(then_branch, op_list)
-          else_branch = onnx_node.attrs['else_branch']
+          else_branch = node.attrs['else_branch']
           op_list = get_onnx_op_from_graph_and_subgraph(else_branch, op_list)
       return op_list
 
@@ -194,24 +419,29 @@ class TensorflowBackend(Backend):
     return sorted_op_list
 
   @classmethod
-  def run_node(cls, node, inputs, device='CPU', outputs_info=None, **kwargs):
+  def run_node(cls,
+               node,
+               inputs,
+               device='CPU',
+               outputs_info=None,
+               return_tensors=False,
+               **kwargs):
     """ Run ONNX node.
 
     :param node: ONNX NodeProto object.
-    :param inputs: Inputs.
+    :param inputs: Inputs. Numpy arrays, tf.Tensors and DLPack capsules
+      are fed without a copy when dtype and alignment allow.
     :param device: Device run on.
     :param outputs_info: None.
-    :param kwargs: Other args.
+    :param return_tensors: Whether to return outputs as tf.Tensors instead
+      of numpy arrays, default is False.
+    :param kwargs: Other args, e.g. auto_cast, default is False.
     :return: Outputs.
     """
 
     super(TensorflowBackend, cls).run_node(node, inputs, device)
-    common.sys_config.device = device
 
     node = OnnxNode(node)
-    input_tensors = []
-    for i in inputs:
-      input_tensors.append(tf.constant(i))
 
     if isinstance(inputs, dict):
       feed_dict_raw = inputs
@@ -219,31 +449,57 @@ class TensorflowBackend(Backend):
       assert len(node.inputs) == len(inputs)
       feed_dict_raw = dict(zip(node.inputs, inputs))
 
-    # TODO: is constant the best way for feeding inputs?
-    input_dict = dict([(x[0], tf.constant(x[1])) for x in feed_dict_raw.items()
-                      ])
+    input_dict = dict([
+        (x[0], tf_tensor_from_value(x[1])) for x in feed_dict_raw.items()
+    ])
 
-    module = TFModule(node, cls)
+    module = TFModule(node,
+                      cls,
+                      device=device,
+                      auto_cast=kwargs['auto_cast']
+                      if 'auto_cast' in kwargs else False)
 
     output_vals = module(**input_dict)
-    output_vals = [
-        val.numpy() if isinstance(val, tf.Tensor) else val
-        for val in output_vals
-    ]
+    if not return_tensors:
+      output_vals = [
+          val.numpy() if isinstance(val, tf.Tensor) else val
+          for val in output_vals
+      ]
 
     return namedtupledict('Outputs', node.outputs)(*output_vals)
 
   @classmethod
-  def _onnx_initializer_to_input_dict_items(cls, initializer):
+  def _onnx_initializer_to_input_dict_items(cls,
+                                            initializer,
+                                            external_data_dir=None):
     """ Convert ONNX graph initializer to input dict items.
 
     :param initializer: ONNX graph initializer, list of TensorProto.
+    :param external_data_dir: Directory of the external data files of the
+      initializers whose data is not loaded, default is the current directory.
     :return: List of input dict items.
     """
 
-    def tensor2list(onnx_tensor):
-      # Use the onnx.numpy_helper because the data may be raw
-      return numpy_helper.to_array(onnx_tensor).flatten().tolist()
+    def tensor2tf(onnx_tensor):
+      # Use the onnx.numpy_helper because the data may be raw. Raw data is
+      # read as a numpy view of the protobuf bytes, copied once into an
+      # aligned buffer that the tensor shares. tf.constant would keep a
+      # second copy of large tensors.
+      if cls._is_external_data_unloaded(onnx_tensor):
+        array = cls._mmap_external_data(onnx_tensor, external_data_dir)
+      else:
+        array = numpy_helper.to_array(onnx_tensor)
+      dtype = data_type.onnx2tf(onnx_tensor.data_type)
+      if array.dtype == dtype.as_numpy_dtype and array.dtype.kind in "iuf":
+        # An aligned copy-on-write mapping of an external data file is
+        # shared as is, its pages are read from disk on first use.
+        if not (isinstance(array, np.memmap) and
+                array.ctypes.data % TF_ALIGNMENT_BYTES == 0):
+          array = np_aligned_copy(array)
+        return tf_tensor_from_value(array)
+      return tf.constant(array,
+                         dtype=dtype,
+                         name=validate_initializer_name(onnx_tensor.name))
 
     def validate_initializer_name(name):
       # Prepend a unique suffix if leading charater is "_"
@@ -254,12 +510,85 @@ class TensorflowBackend(Backend):
       return name.replace(
           ":", "_tf_") + "_" + get_unique_suffix() if ":" in name else name
 
-    return [(init.name,
-             tf.constant(tensor2list(init),
-                         shape=init.dims,
-                         dtype=data_type.onnx2tf(init.data_type),
-                         name=validate_initializer_name(init.name)))
-            for init in initializer]
+    return [(init.name, tensor2tf(init)) for init in initializer]
+
+  @classmethod
+  def _check_model(cls, model, external_data_dir):
+    """ Check a ModelProto whose external data files are in
+    external_data_dir. The files of the tensors whose data is not loaded are
+    looked for there, then the checker checks a copy of the model in which
+    these tensors hold a placeholder value, so that it doesn't look for them
+    in the current directory and their data is not read.
+
+    :param model: ONNX ModelProto object.
+    :param external_data_dir: Directory of the external data files.
+    :return: None.
+    """
+    checked_model = onnx.ModelProto()
+    checked_model.CopyFrom(model)
+    for tensor in cls._get_graph_tensors(checked_model.graph):
+      if not cls._is_external_data_unloaded(tensor):
+        continue
+      path = os.path.join(external_data_dir, ExternalDataInfo(tensor).location)
+      if not os.path.isfile(path):
+        raise onnx.checker.ValidationError(
+            "Data of TensorProto ( tensor name: {}) should be stored in {}, "
+            "but it doesn't exist or is not accessible.".format(
+                tensor.name, path))
+      del tensor.external_data[:]
+      tensor.data_location = TensorProto.DEFAULT
+      # the checker needs a value, not its size
+      tensor.raw_data = b"\0"
+    onnx.checker.check_model(checked_model)
+
+  @classmethod
+  def _get_graph_tensors(cls, graph):
+    """ Get the initializers and the tensor attributes of a graph and of
+    its subgraphs.
+
+    :param graph: ONNX GraphProto object.
+    :return: Generator of TensorProto.
+    """
+    for tensor in graph.initializer:
+      yield tensor
+    for node in graph.node:
+      for attr in node.attribute:
+        if attr.HasField("t"):
+          yield attr.t
+        for tensor in attr.tensors:
+          yield tensor
+        subgraphs = list(attr.graphs) + ([attr.g] if attr.HasField("g") else [])
+        for subgraph in subgraphs:
+          for tensor in cls._get_graph_tensors(subgraph):
+            yield tensor
+
+  @classmethod
+  def _is_external_data_unloaded(cls, onnx_tensor):
+    return (onnx_tensor.data_location == TensorProto.EXTERNAL and
+            not onnx_tensor.HasField("raw_data"))
+
+  @classmethod
+  def _mmap_external_data(cls, onnx_tensor, external_data_dir=None):
+    """ Memory-map the external data of an ONNX tensor.
+
+    :param onnx_tensor: TensorProto whose data is in an external file.
+    :param external_data_dir: Directory of the external data file, default
+      is the current directory.
+    :return: Numpy array, a copy-on-write np.memmap if the tensor is not empty.
+    """
+    if onnx_tensor.data_type == TensorProto.STRING:
+      raise ValueError("External data of string tensor {} is not supported.".
+                       format(onnx_tensor.name))
+    info = ExternalDataInfo(onnx_tensor)
+    dtype = data_type.onnx2tf(onnx_tensor.data_type).as_numpy_dtype
+    shape = tuple(onnx_tensor.dims)
+    if np.prod(shape, dtype=np.int64) == 0:
+      return np.zeros(shape, dtype=dtype)
+    return np.memmap(os.path.join(external_data_dir or "", info.location),
+                     dtype=dtype,
+                     mode="c",
+                     offset=info.offset or 0,
+                     shape=shape)
 
   @classmethod
   def _onnx_node_to_tensorflow_op(cls,
@@ -267,7 +596,8 @@ class TensorflowBackend(Backend):
                                   tensor_dict,
                                   handlers=None,
                                   opset=None,
-                                  strict=True):
+                                  strict=True,
+                                  ctx=None):
     """
     Convert onnx node to tensorflow op.
 
@@ -278,15 +608,41 @@ class TensorflowBackend(Backend):
       strict: whether to enforce semantic equivalence between the original model
         and the converted tensorflow model, defaults to True (yes, enforce semantic equivalence).
         Changing to False is strongly discouraged.
+      ctx: ConversionContext of the model, passed to the handler. Default is
+        made from sys_config.
     Returns:
       Tensorflow op
     """
     handlers = handlers or cls._get_handlers(opset)
+    ctx = ctx or ConversionContext(device=common.sys_config.device,
+                                   auto_cast=common.sys_config.auto_cast,
+                                   strict=strict,
+                                   opset=opset)
     if handlers:
       handler = handlers[node.domain].get(
           node.op_type, None) if node.domain in handlers else None
       if handler:
-        return handler.handle(node, tensor_dict=tensor_dict, strict=strict)
+        perm = None
+        if ctx.optimize_layout and ctx.device == 'CPU':
+          # run the node on the channels last tensors its inputs were
+          # transposed from, and transpose its outputs instead
+          channels_last_dict, perm = sink_channels_first_transposes(
+              node, tensor_dict)
+          tensor_dict = channels_last_dict or tensor_dict
+        if ctx.profiler is not None:
+          with ctx.profiler.profile_node(node, handler):
+            outputs = handler.handle(node,
+                                     tensor_dict=tensor_dict,
+                                     strict=strict,
+                                     ctx=ctx)
+        else:
+          outputs = handler.handle(node,
+                                   tensor_dict=tensor_dict,
+                                   strict=strict,
+                                   ctx=ctx)
+        if perm is not None:
+          outputs = [tf.transpose(output, perm=perm) for output in outputs]
+        return outputs
 
     raise BackendIsNotSupposedToImplementIt("{} is not implemented.".format(
         node.op_type))
@@ -311,7 +667,8 @@ class TensorflowBackend(Backend):
                                    subgraph,
                                    tensor_dict,
                                    opset=None,
-                                   strict=True):
+                                   strict=True,
+                                   ctx=None):
     """
     Converts ONNX graph to Tensorflow operations
     Args:
@@ -321,15 +678,18 @@ class TensorflowBackend(Backend):
       strict:           whether to enforce semantic equivalence between the
                         original model and the converted tensorflow model,
                         defaults to True (yes, enforce semantic equivalence).
+      ctx:              ConversionContext of the model, default is made
+                        from sys_config.
     Returns:
       array of Tensorflow Tensors
     """
-    for node in subgraph.node:
-      onnx_node = OnnxNode(node)
+    nodes = ctx.get_nodes(subgraph) if ctx else map(OnnxNode, subgraph.node)
+    for onnx_node in nodes:
       output_ops = cls._onnx_node_to_tensorflow_op(onnx_node,
                                                    tensor_dict,
                                                    opset=opset,
-                                                   strict=strict)
+                                                   strict=strict,
+                                                   ctx=ctx)
       curr_node_output_map = dict(zip(onnx_node.outputs, output_ops))
       tensor_dict.update(curr_node_output_map)
     return tensor_dict
@@ -353,6 +713,12 @@ class TensorflowBackend(Backend):
 
 prepare = TensorflowBackend.prepare
 
+prepare_many = TensorflowBackend.prepare_many
+
+fold_constants = TensorflowBackend.fold_constants
+
+fold_batch_norm = TensorflowBackend.fold_batch_norm
+
 run_node = TensorflowBackend.run_node
 
 run_model = TensorflowBackend.run_model
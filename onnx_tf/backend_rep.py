@@ -3,20 +3,206 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import asyncio
+from collections import namedtuple
+from collections import OrderedDict
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import threading
+import time
+
 import tensorflow as tf
 
 from onnx.backend.base import BackendRep, namedtupledict
 
+import onnx_tf.common as common
+from onnx_tf.common.async_helper import AsyncLimiter
+from onnx_tf.common.tf_helper import tf_tensor_from_value
+
+CacheInfo = namedtuple("CacheInfo",
+                       ["hits", "misses", "retraces", "maxsize", "currsize"])
+WarmupInfo = namedtuple("WarmupInfo", ["specs", "trace_time", "run_time"])
+
+
+class ConcreteFunctionCache(object):
+  """ Bounded LRU cache of the concrete functions of a tf.function,
+  keyed by the names, shapes and dtypes of the inputs.
+
+  On a miss, the concrete function traced from the relaxed signatures
+  (unknown dimensions left as None) is reused whenever the inputs are
+  compatible with it, so only inputs outside of the signatures retrace.
+
+  The cache is thread safe. Traces run outside of its lock: a thread
+  only waits for the trace of the key it gets, and counts a miss. Each trace
+  of the cache counts one retrace.
+  """
+
+  def __init__(self, tf_func, signatures=None, maxsize=128):
+    self._tf_func = tf_func
+    self._signatures = signatures or {}
+    self._maxsize = maxsize
+    self._cache = OrderedDict()
+    self._lock = threading.Lock()
+    # futures of the keys being traced and of the relaxed signatures trace
+    self._pending = {}
+    self._relaxed_future = None
+    # incremented by cache_clear, traces started before it aren't cached
+    # nor counted
+    self._generation = 0
+    self._hits = 0
+    self._misses = 0
+    self._retraces = 0
+
+  @property
+  def signatures(self):
+    return self._signatures
+
+  @staticmethod
+  def get_key(input_dict):
+    """ Get cache key of the given inputs.
+
+    :param input_dict: Dict of input name to tf.Tensor.
+    :return: Hashable key.
+    """
+    return tuple((name, tuple(tensor.shape.as_list()), tensor.dtype)
+                 for name, tensor in sorted(input_dict.items()))
+
+  def get(self, input_dict):
+    """ Get concrete function for the given inputs, tracing if needed.
+
+    :param input_dict: Dict of input name to tf.Tensor.
+    :return: ConcreteFunction.
+    """
+    key = self.get_key(input_dict)
+    with self._lock:
+      concrete_func = self._cache.get(key, None)
+      if concrete_func is not None:
+        self._hits += 1
+        self._cache.move_to_end(key)
+        return concrete_func
+      # Only the first thread missing a key traces it, outside of the lock,
+      # the others wait for its future, so that a trace doesn't block the
+      # threads getting other keys.
+      self._misses += 1
+      generation = self._generation
+      future = self._pending.get(key, None)
+      tracing = future is None
+      if tracing:
+        future = self._pending[key] = Future()
+    if not tracing:
+      return future.result()
+
+    try:
+      concrete_func = self._get_relaxed_func(input_dict)
+      retraced = concrete_func is None
+      if retraced:
+        concrete_func = self._trace({
+            name: tf.TensorSpec(tensor.shape, tensor.dtype,
+                                self._get_spec_name(name))
+            for name, tensor in input_dict.items()
+        })
+    except BaseException as e:
+      with self._lock:
+        if self._generation == generation:
+          del self._pending[key]
+      future.set_exception(e)
+      raise
+    with self._lock:
+      if self._generation == generation:
+        del self._pending[key]
+        if retraced:
+          self._retraces += 1
+        self._cache[key] = concrete_func
+        if self._maxsize is not None and len(self._cache) > self._maxsize:
+          self._cache.popitem(last=False)
+    future.set_result(concrete_func)
+    return concrete_func
+
+  def _get_spec_name(self, name):
+    return self._signatures[name].name if name in self._signatures else name
+
+  def _get_relaxed_func(self, input_dict):
+    if set(input_dict) != set(self._signatures):
+      return None
+    if not all(self._signatures[name].is_compatible_with(tensor)
+               for name, tensor in input_dict.items()):
+      return None
+    with self._lock:
+      generation = self._generation
+      future = self._relaxed_future
+      tracing = future is None
+      if tracing:
+        future = self._relaxed_future = Future()
+    if not tracing:
+      return future.result()
+
+    relaxed_func = None
+    try:
+      relaxed_func = self._trace(self._signatures)
+      with self._lock:
+        if self._generation == generation:
+          self._retraces += 1
+    except Exception as e:  # pylint: disable=broad-except
+      # Some handlers need static shapes to trace, fall back to
+      # tracing for the exact input shapes.
+      common.logger.debug(
+          "Fail to trace with relaxed signatures, fall back to exact "
+          "input shapes: {}".format(e))
+    finally:
+      future.set_result(relaxed_func)
+    return relaxed_func
+
+  def _trace(self, specs):
+    return self._tf_func.get_concrete_function(**specs)
+
+  def cache_info(self):
+    """ Get cache statistics.
+
+    :return: CacheInfo namedtuple.
+    """
+    with self._lock:
+      return CacheInfo(self._hits, self._misses, self._retraces, self._maxsize,
+                       len(self._cache))
+
+  def cache_clear(self):
+    """ Clear the cache and its statistics.
+    """
+    with self._lock:
+      self._cache.clear()
+      # the threads waiting for traces in flight keep their futures
+      self._pending.clear()
+      self._relaxed_future = None
+      self._generation += 1
+      self._hits = self._misses = self._retraces = 0
+
 
 class TensorflowRep(BackendRep):
 
-  def __init__(self, graph=None, inputs=None, outputs=None, tensor_dict=None):
+  def __init__(self,
+               graph=None,
+               inputs=None,
+               outputs=None,
+               tensor_dict=None,
+               function_cache_size=128,
+               executor=None,
+               max_pending=None):
     super(TensorflowRep, self).__init__()
     self._graph = graph
     self._inputs = inputs or []
     self._outputs = outputs or []
     self._tensor_dict = tensor_dict or {}
     self._tf_module = None
+    self._signatures = {}
+    self._function_cache_size = function_cache_size
+    self._function_cache = None
+    self._pruned_function_caches = {}
+    self._pruned_function_caches_lock = threading.Lock()
+    self._warmup_specs = []
+    self._executor = executor
+    self._executor_lock = threading.Lock()
+    self._async_limiter = AsyncLimiter(max_pending)
+    self._profiler = None
 
   @property
   def graph(self):
@@ -65,16 +251,147 @@ class TensorflowRep(BackendRep):
   @tf_module.setter
   def tf_module(self, tf_module):
     self._tf_module = tf_module
+    self._reset_function_caches()
 
-  def run(self, inputs, **kwargs):
-    """ Run TensorflowRep.
+  @property
+  def signatures(self):
+    return self._signatures
 
-    :param inputs: Given inputs.
-    :param kwargs: Other args.
-    :return: Outputs.
+  @signatures.setter
+  def signatures(self, signatures):
+    self._signatures = signatures
+    self._reset_function_caches()
+
+  @property
+  def profiler(self):
+    """ ConversionProfiler of the model prepared with profile=True, or None.
     """
-    super(TensorflowRep, self).run(inputs, **kwargs)
+    return self._profiler
+
+  @profiler.setter
+  def profiler(self, profiler):
+    self._profiler = profiler
+
+  @property
+  def function_cache_size(self):
+    return self._function_cache_size
+
+  @function_cache_size.setter
+  def function_cache_size(self, function_cache_size):
+    self._function_cache_size = function_cache_size
+    self._reset_function_caches()
+
+  @property
+  def function_cache(self):
+    if self._function_cache is None:
+      self._function_cache = ConcreteFunctionCache(
+          self.tf_module.__call__, self.signatures, self.function_cache_size)
+    return self._function_cache
+
+  @property
+  def warmup_specs(self):
+    """ List of dicts of input name to tf.TensorSpec given to warmup.
+    export_graph adds a concrete signature for each of them.
+    """
+    return self._warmup_specs
+
+  def _reset_function_caches(self):
+    self._function_cache = None
+    with self._pruned_function_caches_lock:
+      self._pruned_function_caches = {}
+
+  def _is_pruned(self, outputs):
+    return outputs is not None and list(outputs) != list(self.outputs)
+
+  def _get_pruned_function(self, outputs):
+    """ Get tf.function computing only the given outputs and the
+    signatures of the graph inputs they depend on.
+
+    :param outputs: List of names of the tensors to compute.
+    :return: tf.function and dict of input name to tf.TensorSpec.
+    """
+    if not hasattr(self.tf_module, "prune"):
+      raise RuntimeError(
+          "Pruning outputs needs the ONNX graph, which a TensorflowRep "
+          "loaded from a SavedModel doesn't have.")
+    _, inputs = self.tf_module.prune(outputs)
+    tf_func = tf.function(
+        functools.partial(self.tf_module.run_graph, list(outputs)))
+    signatures = dict([(name, self.signatures[name])
+                       for name in inputs
+                       if name in self.signatures])
+    return tf_func, signatures
 
+  def _get_pruned_function_cache(self, outputs):
+    key = tuple(outputs)
+    with self._pruned_function_caches_lock:
+      if key not in self._pruned_function_caches:
+        tf_func, signatures = self._get_pruned_function(outputs)
+        self._pruned_function_caches[key] = ConcreteFunctionCache(
+            tf_func, signatures, self.function_cache_size)
+      return self._pruned_function_caches[key]
+
+  def get_function_cache(self, outputs=None):
+    """ Get the concrete function cache used by run for the given outputs.
+
+    :param outputs: List of names of the tensors to compute. Default is
+      None, which means self.outputs.
+    :return: ConcreteFunctionCache object.
+    """
+    if not self._is_pruned(outputs):
+      return self.function_cache
+    return self._get_pruned_function_cache(outputs)
+
+  @property
+  def executor(self):
+    """ The concurrent.futures.Executor run_async runs on. A
+    ThreadPoolExecutor is created on first use if none is set.
+    """
+    with self._executor_lock:
+      if self._executor is None:
+        self._executor = ThreadPoolExecutor(thread_name_prefix="onnx-tf")
+      return self._executor
+
+  @executor.setter
+  def executor(self, executor):
+    with self._executor_lock:
+      self._executor = executor
+
+  @property
+  def max_pending(self):
+    """ Maximum number of run_async calls in flight per event loop.
+    Further calls wait for a free slot. None means no limit.
+    """
+    return self._async_limiter.limit
+
+  @max_pending.setter
+  def max_pending(self, max_pending):
+    self._async_limiter = AsyncLimiter(max_pending)
+
+  def cache_info(self, outputs=None):
+    """ Get statistics of the concrete function cache used by run.
+
+    :param outputs: List of names of the tensors to compute. Default is
+      None, which means self.outputs.
+    :return: CacheInfo namedtuple of hits, misses, retraces, maxsize
+      and currsize.
+    """
+    return self.get_function_cache(outputs).cache_info()
+
+  def cache_clear(self):
+    """ Clear the concrete function caches used by run.
+    """
+    self.function_cache.cache_clear()
+    with self._pruned_function_caches_lock:
+      self._pruned_function_caches = {}
+
+  def get_input_dict(self, inputs):
+    """ Get dict of input name to tf.Tensor from inputs given to run.
+
+    :param inputs: Given inputs, a dict, a list or tuple in the order of
+      self.inputs, or a single value for the first input.
+    :return: Dict of input name to tf.Tensor.
+    """
     if isinstance(inputs, dict):
       feed_dict = inputs
     elif isinstance(inputs, list) or isinstance(inputs, tuple):
@@ -88,29 +405,190 @@ class TensorflowRep(BackendRep):
       # single input
       feed_dict = dict([(self.inputs[0], inputs)])
 
-    input_dict = dict([(x[0], tf.constant(x[1])) for x in feed_dict.items()])
+    return dict([
+        (x[0], tf_tensor_from_value(x[1])) for x in feed_dict.items()
+    ])
 
-    output_values = self.tf_module(**input_dict)
-    output_values = [
-        val.numpy() if isinstance(val, tf.Tensor) else val
-        for val in output_values
-    ]
+  def run(self, inputs, return_tensors=False, outputs=None, **kwargs):
+    """ Run TensorflowRep.
 
-    return namedtupledict('Outputs', self.outputs)(*output_values)
+    :param inputs: Given inputs. Numpy arrays, tf.Tensors and DLPack
+      capsules are fed without a copy when dtype and alignment allow.
+      Numpy arrays must be aligned to 64 bytes. Ordinary arrays, like those
+      of np.random or np.zeros, are often only 16-byte aligned and are
+      copied, unless they are made with tf_helper.np_aligned_copy.
+    :param return_tensors: Whether to return outputs as tf.Tensors instead
+      of numpy arrays, default is False.
+    :param outputs: List of names of the tensors to compute, graph outputs
+      or intermediate tensors. Only the nodes they depend on are converted
+      and run. Default is None, which means self.outputs.
+    :param kwargs: Other args.
+    :return: Outputs.
+    """
+    super(TensorflowRep, self).run(inputs, **kwargs)
 
-  def export_graph(self, path):
+    input_dict = self.get_input_dict(inputs)
+    function_cache, input_dict, outputs = self._prepare_run(
+        input_dict, outputs)
+
+    concrete_func = function_cache.get(input_dict)
+    output_values = concrete_func(**input_dict)
+    if not return_tensors:
+      output_values = [
+          val.numpy() if isinstance(val, tf.Tensor) else val
+          for val in output_values
+      ]
+
+    return namedtupledict('Outputs', outputs)(*output_values)
+
+  def _prepare_run(self, input_dict, outputs=None):
+    """ Get the concrete function cache, the inputs to feed and the output
+    names for running the given outputs.
+
+    :param input_dict: Dict of input name to tf.Tensor.
+    :param outputs: List of names of the tensors to compute, default is
+      self.outputs.
+    :return: ConcreteFunctionCache, input dict and list of output names.
+    """
+    if not self._is_pruned(outputs):
+      return self.function_cache, input_dict, self.outputs
+    function_cache = self._get_pruned_function_cache(outputs)
+    # inputs the outputs don't depend on are not fed
+    input_dict = dict([(name, tensor)
+                       for name, tensor in input_dict.items()
+                       if name in function_cache.signatures])
+    return function_cache, input_dict, outputs
+
+  def _get_warmup_specs(self, shapes):
+    if isinstance(shapes, dict):
+      items = shapes.items()
+    elif isinstance(shapes, list) or isinstance(shapes, tuple):
+      if len(self.inputs) != len(shapes):
+        raise ValueError('Expected {} shapes for graph inputs ({}), '
+                         'but got {}.'.format(len(self.inputs),
+                                              ', '.join(self.inputs),
+                                              len(shapes)))
+      items = zip(self.inputs, shapes)
+    else:
+      raise TypeError('Shapes must be a dict or a list, but got {}.'.format(
+          type(shapes).__name__))
+
+    specs = {}
+    for name, shape in items:
+      if name not in self.signatures:
+        raise ValueError('{} is not an input of the graph.'.format(name))
+      if isinstance(shape, tf.TensorSpec):
+        dtype = shape.dtype
+        shape = shape.shape
+      else:
+        dtype = self.signatures[name].dtype
+      shape = tf.TensorShape(shape)
+      if not shape.is_fully_defined():
+        raise ValueError('Shape {} of input {} is not fully defined.'.format(
+            shape, name))
+      specs[name] = tf.TensorSpec(shape, dtype, self.signatures[name].name)
+    return specs
+
+  def warmup(self, shapes, outputs=None):
+    """Trace and run the model ahead of time for the given input shapes.
+
+    This function pays the tracing and graph optimization cost of the given
+    input shapes up front, so that run doesn't pay it inside a request.
+
+    :param shapes: List of input shapes to warm up. Each item is a dict of
+      input name to shape, or a list of shapes in the order of self.inputs.
+      A shape is a list of ints or a tf.TensorSpec to also set the dtype.
+      Inputs are filled with zeros.
+    :param outputs: List of names of the tensors to compute, same as for
+      run. Default is None, which means self.outputs.
+
+    :returns: List of WarmupInfo namedtuple of specs, trace_time and
+      run_time in seconds, one for each item of shapes.
+    """
+    infos = []
+    for item in shapes:
+      specs = self._get_warmup_specs(item)
+      input_dict = dict([
+          (name,
+           tf.fill(spec.shape, tf.constant("", tf.string)) if spec.dtype
+           == tf.string else tf.zeros(spec.shape, spec.dtype))
+          for name, spec in specs.items()
+      ])
+      function_cache, input_dict, _ = self._prepare_run(input_dict, outputs)
+
+      start = time.time()
+      concrete_func = function_cache.get(input_dict)
+      trace_time = time.time() - start
+      start = time.time()
+      for val in concrete_func(**input_dict):
+        if isinstance(val, tf.Tensor):
+          val.numpy()
+      run_time = time.time() - start
+
+      if specs not in self._warmup_specs:
+        self._warmup_specs.append(specs)
+      common.logger.info("Warmup {}: trace {:.3f}s, run {:.3f}s.".format(
+          ", ".join("{}{}".format(name, spec.shape.as_list())
+                    for name, spec in sorted(specs.items())), trace_time,
+          run_time))
+      infos.append(WarmupInfo(specs, trace_time, run_time))
+    return infos
+
+  async def run_async(self, inputs, return_tensors=False, **kwargs):
+    """ Run TensorflowRep on self.executor without blocking the event loop.
+
+    Cancelling the call before it starts on the executor drops it, once
+    started it runs to completion and its outputs are discarded.
+
+    :param inputs: Given inputs, same as for run.
+    :param return_tensors: Whether to return outputs as tf.Tensors instead
+      of numpy arrays, default is False.
+    :param kwargs: Other args.
+    :return: Outputs.
+    """
+    async with self._async_limiter:
+      return await asyncio.get_running_loop().run_in_executor(
+          self.executor,
+          functools.partial(self.run,
+                            inputs,
+                            return_tensors=return_tensors,
+                            **kwargs))
+
+  def export_graph(self, path, outputs=None):
     """Export backend representation to a Tensorflow proto file.
 
     This function obtains the graph proto corresponding to the ONNX
     model associated with the backend representation and serializes
-    to a protobuf file.
+    to a protobuf file. Input shapes given to warmup are exported as
+    additional signatures named warmup_0, warmup_1 and so on.
 
     :param path: The path to the output TF protobuf file.
+    :param outputs: List of names of the tensors the exported signature
+      returns. The graph is pruned back from them and only the inputs they
+      depend on are kept. Default is None, which means all graph outputs.
 
     :returns: none.
     """
-    tf.saved_model.save(
-        self.tf_module,
-        path,
-        signatures=self.tf_module.__call__.get_concrete_function(
-            **self.signatures))
+    if self._is_pruned(outputs):
+      tf_func, signatures = self._get_pruned_function(outputs)
+    else:
+      tf_func, signatures = self.tf_module.__call__, self.signatures
+    concrete_funcs = {
+        "serving_default": tf_func.get_concrete_function(**signatures)
+    }
+    if self.warmup_specs:
+      if not hasattr(self.tf_module, "run_graph"):
+        raise RuntimeError(
+            "Exporting warmup shapes needs the ONNX graph, which a "
+            "TensorflowRep loaded from a SavedModel doesn't have.")
+      # tf_func would reuse its relaxed trace for the warmup shapes, trace
+      # them on a separate tf.function to export static shapes
+      warmup_func = tf.function(
+          functools.partial(self.tf_module.run_graph,
+                            list(outputs) if outputs else self.outputs))
+    for i, specs in enumerate(self.warmup_specs):
+      concrete_funcs["warmup_{}".format(i)] = warmup_func.get_concrete_function(
+          **dict([(name, spec)
+                  for name, spec in specs.items()
+                  if name in signatures]))
+    tf.saved_model.save(self.tf_module, path, signatures=concrete_funcs)
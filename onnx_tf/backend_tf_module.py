@@ -1,5 +1,21 @@
+import contextlib
+import functools
+
 import tensorflow as tf
+from tensorflow.core.framework import types_pb2
+
+from onnx_tf.common import ConversionContext
 from onnx_tf.pb_wrapper import OnnxNode
+import onnx_tf.common as common
+
+# TF ops that XLA can't compile. Functional control flow is included
+# because its body may hold such ops and is not inspected.
+XLA_UNSUPPORTED_OPS = frozenset([
+    "PyFunc", "PyFuncStateless", "EagerPyFunc", "Where", "Unique",
+    "UniqueV2", "NonMaxSuppressionV3", "NonMaxSuppressionV5", "While",
+    "StatelessWhile", "If", "StatelessIf", "Case", "StatelessCase",
+    "PartitionedCall", "StatefulPartitionedCall"
+])
 
 
 class TFModuleHelper(object):
@@ -12,12 +28,14 @@ class TFModuleHelper(object):
                                            handlers,
                                            graph,
                                            init_dict,
-                                           var_dict=None):
+                                           var_dict=None,
+                                           ctx=None):
     var_dict = dict() if var_dict is None else var_dict
-    for node in graph.node:
-      var_dict = cls._create_handler_variables_for_node(handlers,
-                                                        OnnxNode(node),
-                                                        init_dict, var_dict)
+    nodes = ctx.get_nodes(graph) if ctx else map(OnnxNode, graph.node)
+    for node in nodes:
+      var_dict = cls._create_handler_variables_for_node(handlers, node,
+                                                        init_dict, var_dict,
+                                                        ctx)
     return var_dict
 
   @classmethod
@@ -25,14 +43,16 @@ class TFModuleHelper(object):
                                          handlers,
                                          node,
                                          init_dict=None,
-                                         var_dict=None):
+                                         var_dict=None,
+                                         ctx=None):
     init_dict = dict() if init_dict is None else init_dict
     var_dict = dict() if var_dict is None else var_dict
     handler = handlers[node.domain].get(
         node.op_type, None) if node.domain in handlers else None
     var_dict = handler.create_variables(
         handlers, node, init_dict, var_dict,
-        cls._create_handlers_variables_for_graph) if handler else var_dict
+        functools.partial(cls._create_handlers_variables_for_graph,
+                          ctx=ctx)) if handler else var_dict
     return var_dict
 
 
@@ -41,18 +61,43 @@ class BackendTFModule(tf.Module):
   tf_rep.export_graph and tf_rep.run
   """
 
-  def __init__(self, handlers, opset, strict, graph_def, backend):
+  def __init__(self,
+               handlers,
+               opset,
+               strict,
+               graph_def,
+               backend,
+               jit_compile=False,
+               external_data_dir=None,
+               device='CPU',
+               auto_cast=False,
+               profiler=None,
+               optimize_layout=True,
+               native_grouped_conv=False):
     super(BackendTFModule, self).__init__()
     self.handlers = handlers
     self.opset = opset
     self.strict = strict
     self.graph_def = graph_def
     self.backend = backend
+    self.jit_compile = jit_compile
+    self.external_data_dir = external_data_dir
+    self.ctx = ConversionContext(device=device,
+                                 auto_cast=auto_cast,
+                                 strict=strict,
+                                 opset=opset,
+                                 profiler=profiler,
+                                 optimize_layout=optimize_layout,
+                                 native_grouped_conv=native_grouped_conv)
+    # ONNX node name to the TF op types that kept it out of XLA clusters
+    self.xla_blocking_nodes = dict()
+    # ONNX node whose TF ops are being created in the XLA scope
+    self._xla_node = None
     self.outputs = []
     self.initializer_dict = self._get_initializer_from_graph_and_subgraphs(
         graph_def)
     self.handler_variables = TFModuleHelper._create_handlers_variables_for_graph(
-        handlers, graph_def, self.initializer_dict)
+        handlers, graph_def, self.initializer_dict, ctx=self.ctx)
 
   # get initializer from the main graph and all subgraphs in loop or if or scan
   # into tensor_dict
@@ -60,69 +105,162 @@ class BackendTFModule(tf.Module):
     init_dict = dict() if init_dict is None else init_dict
     if graph.initializer:
       init_dict.update(
-          self.backend._onnx_initializer_to_input_dict_items(graph.initializer))
-    for node in graph.node:
+          self.backend._onnx_initializer_to_input_dict_items(
+              graph.initializer, self.external_data_dir))
+    for node in self.ctx.get_nodes(graph):
       handler = self.handlers[node.domain].get(
           node.op_type, None) if node.domain in self.handlers else None
       init_dict = handler.get_initializer_from_subgraph(
-          OnnxNode(node), init_dict, self.
-          _get_initializer_from_graph_and_subgraphs) if handler else init_dict
+          node, init_dict, self._get_initializer_from_graph_and_subgraphs
+      ) if handler else init_dict
     return init_dict
 
+  @contextlib.contextmanager
+  def _xla_scope(self):
+    # Mark the TF ops of all the nodes for XLA clustering in a single scope,
+    # so that ops of adjacent nodes are fused in the same clusters, except
+    # those XLA can't compile, which split the clusters and run as regular
+    # TF ops.
+    if not self.jit_compile:
+      yield
+      return
+    with tf.xla.experimental.jit_scope(compile_ops=self._is_xla_compilable):
+      yield
+
+  def _onnx_node_to_tensorflow_op(self, onnx_node, tensor_dict):
+    self._xla_node = onnx_node
+    try:
+      return self.backend._onnx_node_to_tensorflow_op(onnx_node,
+                                                      tensor_dict,
+                                                      self.handlers,
+                                                      opset=self.opset,
+                                                      strict=self.strict,
+                                                      ctx=self.ctx)
+    finally:
+      self._xla_node = None
+
+  def _is_xla_compilable(self, node_def):
+    if node_def.op not in XLA_UNSUPPORTED_OPS and not any(
+        attr.type == types_pb2.DT_STRING or
+        types_pb2.DT_STRING in attr.list.type
+        for attr in node_def.attr.values()):
+      return True
+    onnx_node = self._xla_node
+    if onnx_node is None:
+      return False
+    node_name = onnx_node.name or onnx_node.outputs[0]
+    op_types = self.xla_blocking_nodes.setdefault(node_name, set())
+    if node_def.op not in op_types:
+      op_types.add(node_def.op)
+      common.logger.warning(
+          "{} node {} emits {}, which XLA can't compile. "
+          "It is run outside of XLA clusters.".format(onnx_node.op_type,
+                                                      node_name,
+                                                      node_def.op))
+    return False
+
   @tf.function
   def gen_tensor_dict(self, input_dict):
     tensor_dict = dict(input_dict)
     tensor_dict.update(self.initializer_dict)
     tensor_dict.update(self.handler_variables)
 
-    for node in self.graph_def.node:
-      onnx_node = OnnxNode(node)
-      output_ops = self.backend._onnx_node_to_tensorflow_op(onnx_node,
-                                                            tensor_dict,
-                                                            self.handlers,
-                                                            opset=self.opset,
-                                                            strict=self.strict)
-      curr_node_output_map = dict(zip(onnx_node.outputs, output_ops))
-      tensor_dict.update(curr_node_output_map)
+    with self._xla_scope():
+      for node in self.ctx.get_nodes(self.graph_def):
+        output_ops = self._onnx_node_to_tensorflow_op(node, tensor_dict)
+        curr_node_output_map = dict(zip(node.outputs, output_ops))
+        tensor_dict.update(curr_node_output_map)
 
     return tensor_dict
 
-  @tf.function
-  def __call__(self, **kwargs):
+  @classmethod
+  def _get_node_input_names(cls, node):
+    # Subgraphs of Loop, If and Scan may use tensors of the outer graph,
+    # so names referenced anywhere in them are inputs of the node too.
+    names = set(node.input)
+    for attr in node.attribute:
+      graphs = list(attr.graphs) + ([attr.g] if attr.HasField("g") else [])
+      for graph in graphs:
+        for subgraph_node in graph.node:
+          names |= cls._get_node_input_names(subgraph_node)
+    return names
+
+  def prune(self, outputs):
+    """ Prune the graph back from the given outputs.
+
+    :param outputs: List of names of the tensors to compute.
+    :return: List of the OnnxNodes the outputs depend on, in graph order,
+      and list of the graph inputs they depend on.
+    """
+    graph_nodes = self.ctx.get_nodes(self.graph_def)
+    initialized = {init.name for init in self.graph_def.initializer}
+    graph_inputs = [
+        value_info.name
+        for value_info in self.graph_def.input
+        if value_info.name not in initialized
+    ]
+    known = initialized.union(graph_inputs)
+    for node in graph_nodes:
+      known.update(node.outputs)
+    for name in outputs:
+      if name not in known:
+        raise ValueError("{} is not a tensor of the graph.".format(name))
+
+    needed = set(outputs)
+    kept = set()
+    for i in range(len(graph_nodes) - 1, -1, -1):
+      node = graph_nodes[i]
+      if any(name in needed for name in node.outputs):
+        kept.add(i)
+        needed |= self._get_node_input_names(node.node_proto)
+    nodes = [node for i, node in enumerate(graph_nodes) if i in kept]
+    inputs = [name for name in graph_inputs if name in needed]
+    return nodes, inputs
+
+  def run_graph(self, outputs, **kwargs):
+    """ Convert only the nodes the given outputs depend on and return the
+    outputs. It's meant to be called inside a tf.function.
+
+    :param outputs: List of names of the tensors to compute.
+    :param kwargs: Input name to tf.Tensor.
+    :return: List of output tensors.
+    """
     tensor_dict = kwargs
     tensor_dict.update(self.initializer_dict)
     tensor_dict.update(self.handler_variables)
 
-    for node in self.graph_def.node:
-      onnx_node = OnnxNode(node)
-      output_ops = self.backend._onnx_node_to_tensorflow_op(onnx_node,
-                                                            tensor_dict,
-                                                            self.handlers,
-                                                            opset=self.opset,
-                                                            strict=self.strict)
-      curr_node_output_map = dict(zip(onnx_node.outputs, output_ops))
-      tensor_dict.update(curr_node_output_map)
+    nodes, _ = self.prune(outputs)
+    with self._xla_scope():
+      for node in nodes:
+        output_ops = self._onnx_node_to_tensorflow_op(node, tensor_dict)
+        curr_node_output_map = dict(zip(node.outputs, output_ops))
+        tensor_dict.update(curr_node_output_map)
 
-    outputs = [tensor_dict[output] for output in self.outputs]
+    return [tensor_dict[output] for output in outputs]
 
-    return outputs
+  @tf.function
+  def __call__(self, **kwargs):
+    return self.run_graph(self.outputs, **kwargs)
 
 
 class TFModule(tf.Module):
   """ TFModule is the tf.Module class used in backend.run_node.
   """
 
-  def __init__(self, node, backend):
+  def __init__(self, node, backend, device='CPU', auto_cast=False):
     super(TFModule, self).__init__()
     self.node = node
     self.backend = backend
     self.handlers = backend._get_handlers(opset=None)
+    self.ctx = ConversionContext(device=device, auto_cast=auto_cast)
     self.handler_variables = TFModuleHelper._create_handler_variables_for_node(
-        self.handlers, node)
+        self.handlers, node, ctx=self.ctx)
 
   @tf.function
   def __call__(self, **input_dict):
     input_dict.update(self.handler_variables)
-    outputs = self.backend._onnx_node_to_tensorflow_op(self.node, input_dict,
-                                                       self.handlers)
+    outputs = self.backend._onnx_node_to_tensorflow_op(self.node,
+                                                       input_dict,
+                                                       self.handlers,
+                                                       ctx=self.ctx)
     return outputs
@@ -0,0 +1,230 @@
+"""Folding of BatchNormalization nodes into the nodes before them.
+
+backend.prepare(model, fold_batch_norm=True) folds the scale, bias, mean
+and variance of the inference BatchNormalization nodes following a Conv,
+ConvTranspose or Gemm node into the weights and bias of that node, so that
+the activations are not normalized by a separate op after each layer.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import numpy as np
+import onnx
+from onnx import numpy_helper
+
+from onnx_tf.backend_tf_module import BackendTFModule
+from onnx_tf.common import get_unique_suffix
+from onnx_tf.pb_wrapper import OnnxNode
+import onnx_tf.common as common
+
+# ops whose output channels are scaled by their weights
+FOLDABLE_OPS = frozenset(["Conv", "ConvTranspose", "Gemm"])
+
+FLOAT_DTYPES = [np.float16, np.float32, np.float64]
+
+
+class BatchNormFolder(object):
+  """ BatchNormFolder folds the inference BatchNormalization nodes of the
+  main graph of a model into the Conv, ConvTranspose or Gemm node producing
+  their input.
+
+  A BatchNormalization node computes
+    y = (x - mean) * scale / sqrt(var + epsilon) + bias
+  for each channel. With a = scale / sqrt(var + epsilon), the weights of
+  the output channels of the node before are multiplied by a, and its bias
+  becomes (bias_before - mean) * a + bias.
+
+  The weights, the bias and the BatchNormalization params must be
+  initializers that are not graph inputs and whose data is loaded, and the
+  output of the node before must only be used by the BatchNormalization
+  node. The folded weights and bias are new initializers, the ones no node
+  uses anymore are removed.
+
+  Usage:
+    folder = BatchNormFolder(TensorflowBackend)
+    folded_model, num_folded = folder.fold(onnx_model)
+  """
+
+  def __init__(self, backend):
+    """ Create a BatchNormFolder.
+
+    :param backend: TensorflowBackend class.
+    """
+    self._backend = backend
+
+  def fold(self, model, inplace=False):
+    """ Fold the BatchNormalization nodes of the main graph of a model.
+
+    :param model: ONNX ModelProto object.
+    :param inplace: Whether to modify model instead of a copy of it.
+    :return: The folded ModelProto object and the number of folded nodes.
+    """
+    if not inplace:
+      folded_model = onnx.ModelProto()
+      folded_model.CopyFrom(model)
+      model = folded_model
+    graph = model.graph
+
+    graph_inputs = set(value_info.name for value_info in graph.input)
+    graph_outputs = set(value_info.name for value_info in graph.output)
+    initializers = dict([(init.name, init)
+                         for init in graph.initializer
+                         if init.name not in graph_inputs and
+                         not self._backend._is_external_data_unloaded(init)])
+    # names of the tensors to the number of nodes using them
+    uses = {}
+    for node in graph.node:
+      for name in BackendTFModule._get_node_input_names(node):
+        uses[name] = uses.get(name, 0) + 1
+    producers = dict([
+        (name, node) for node in graph.node for name in node.output
+    ])
+
+    removed = []
+    new_initializers = []
+    # initializers the folded nodes used
+    replaced = set()
+    for bn_node in graph.node:
+      if bn_node.op_type != "BatchNormalization" or bn_node.domain not in [
+          "", "ai.onnx"
+      ]:
+        continue
+      node = producers.get(bn_node.input[0])
+      if (node is None or node.op_type not in FOLDABLE_OPS or
+          node.domain not in ["", "ai.onnx"] or
+          uses[bn_node.input[0]] != 1 or bn_node.input[0] in graph_outputs):
+        continue
+      node_inputs = list(node.input[1:])
+      folded = self._fold_node(node, bn_node, initializers)
+      if folded is None:
+        continue
+      new_initializers.extend(folded)
+      replaced.update(node_inputs + list(bn_node.input[1:]))
+      # the node now produces the output of the BatchNormalization node
+      node.output[0] = bn_node.output[0]
+      removed.append(bn_node)
+
+    if removed:
+      for bn_node in removed:
+        graph.node.remove(bn_node)
+      self._replace_initializers(graph, new_initializers, replaced,
+                                 graph_inputs)
+    common.logger.info(
+        "BatchNormalization folding folded {} of {} nodes.".format(
+            len(removed),
+            len(removed) + len([
+                node for node in graph.node
+                if node.op_type == "BatchNormalization"
+            ])))
+    return model, len(removed)
+
+  def _fold_node(self, node, bn_node, initializers):
+    """ Fold a BatchNormalization node into the node producing its input.
+
+    :return: List of the new initializers, the inputs of node are updated
+      to them, or None if the node can't be folded.
+    """
+    bn = OnnxNode(bn_node)
+    # training outputs, or params per activation of versions below 7
+    if (len([name for name in bn_node.output if name]) != 1 or
+        bn.attrs.get("training_mode", 0) or bn.attrs.get("spatial", 1) != 1):
+      return None
+    names = list(node.input[1:]) + list(bn_node.input[1:])
+    if len(bn_node.input) != 5 or not all(
+        name in initializers for name in names if name):
+      return None
+    arrays = dict([(name, numpy_helper.to_array(initializers[name]))
+                   for name in names
+                   if name])
+    weights = arrays[node.input[1]]
+    if weights.dtype not in FLOAT_DTYPES:
+      return None
+    scale, bn_bias, mean, var = [arrays[name] for name in bn_node.input[1:]]
+    epsilon = bn.attrs.get("epsilon", 1e-5)
+    a = scale.astype(np.float64) / np.sqrt(var.astype(np.float64) + epsilon)
+
+    if node.op_type == "Gemm":
+      weights, bias = self._fold_gemm(node, weights, arrays, a, mean)
+    else:
+      weights, bias = self._fold_conv(node, weights, arrays, a, mean)
+    if weights is None:
+      return None
+    bias = bias + bn_bias.astype(np.float64)
+
+    dtype = arrays[node.input[1]].dtype
+    has_bias = len(node.input) > 2 and node.input[2]
+    suffix = "_bn_folded_" + get_unique_suffix()
+    weights_tensor = numpy_helper.from_array(weights.astype(dtype),
+                                             node.input[1] + suffix)
+    bias_tensor = numpy_helper.from_array(
+        bias.astype(dtype),
+        (node.input[2] if has_bias else bn_node.input[2]) + suffix)
+    if not has_bias:
+      del node.input[2:]
+      node.input.append("")
+    node.input[1] = weights_tensor.name
+    node.input[2] = bias_tensor.name
+    return [weights_tensor, bias_tensor]
+
+  @classmethod
+  def _fold_conv(cls, node, weights, arrays, a, mean):
+    channels = a.shape[0]
+    group = OnnxNode(node).attrs.get("group", 1)
+    if node.op_type == "Conv":
+      # (M x C/group x k1 x k2 x ... x kn)
+      if weights.shape[0] != channels:
+        return None, None
+      factor = a.reshape([channels] + [1] * (weights.ndim - 1))
+      weights = weights.astype(np.float64) * factor
+    else:
+      # (C x M/group x k1 x k2 x ... x kn), the output channels of group g
+      # are g * M/group + [0, M/group)
+      if weights.shape[0] % group or weights.shape[1] * group != channels:
+        return None, None
+      grouped_shape = [group, weights.shape[0] // group
+                      ] + list(weights.shape[1:])
+      factor = a.reshape([group, 1, weights.shape[1]] + [1] *
+                         (weights.ndim - 2))
+      weights = (weights.astype(np.float64).reshape(grouped_shape) *
+                 factor).reshape(weights.shape)
+    bias = arrays[node.input[2]].astype(np.float64) if len(
+        node.input) > 2 and node.input[2] else np.zeros([channels])
+    return weights, (bias - mean) * a
+
+  @classmethod
+  def _fold_gemm(cls, node, weights, arrays, a, mean):
+    # Y = alpha * A' * B' + beta * C, the output channels are the columns of
+    # B' = B or B^T
+    attrs = OnnxNode(node).attrs
+    channels = a.shape[0]
+    trans_b = attrs.get("transB", 0)
+    if weights.ndim != 2 or weights.shape[0 if trans_b else 1] != channels:
+      return None, None
+    factor = a.reshape([channels, 1] if trans_b else [1, channels])
+    weights = weights.astype(np.float64) * factor
+    beta = attrs.get("beta", 1.0)
+    bias = beta * arrays[node.input[2]].astype(np.float64) if len(
+        node.input) > 2 and node.input[2] else np.zeros([channels])
+    bias = (bias - mean) * a
+    # beta is folded into the new C
+    for attr in node.attribute:
+      if attr.name == "beta":
+        attr.f = 1.0
+    return weights, bias
+
+  @classmethod
+  def _replace_initializers(cls, graph, new_initializers, replaced,
+                            graph_inputs):
+    used = set(value_info.name for value_info in graph.output)
+    for node in graph.node:
+      used |= BackendTFModule._get_node_input_names(node)
+    # the replaced initializers no node uses anymore are removed
+    initializers = [
+        init for init in graph.initializer
+        if init.name in used or init.name in graph_inputs or
+        init.name not in replaced
+    ]
+    del graph.initializer[:]
+    graph.initializer.extend(initializers + new_initializers)
@@ -0,0 +1,304 @@
+"""Dynamic micro-batching on top of a prepared TensorflowRep.
+
+Requests are queued and concatenated along the batch axis up to a maximum
+batch size or timeout, run through a single concrete function of the
+TensorflowRep and split back to their callers.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import asyncio
+from collections import deque
+from concurrent.futures import Future
+import threading
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from onnx.backend.base import namedtupledict
+
+import onnx_tf.common as common
+from onnx_tf.common.async_helper import AsyncLimiter
+from onnx_tf.common.tf_helper import np_aligned_copy
+
+
+def _copy_arrays(inputs):
+  # Numpy arrays would be fed in place and could be changed by the caller
+  # while their request is queued, so they are copied to aligned arrays the
+  # batch imports without another copy.
+  copy = lambda x: np_aligned_copy(x) if isinstance(x, np.ndarray) else x
+  if isinstance(inputs, dict):
+    return dict([(name, copy(x)) for name, x in inputs.items()])
+  if isinstance(inputs, list) or isinstance(inputs, tuple):
+    return [copy(x) for x in inputs]
+  return copy(inputs)
+
+
+class _BatchRequest(object):
+
+  def __init__(self, input_dict, key, rows, return_tensors):
+    self.input_dict = input_dict
+    self.key = key
+    self.rows = rows
+    self.return_tensors = return_tensors
+    self.future = Future()
+
+
+class DynamicBatcher(object):
+  """ DynamicBatcher batches requests to a TensorflowRep.
+
+  Usage:
+    tf_rep = prepare(onnx_model)
+    with DynamicBatcher(tf_rep, max_batch_size=32) as batcher:
+      output = batcher.run(inputs)
+  """
+
+  def __init__(self,
+               tf_rep,
+               max_batch_size=32,
+               batch_timeout=0.005,
+               batch_axis=None,
+               max_pending=None):
+    """ Create a DynamicBatcher and start its worker thread.
+
+    :param tf_rep: The TensorflowRep to run batches on.
+    :param max_batch_size: Maximum number of rows along the batch axis in
+      one batch. A request larger than it is run on its own.
+    :param batch_timeout: Maximum time in seconds the first request of a
+      batch waits for more requests to join.
+    :param batch_axis: Batch axis of all inputs and outputs. Default is
+      None, which infers it from the ONNX dim_param of the graph inputs and
+      outputs and from tf_rep.signatures.
+    :param max_pending: Maximum number of run_async calls in flight per
+      event loop. Further calls wait for a free slot. Default is None, which
+      means no limit.
+    """
+    self._tf_rep = tf_rep
+    self._max_batch_size = max_batch_size
+    self._batch_timeout = batch_timeout
+    self._input_axes, self._output_axes = self._get_batch_axes(
+        tf_rep, batch_axis)
+    # outputs without a batch axis can't be split back to the requests of a
+    # batch, so every request is run on its own
+    self._unbatched = None in self._output_axes
+    if self._unbatched:
+      common.logger.warning(
+          "Cannot infer batch axis of outputs {}. Requests are run one at a "
+          "time. Please set batch_axis to batch them.".format(", ".join(
+              name for name, axis in zip(tf_rep.outputs, self._output_axes)
+              if axis is None)))
+    self._async_limiter = AsyncLimiter(max_pending)
+    self._queue = deque()
+    self._cond = threading.Condition()
+    self._closed = False
+    self._worker = threading.Thread(target=self._run_loop,
+                                    name="onnx-tf-dynamic-batcher")
+    self._worker.daemon = True
+    self._worker.start()
+
+  @property
+  def input_axes(self):
+    return self._input_axes
+
+  @property
+  def output_axes(self):
+    return self._output_axes
+
+  @classmethod
+  def _get_batch_axes(cls, tf_rep, batch_axis=None):
+    """ Get batch axis of every input and output of tf_rep.
+    The batch axis of an input is its first axis with a dim_param, or its
+    first axis of unknown size in tf_rep.signatures. The batch axis of an
+    output is its axis with the same dim_param as the inputs, else the batch
+    axis shared by all inputs if the output has an unknown size there, else
+    None.
+
+    :param tf_rep: TensorflowRep object.
+    :param batch_axis: Batch axis of all inputs and outputs, if given.
+    :return: Dict of input name to axis, list of output axis.
+    """
+    if batch_axis is not None:
+      return (dict([(name, batch_axis) for name in tf_rep.inputs]),
+              [batch_axis] * len(tf_rep.outputs))
+
+    graph_def = tf_rep.tf_module.graph_def
+    value_infos = dict([(vi.name, vi) for vi in graph_def.input])
+
+    input_axes = {}
+    dim_params = set()
+    for name in tf_rep.inputs:
+      dims = value_infos[name].type.tensor_type.shape.dim
+      axis = next((i for i, d in enumerate(dims) if d.dim_param), None)
+      if axis is not None:
+        dim_params.add(dims[axis].dim_param)
+      elif name in tf_rep.signatures:
+        axis = next((i for i, d in enumerate(tf_rep.signatures[name].shape)
+                     if d is None), None)
+      if axis is None:
+        raise ValueError(
+            "Cannot infer batch axis of input {}. Please set batch_axis.".
+            format(name))
+      input_axes[name] = axis
+    if len(dim_params) > 1:
+      common.logger.warning(
+          "Inputs have different batch dim_param {}.".format(
+              sorted(dim_params)))
+
+    input_axis = (list(input_axes.values())[0]
+                  if len(set(input_axes.values())) == 1 else None)
+    output_axes = []
+    for vi in graph_def.output:
+      dims = vi.type.tensor_type.shape.dim
+      if not vi.type.tensor_type.HasField("shape"):
+        axis = 0
+      else:
+        axis = next((i for i, d in enumerate(dims)
+                     if d.dim_param and d.dim_param in dim_params), None)
+        if axis is None:
+          axis = next((i for i, d in enumerate(dims) if d.dim_param), None)
+      if (axis is None and input_axis is not None and input_axis < len(dims) and
+          not dims[input_axis].HasField("dim_value")):
+        axis = input_axis
+      output_axes.append(axis)
+    return input_axes, output_axes
+
+  def submit(self, inputs, return_tensors=False):
+    """ Queue one request.
+
+    :param inputs: Given inputs, same as for TensorflowRep.run. Numpy
+      arrays are copied, so they can be reused once submit returns. DLPack
+      capsules are still imported in place and must not be changed until
+      the request is done.
+    :param return_tensors: Whether to return outputs as tf.Tensors instead
+      of numpy arrays, default is False.
+    :return: concurrent.futures.Future of the outputs.
+    """
+    input_dict = self._tf_rep.get_input_dict(_copy_arrays(inputs))
+    key = tuple(
+        (name, tuple(d for i, d in enumerate(tensor.shape.as_list())
+                     if i != self._input_axes[name]), tensor.dtype)
+        for name, tensor in sorted(input_dict.items()))
+    first = self._tf_rep.inputs[0]
+    rows = input_dict[first].shape[self._input_axes[first]]
+    request = _BatchRequest(input_dict, key, rows, return_tensors)
+    with self._cond:
+      if self._closed:
+        raise RuntimeError("DynamicBatcher is closed.")
+      self._queue.append(request)
+      self._cond.notify()
+    return request.future
+
+  def run(self, inputs, return_tensors=False, timeout=None):
+    """ Run one request and wait for its outputs.
+
+    :param inputs: Given inputs, same as for submit.
+    :param return_tensors: Whether to return outputs as tf.Tensors instead
+      of numpy arrays, default is False.
+    :param timeout: Seconds to wait for the outputs, default is no limit.
+    :return: Outputs.
+    """
+    return self.submit(inputs, return_tensors).result(timeout)
+
+  async def run_async(self, inputs, return_tensors=False):
+    """ Run one request without blocking the event loop.
+    Cancelling the call drops the request if its batch has not started.
+
+    :param inputs: Given inputs, same as for submit.
+    :param return_tensors: Whether to return outputs as tf.Tensors instead
+      of numpy arrays, default is False.
+    :return: Outputs.
+    """
+    async with self._async_limiter:
+      return await asyncio.wrap_future(self.submit(inputs, return_tensors))
+
+  def close(self):
+    """ Stop accepting requests, run the queued ones and stop the worker.
+    """
+    with self._cond:
+      self._closed = True
+      self._cond.notify_all()
+    self._worker.join()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.close()
+
+  def _pop_compatible(self, key, max_rows):
+    for request in self._queue:
+      if request.key == key and request.rows <= max_rows:
+        self._queue.remove(request)
+        return request
+    return None
+
+  def _next_batch(self):
+    with self._cond:
+      while not self._queue and not self._closed:
+        self._cond.wait()
+      if not self._queue:
+        return None
+      first = self._queue.popleft()
+      batch = [first]
+      rows = first.rows
+      deadline = time.time() + self._batch_timeout
+      while rows < self._max_batch_size and not self._unbatched:
+        request = self._pop_compatible(first.key, self._max_batch_size - rows)
+        if request is not None:
+          batch.append(request)
+          rows += request.rows
+          continue
+        remaining = deadline - time.time()
+        if remaining <= 0 or self._closed:
+          break
+        self._cond.wait(remaining)
+    return [r for r in batch if r.future.set_running_or_notify_cancel()]
+
+  def _run_loop(self):
+    while True:
+      batch = self._next_batch()
+      if batch is None:
+        return
+      if batch:
+        self._run_batch(batch)
+
+  def _run_batch(self, batch):
+    try:
+      if len(batch) == 1:
+        input_dict = batch[0].input_dict
+      else:
+        input_dict = dict([(name,
+                            tf.concat([r.input_dict[name] for r in batch],
+                                      axis=axis))
+                           for name, axis in self._input_axes.items()])
+      output_values = self._tf_rep.run(input_dict, return_tensors=True)
+      split_values = []
+      rows = [r.rows for r in batch]
+      for name, val, axis in zip(self._tf_rep.outputs, output_values,
+                                 self._output_axes):
+        if len(batch) == 1:
+          split_values.append([val])
+        elif (not isinstance(val, tf.Tensor) or
+              val.shape.rank <= axis or val.shape[axis] != sum(rows)):
+          raise ValueError(
+              "Output {} has no batch axis {} of size {} to split. Please "
+              "set batch_axis.".format(name, axis, sum(rows)))
+        else:
+          split_values.append(tf.split(val, rows, axis=axis))
+    except Exception as e:  # pylint: disable=broad-except
+      for request in batch:
+        request.future.set_exception(e)
+      return
+
+    for i, request in enumerate(batch):
+      values = [vals[i] for vals in split_values]
+      if not request.return_tensors:
+        values = [
+            val.numpy() if isinstance(val, tf.Tensor) else val
+            for val in values
+        ]
+      request.future.set_result(
+          namedtupledict('Outputs', self._tf_rep.outputs)(*values))
@@ -34,6 +34,60 @@ class SysConfig:
 sys_config = SysConfig()
 
 
+class ConversionContext(object):
+  """ Options of the conversion of one model. Handlers get it in
+  kwargs["ctx"] instead of reading sys_config, so that models with
+  different options can be converted concurrently.
+  """
+
+  def __init__(self,
+               device='CPU',
+               auto_cast=False,
+               strict=True,
+               opset=None,
+               profiler=None,
+               optimize_layout=True,
+               native_grouped_conv=False):
+    self.device = device
+    self.auto_cast = auto_cast
+    self.strict = strict
+    # ONNX OperatorSetIdProto list, the handler versions are resolved by it
+    self.opset = opset
+    # ConversionProfiler recording the node conversions, None if not profiled
+    self.profiler = profiler
+    # keep the activations channels last between the nodes on CPU, see
+    # onnx_tf.common.layout_helper
+    self.optimize_layout = optimize_layout
+    # convolve the groups of grouped convolutions in a single op when TF
+    # runs it on the converting machine, see ConvMixin.conv
+    self.native_grouped_conv = native_grouped_conv
+    # RNN cells by handler, reused when the model is traced again
+    self.rnn_cells = {}
+    # tensors computed once from constants of the model by the handlers,
+    # reused when the model is traced again, see
+    # BackendHandler.run_on_constants
+    self.constants = {}
+    # id of a graph of the model to the graph and its OnnxNodes
+    self._nodes = {}
+
+  def get_nodes(self, graph):
+    """ Get the OnnxNodes of a graph of the model, or of a subgraph in it.
+    They are parsed once and shared by all the passes over the graph and
+    the traces of it, so handlers must not modify them.
+
+    :param graph: ONNX GraphProto object.
+    :return: List of OnnxNode in graph order.
+    """
+    # pb_wrapper imports onnx_tf.common
+    from onnx_tf.pb_wrapper import OnnxNode
+    entry = self._nodes.get(id(graph))
+    if entry is None:
+      # the graph is kept with its nodes, so that its id is not reused
+      entry = (graph, [OnnxNode(node) for node in graph.node])
+      self._nodes[id(graph)] = entry
+    return entry[1]
+
+
 class Deprecated:
   """Add deprecated message when function is called.
 
@@ -146,11 +200,12 @@ def get_device_option(device):
   return m[device.type]
 
 
-def get_data_format(x_rank):
+def get_data_format(x_rank, device=None):
   """ Get data format by input rank.
   Channel first if support CUDA.
 
   :param x_rank: Input rank.
+  :param device: CUDA or CPU, default is sys_config.device.
   :return: Data format.
   """
   sp_dim_names = ["D", "H", "W"]
@@ -161,7 +216,7 @@ def get_data_format(x_rank):
   sp_dim_string = "".join(reversed(sp_dim_lst))
   storage_format = "NC" + sp_dim_string
 
-  if sys_config.device == "CUDA":
+  if (device or sys_config.device) == "CUDA":
     compute_format = "NC" + sp_dim_string
   else:
     compute_format = "N" + sp_dim_string + "C"
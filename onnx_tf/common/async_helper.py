@@ -0,0 +1,50 @@
+import asyncio
+import weakref
+
+
+class AsyncLimiter(object):
+  """ Async context manager limiting the number of coroutines inside it,
+  per event loop. Coroutines over the limit wait for a free slot, which
+  gives back-pressure to the callers.
+
+  Usage:
+    limiter = AsyncLimiter(8)
+
+    async def handler():
+      async with limiter:
+        ...
+  """
+
+  def __init__(self, limit=None):
+    """ Create an AsyncLimiter.
+
+    :param limit: Maximum number of coroutines inside the limiter per event
+      loop. Default is None, which means no limit.
+    """
+    self._limit = limit
+    self._semaphores = weakref.WeakKeyDictionary()
+
+  @property
+  def limit(self):
+    return self._limit
+
+  def _get_semaphore(self):
+    if self._limit is None:
+      return None
+    loop = asyncio.get_running_loop()
+    semaphore = self._semaphores.get(loop, None)
+    if semaphore is None:
+      semaphore = asyncio.Semaphore(self._limit)
+      self._semaphores[loop] = semaphore
+    return semaphore
+
+  async def __aenter__(self):
+    semaphore = self._get_semaphore()
+    if semaphore is not None:
+      await semaphore.acquire()
+    return self
+
+  async def __aexit__(self, exc_type, exc_value, traceback):
+    semaphore = self._get_semaphore()
+    if semaphore is not None:
+      semaphore.release()
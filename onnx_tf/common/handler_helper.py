@@ -1,41 +1,187 @@
+from collections.abc import Mapping
+import importlib
+import threading
+
 from onnx import defs
 
-from onnx_tf.handlers.backend import *  # noqa
 from onnx_tf.handlers.backend_handler import BackendHandler
+from onnx_tf.opset_version import backend_handler_modules
 import onnx_tf.common as common
 
+HANDLERS_PACKAGE = "onnx_tf.handlers.backend"
+
+# onnx raises SchemaError for unknown versions, older releases RuntimeError
+_SCHEMA_ERRORS = (RuntimeError, getattr(defs, "SchemaError", RuntimeError))
+
+_handlers_cache = {}
+_handlers_cache_lock = threading.Lock()
+_import_lock = threading.RLock()
+
+
 def get_all_backend_handlers(opset_dict):
   """ Get a dict of all backend handler classes.
   e.g. {'domain': {'Abs': Abs handler class}, ...}, }.
 
+  The handler classes are per opset subclasses of the registered ones,
+  carrying their VERSION, SINCE_VERSION and resolved version_N method, so
+  the registered classes are never mutated. The result is read-only and
+  memoized per opset. The module of a handler is imported the first time
+  its op is looked up.
+
   :param opset_dict: A dict of opset. e.g. {'domain': version, ...}
-  :return: Dict.
+  :return: Read-only dict.
+  """
+  key = tuple(sorted(opset_dict.items()))
+  with _handlers_cache_lock:
+    if key not in _handlers_cache:
+      _handlers_cache[key] = _BackendHandlers(opset_dict)
+    return _handlers_cache[key]
+
+
+class _BackendHandlers(Mapping):
+  """ Read-only dict of domain to _DomainHandlers, for an opset.
+  """
+
+  def __init__(self, opset_dict):
+    self._domains = dict([
+        (domain,
+         _DomainHandlers(domain,
+                         opset_dict[domain] if domain in opset_dict else 1))
+        for domain in backend_handler_modules
+    ])
+
+  def __getitem__(self, domain):
+    return self._domains[domain]
+
+  def __iter__(self):
+    return iter(self._domains)
+
+  def __len__(self):
+    return len(self._domains)
+
+
+class _DomainHandlers(Mapping):
+  """ Read-only dict of op type to handler class, for a domain and version.
+  Handler modules are imported and the classes made on first lookup.
+  """
+
+  def __init__(self, domain, version):
+    self._domain = domain
+    self._version = version
+    self._handlers = {}
+    self._lock = threading.Lock()
+
+  def __getitem__(self, op_type):
+    handler = self._handlers.get(op_type)
+    if handler is not None:
+      return handler
+    with self._lock:
+      if op_type not in self._handlers:
+        handler = _load_backend_handler(self._domain, op_type)
+        if handler is not None:
+          handler = _make_versioned_handler(
+              handler, self._version,
+              _get_since_version(handler, self._version))
+        self._handlers[op_type] = handler
+      handler = self._handlers[op_type]
+    if handler is None:
+      raise KeyError(op_type)
+    return handler
+
+  def __contains__(self, op_type):
+    return self.get(op_type) is not None
+
+  def __iter__(self):
+    return iter(backend_handler_modules[self._domain])
+
+  def __len__(self):
+    return len(backend_handler_modules[self._domain])
+
+
+def _load_backend_handler(domain, op_type):
+  """ Import the handler module of op_type in domain, found in
+  backend_handler_modules, and get the registered handler class.
+  Ops missing from backend_handler_modules make all handler modules to be
+  imported, e.g. when a handler is added and gen_opset.py is not run yet.
+
+  :param domain: Domain of the op.
+  :param op_type: ONNX op type.
+  :return: Handler class, or None if the op has no handler.
   """
-  handlers = {}
+  module = backend_handler_modules.get(domain, {}).get(op_type)
+  with _import_lock:
+    if module is not None:
+      importlib.import_module("{}.{}".format(HANDLERS_PACKAGE, module))
+    handler = _find_backend_handler(domain, op_type)
+    if handler is None and module is None:
+      import_all_backend_handlers()
+      handler = _find_backend_handler(domain, op_type)
+  return handler
+
+
+def _find_backend_handler(domain, op_type):
+  found = None
   for handler in BackendHandler.__subclasses__():
-    handler.check_cls()
+    if handler.DOMAIN == domain and handler.ONNX_OP == op_type:
+      found = handler
+  if found is not None:
+    found.check_cls()
+  return found
+
+
+def import_all_backend_handlers():
+  """ Import all handler modules, which registers all backend handlers as
+  subclasses of BackendHandler.
+  """
+  with _import_lock:
+    for module in importlib.import_module(HANDLERS_PACKAGE).__all__:
+      importlib.import_module("{}.{}".format(HANDLERS_PACKAGE, module))
 
-    domain = handler.DOMAIN
-    version = opset_dict[domain] if domain in opset_dict else 1
-    handler.VERSION = version
-
-    since_version = 1
-    if defs.has(handler.ONNX_OP, domain=handler.DOMAIN):
-      try:
-        since_version = defs.get_schema(
-            handler.ONNX_OP,
-            domain=handler.DOMAIN,
-            max_inclusive_version=version).since_version
-      except RuntimeError:
-        common.logger.debug("Fail to get since_version of {} in domain `{}` "
-                      "with max_inclusive_version={}. Set to 1.".format(
-                          handler.ONNX_OP, handler.DOMAIN, version))
-    else:
-      common.logger.debug("Unknown op {} in domain `{}`.".format(
-          handler.ONNX_OP, handler.DOMAIN or "ai.onnx"))
-    handler.SINCE_VERSION = since_version
-    handlers.setdefault(domain, {})[handler.ONNX_OP] = handler
-  return handlers
+
+def _get_since_version(handler, version):
+  if not defs.has(handler.ONNX_OP, domain=handler.DOMAIN):
+    common.logger.debug("Unknown op {} in domain `{}`.".format(
+        handler.ONNX_OP, handler.DOMAIN or "ai.onnx"))
+    return 1
+  try:
+    return defs.get_schema(handler.ONNX_OP,
+                           domain=handler.DOMAIN,
+                           max_inclusive_version=version).since_version
+  except _SCHEMA_ERRORS:
+    common.logger.debug("Fail to get since_version of {} in domain `{}` "
+                        "with max_inclusive_version={}. Set to 1.".format(
+                            handler.ONNX_OP, handler.DOMAIN, version))
+    return 1
+
+
+def _make_versioned_handler(handler, version, since_version):
+  versioned = type(
+      handler.__name__, (handler,), {
+          "__module__": handler.__module__,
+          "__doc__": handler.__doc__,
+          "VERSION": version,
+          "SINCE_VERSION": since_version
+      })
+  # bound to the subclass, so that version_N reads its versions
+  versioned.VERSION_HANDLE = getattr(versioned,
+                                     "version_{}".format(since_version), None)
+  return versioned
+
+
+def get_backend_handler_modules():
+  """ Get the handler module of each backend op, for backend_handler_modules
+  in opset_version.py.
+
+  :return: e.g. {'domain': {'ONNX_OP': module name, ...}, ...}
+  """
+  import_all_backend_handlers()
+  modules = {}
+  for handler in BackendHandler.__subclasses__():
+    handler.check_cls()
+    if handler.__module__.startswith(HANDLERS_PACKAGE + "."):
+      modules.setdefault(handler.DOMAIN, {})[handler.ONNX_OP] = \
+          handler.__module__[len(HANDLERS_PACKAGE) + 1:]
+  return modules
 
 
 def get_backend_coverage():
@@ -44,6 +190,7 @@ def get_backend_coverage():
   :return: onnx_coverage: e.g. {'domain': {'ONNX_OP': [versions], ...}, ...}
   """
 
+  import_all_backend_handlers()
   onnx_coverage = {}
   experimental_op = set()
   for handler in BackendHandler.__subclasses__():
@@ -65,10 +212,9 @@ def _update_coverage(coverage, domain, key, versions):
 
 
 def get_backend_partial_support_detail():
+  import_all_backend_handlers()
   ps_dict = {}
-  opset_dict = dict([(defs.ONNX_DOMAIN, defs.onnx_opset_version())])
-  handlers = get_all_backend_handlers(opset_dict)[defs.ONNX_DOMAIN]
-  for op_name in handlers:
-    if handlers[op_name].PARTIAL_SUPPORT:
-      ps_dict[op_name] = handlers[op_name].PS_DESCRIPTION
+  for handler in BackendHandler.__subclasses__():
+    if handler.DOMAIN == defs.ONNX_DOMAIN and handler.PARTIAL_SUPPORT:
+      ps_dict[handler.ONNX_OP] = handler.PS_DESCRIPTION
   return ps_dict
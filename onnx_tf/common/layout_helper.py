@@ -0,0 +1,97 @@
+"""Layout optimization of the conversion on CPU.
+
+TF only runs convolutions and poolings channels last on CPU, so their
+handlers transpose ONNX's channels first tensors to channels last and their
+results back. The inverse transposes between two such nodes are cancelled
+by tf_helper.tf_transpose, and the transposes back are sunk below the
+elementwise nodes in between, so that the activations of a CNN stay
+channels last from one layer to the next. A channels first tensor is only
+computed where a node depends on the layout, like a Reshape or a graph
+output, and the transposes nothing uses are pruned by tf.function.
+"""
+import collections
+
+import tensorflow as tf
+
+from onnx_tf.common import get_data_format
+from onnx_tf.common import get_perm_from_formats
+from onnx_tf.common.tf_helper import get_transpose_input
+
+# ONNX ops computing each element of their outputs from the elements at the
+# same position in their inputs, which are run on the channels last inputs
+LAYOUT_AGNOSTIC_OPS = frozenset([
+    "Abs", "Add", "And", "Cast", "Ceil", "Celu", "Clip", "Div", "Elu",
+    "Equal", "Erf", "Exp", "Floor", "Greater", "GreaterOrEqual",
+    "HardSigmoid", "Identity", "IsInf", "IsNaN", "LeakyRelu", "Less",
+    "LessOrEqual", "Log", "Max", "Mean", "Min", "Mul", "Neg", "Not", "Or",
+    "Pow", "Reciprocal", "Relu", "Round", "Selu", "Shrink", "Sigmoid", "Sign",
+    "Softplus", "Softsign", "Sqrt", "Sub", "Sum", "Tanh", "ThresholdedRelu",
+    "Xor"
+])
+
+
+def get_channels_first_perm(rank):
+  """ Get the permutation transposing a channels last tensor to channels
+  first, as the handlers do on CPU.
+
+  :param rank: Rank of the tensor, greater than 2.
+  :return: List of int.
+  """
+  storage_format, compute_format = get_data_format(rank, "CPU")
+  return get_perm_from_formats(compute_format, storage_format)
+
+
+def get_channels_last_input(tensor):
+  """ Get the channels last tensor a tensor was transposed from.
+
+  :param tensor: A channels first Tensor.
+  :return: The channels last Tensor, or None if tensor is not produced by a
+    transpose to channels first.
+  """
+  source, perm = get_transpose_input(tensor)
+  if source is None or len(perm) < 3 or perm != get_channels_first_perm(
+      len(perm)):
+    return None
+  return source
+
+
+def sink_channels_first_transposes(node, tensor_dict):
+  """ Get the inputs to run a layout agnostic node on channels last.
+
+  The node can run on channels last if at least one of its inputs is
+  transposed from a channels last tensor, and the others are too or hold
+  a single element, which broadcasts the same in both layouts.
+
+  :param node: OnnxNode object.
+  :param tensor_dict: Tensor dict of graph.
+  :return: Tensor dict with the channels last inputs of the node and the
+    permutation to transpose its outputs back to channels first, or None and
+    None if the node can't run on channels last.
+  """
+  if node.op_type not in LAYOUT_AGNOSTIC_OPS or node.domain not in [
+      "", "ai.onnx"
+  ] or "axis" in node.attrs:
+    return None, None
+  channels_last = {}
+  rank = None
+  # ranks of the single element inputs, which must not broadcast the output
+  # to a higher rank
+  single_ranks = []
+  for name in node.inputs:
+    if not name or name in channels_last:
+      continue
+    tensor = tensor_dict.get(name)
+    if not isinstance(tensor, tf.Tensor):
+      return None, None
+    source = get_channels_last_input(tensor)
+    if source is not None and rank in [None, source.shape.rank]:
+      channels_last[name] = source
+      rank = source.shape.rank
+    elif tensor.shape.num_elements() == 1:
+      single_ranks.append(tensor.shape.rank)
+    else:
+      return None, None
+  if not channels_last or any(r > rank for r in single_ranks):
+    return None, None
+  return collections.ChainMap(channels_last,
+                              tensor_dict), get_channels_first_perm(rank)
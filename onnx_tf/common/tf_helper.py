@@ -47,3 +47,143 @@ def tf_product(a, b):
   b = tf.concat([tile_a, b], axis=1)
 
   return b
+
+
+# Byte alignment TensorFlow kernels expect of tensor buffers
+TF_ALIGNMENT_BYTES = 64
+
+
+def np_aligned_copy(array):
+  """
+        Helper function copying a numpy array into a new C contiguous,
+        writeable array aligned to TF_ALIGNMENT_BYTES, which
+        tf_tensor_from_value imports without another copy.
+
+        :param array: A numpy array.
+  """
+  buf = np.empty(array.nbytes + TF_ALIGNMENT_BYTES, dtype=np.uint8)
+  offset = -buf.ctypes.data % TF_ALIGNMENT_BYTES
+  aligned = buf[offset:offset + array.nbytes].view(array.dtype).reshape(
+      array.shape)
+  aligned[...] = array
+  return aligned
+
+
+def tf_tensor_from_value(value):
+  """
+        Helper function converting a value fed to a model into a Tensor
+        without copying its buffer when possible.
+        A tf.Tensor is returned as is. DLPack capsules and objects
+        implementing the DLPack protocol are imported in place. Numpy
+        arrays are imported in place when they are C contiguous, writeable,
+        of numeric dtype and aligned to TF_ALIGNMENT_BYTES. Anything else
+        is copied by tf.constant.
+
+        Note that a Tensor sharing the buffer of a numpy array observes any
+        later in-place change to that array.
+
+        :param value: A numpy array, tf.Tensor, DLPack capsule or any value
+                      accepted by tf.constant.
+  """
+  if isinstance(value, tf.Tensor):
+    return value
+  if type(value).__name__ == "PyCapsule":
+    return tf.experimental.dlpack.from_dlpack(value)
+  if isinstance(value, np.ndarray):
+    if (hasattr(value, "__dlpack__") and value.size > 0 and
+        value.dtype.kind in "iuf" and value.flags.c_contiguous and
+        value.flags.writeable and
+        value.ctypes.data % TF_ALIGNMENT_BYTES == 0):
+      return tf.experimental.dlpack.from_dlpack(value.__dlpack__())
+    return tf.constant(value)
+  if hasattr(value, "__dlpack__"):
+    return tf.experimental.dlpack.from_dlpack(value.__dlpack__())
+  return tf.constant(value)
+
+
+def is_eager_tensor(tensor):
+  """
+        Helper function returning whether a Tensor is an eager Tensor, like
+        the initializers captured by a traced function, whose value is known
+        when the function is traced.
+
+        :param tensor: A Tensor
+  """
+  if not isinstance(tensor, tf.Tensor):
+    return False
+  try:
+    tensor.op
+  except AttributeError:
+    return True
+  return False
+
+
+def get_transpose_input(tensor):
+  """
+        Helper function returning the input and the permutation of the
+        Transpose op producing a Tensor in a graph. None and None are
+        returned in eager mode, or if the Tensor is not produced by a
+        Transpose op with a constant permutation.
+
+        :param tensor: A Tensor
+  """
+  if tf.executing_eagerly() or not isinstance(tensor, tf.Tensor):
+    return None, None
+  try:
+    op = tensor.op
+  except AttributeError:
+    # an eager Tensor captured by the graph
+    return None, None
+  if op.type != "Transpose":
+    return None, None
+  perm = tf.get_static_value(op.inputs[1])
+  if perm is None:
+    return None, None
+  return op.inputs[0], perm.tolist()
+
+
+def get_pad_input(tensor):
+  """
+        Helper function returning the input and the paddings of the op
+        padding it with zeros that produces a Tensor in a graph. None and
+        None are returned in eager mode, or if the Tensor is not produced
+        by a Pad op with constant paddings, or a PadV2 op with a constant
+        zero value.
+
+        :param tensor: A Tensor
+  """
+  if tf.executing_eagerly() or not isinstance(tensor, tf.Tensor):
+    return None, None
+  try:
+    op = tensor.op
+  except AttributeError:
+    # an eager Tensor captured by the graph
+    return None, None
+  if op.type == "PadV2":
+    value = tf.get_static_value(op.inputs[2])
+    if value is None or value != 0:
+      return None, None
+  elif op.type != "Pad":
+    return None, None
+  paddings = tf.get_static_value(op.inputs[1])
+  if paddings is None:
+    return None, None
+  return op.inputs[0], paddings
+
+
+def tf_transpose(tensor, perm):
+  """
+        Helper function transposing a Tensor. When the Tensor is produced in
+        a graph by a Transpose op with the inverse permutation, like the
+        transposes back to channels first of the handlers on CPU, the input
+        of that op is returned instead of adding a transpose that cancels it.
+
+        :param tensor: A Tensor
+        :param perm: The permutation of the dimensions, a list of int.
+  """
+  source, source_perm = get_transpose_input(tensor)
+  if source is not None and len(source_perm) == len(perm) and [
+      source_perm[p] for p in perm
+  ] == list(range(len(perm))):
+    return source
+  return tf.transpose(tensor, perm=perm)
@@ -0,0 +1,233 @@
+"""Constant folding of ONNX models before their conversion.
+
+backend.prepare(model, fold_constants=True) evaluates once the nodes whose
+inputs are all constants, e.g. the Shape, Gather, Unsqueeze and Concat
+chains computing the shape of a Reshape in exported PyTorch models, and
+replaces them with initializers, so that they are not converted to TF ops
+and run again by every trace.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import numpy as np
+import onnx
+from onnx import defs
+from onnx import numpy_helper
+from onnx import shape_inference
+from onnx.helper import make_opsetid
+import tensorflow as tf
+
+from onnx_tf.backend_tf_module import BackendTFModule
+from onnx_tf.common import ConversionContext
+from onnx_tf.pb_wrapper import OnnxNode
+import onnx_tf.common as common
+
+# ops giving a different result on every run, or holding subgraphs
+NOT_FOLDABLE_OPS = frozenset([
+    "Bernoulli", "Dropout", "If", "Loop", "Multinomial", "RandomNormal",
+    "RandomNormalLike", "RandomUniform", "RandomUniformLike", "Scan"
+])
+
+
+class ConstantFolder(object):
+  """ ConstantFolder evaluates the nodes of the main graph of a model whose
+  inputs are all constants, with the backend handlers in eager mode, and
+  replaces them with initializers of their outputs.
+
+  Constants are the initializers that are not graph inputs, whose data is
+  loaded, and the outputs of the folded nodes. The output of Shape and Size
+  is a constant too when the shape of their input is static. Nodes whose
+  evaluation fails, whose outputs are not tensors or are graph outputs, or
+  larger than max_bytes are kept.
+
+  Usage:
+    folder = ConstantFolder(TensorflowBackend)
+    folded_model, num_folded = folder.fold(onnx_model)
+  """
+
+  def __init__(self, backend, max_bytes=None):
+    """ Create a ConstantFolder.
+
+    :param backend: TensorflowBackend class, which converts the nodes.
+    :param max_bytes: Maximum size in bytes of the outputs of a folded node.
+      Default is None, which means no limit.
+    """
+    self._backend = backend
+    self._max_bytes = max_bytes
+
+  def fold(self, model, inplace=False):
+    """ Fold the constant nodes of the main graph of a model.
+
+    :param model: ONNX ModelProto object.
+    :param inplace: Whether to modify model instead of a copy of it.
+    :return: The folded ModelProto object and the number of folded nodes.
+    """
+    if not inplace:
+      folded_model = onnx.ModelProto()
+      folded_model.CopyFrom(model)
+      model = folded_model
+    graph = model.graph
+    # Models with IR_VERSION less than 3 does not have opset_import set.
+    opset = model.opset_import if model.ir_version >= 3 else [
+        make_opsetid(defs.ONNX_DOMAIN, 1)
+    ]
+    handlers = self._backend._get_handlers(opset)
+    ctx = ConversionContext(opset=opset)
+
+    graph_inputs = set(value_info.name for value_info in graph.input)
+    graph_outputs = set(value_info.name for value_info in graph.output)
+    initializers = dict([(init.name, init)
+                         for init in graph.initializer
+                         if init.name not in graph_inputs and
+                         not self._backend._is_external_data_unloaded(init)])
+    static_shapes = self._get_static_shapes(model)
+    # name to tf.Tensor of the constants used so far
+    constants = {}
+    # name to TensorProto of the outputs of the folded nodes
+    folded_outputs = {}
+    folded = set()
+
+    with tf.device("/CPU:0"):
+      for i, node in enumerate(graph.node):
+        if (node.op_type in NOT_FOLDABLE_OPS or
+            any(name in graph_outputs for name in node.output)):
+          continue
+        if node.op_type in ["Shape", "Size"] and node.input[0] in static_shapes:
+          outputs = [
+              tf.constant(self._eval_shape(node,
+                                           static_shapes[node.input[0]]))
+          ]
+        elif all(name in folded_outputs or name in initializers
+                 for name in node.input
+                 if name):
+          outputs = self._eval_node(node, initializers, constants, handlers,
+                                    opset, ctx)
+        else:
+          continue
+        tensors = self._to_onnx_tensors(node, outputs)
+        if tensors is None:
+          continue
+        constants.update(zip(node.output, outputs))
+        folded_outputs.update(zip(node.output, tensors))
+        folded.add(i)
+
+    if folded:
+      self._replace_folded_nodes(graph, folded, folded_outputs, graph_inputs)
+    common.logger.info("Constant folding folded {} of {} nodes.".format(
+        len(folded),
+        len(graph.node) + len(folded)))
+    return model, len(folded)
+
+  def _eval_node(self, node, initializers, constants, handlers, opset, ctx):
+    for name in node.input:
+      if name and name not in constants:
+        constants.update(
+            self._backend._onnx_initializer_to_input_dict_items(
+                [initializers[name]]))
+    tensor_dict = dict([(name, constants[name])
+                        for name in node.input
+                        if name])
+    try:
+      return self._backend._onnx_node_to_tensorflow_op(OnnxNode(node),
+                                                       tensor_dict,
+                                                       handlers,
+                                                       opset=opset,
+                                                       ctx=ctx)
+    except Exception as e:  # pylint: disable=broad-except
+      common.logger.debug("Fail to fold {} node {}: {}".format(
+          node.op_type, node.name, e))
+      return None
+
+  def _to_onnx_tensors(self, node, outputs):
+    """ Get the TensorProtos of the outputs of a node, or None if they can't
+    be initializers.
+    """
+    if outputs is None or len(outputs) != len(node.output) or not all(
+        isinstance(output, tf.Tensor) for output in outputs):
+      return None
+    if self._max_bytes is not None and sum(
+        output.shape.num_elements() * output.dtype.size
+        for output in outputs) > self._max_bytes:
+      return None
+    try:
+      return [
+          numpy_helper.from_array(output.numpy(), name)
+          for output, name in zip(outputs, node.output)
+      ]
+    except Exception as e:  # pylint: disable=broad-except
+      common.logger.debug("Fail to fold {} node {}: {}".format(
+          node.op_type, node.name, e))
+      return None
+
+  @classmethod
+  def _eval_shape(cls, node, shape):
+    if node.op_type == "Size":
+      return np.array(np.prod(shape), dtype=np.int64)
+    attrs = OnnxNode(node).attrs
+    start = attrs.get("start", 0)
+    end = attrs.get("end", len(shape))
+    return np.array(shape[start:end], dtype=np.int64)
+
+  @classmethod
+  def _get_static_shapes(cls, model):
+    """ Get the static shapes of the tensors of the main graph, inferred on
+    a copy of the model without the initializer data.
+
+    :param model: ONNX ModelProto object.
+    :return: Dict of tensor name to list of dims.
+    """
+    graph = onnx.GraphProto()
+    graph.node.extend(model.graph.node)
+    graph.input.extend(model.graph.input)
+    graph.output.extend(model.graph.output)
+    graph.value_info.extend(model.graph.value_info)
+    graph_inputs = set(value_info.name for value_info in graph.input)
+    for init in model.graph.initializer:
+      if init.name not in graph_inputs:
+        graph.input.add().CopyFrom(
+            onnx.helper.make_tensor_value_info(init.name, init.data_type,
+                                               init.dims))
+    skeleton = onnx.helper.make_model(graph,
+                                      opset_imports=model.opset_import,
+                                      ir_version=model.ir_version)
+    try:
+      skeleton = shape_inference.infer_shapes(skeleton)
+    except Exception as e:  # pylint: disable=broad-except
+      common.logger.debug("Fail to infer shapes for folding: {}".format(e))
+
+    shapes = {}
+    value_infos = list(skeleton.graph.input) + list(skeleton.graph.value_info)
+    for value_info in value_infos:
+      tensor_type = value_info.type.tensor_type
+      if not tensor_type.HasField("shape"):
+        continue
+      dims = tensor_type.shape.dim
+      if all(dim.HasField("dim_value") for dim in dims):
+        shapes[value_info.name] = [dim.dim_value for dim in dims]
+    return shapes
+
+  @classmethod
+  def _replace_folded_nodes(cls, graph, folded, folded_outputs, graph_inputs):
+    nodes = [node for i, node in enumerate(graph.node) if i not in folded]
+    # names used by the remaining nodes, their subgraphs and the outputs
+    used = set(value_info.name for value_info in graph.output)
+    for node in nodes:
+      used |= BackendTFModule._get_node_input_names(node)
+    folded_inputs = set()
+    for i in folded:
+      folded_inputs.update(graph.node[i].input)
+
+    # initializers only used by the folded nodes are removed
+    initializers = [
+        init for init in graph.initializer
+        if init.name in used or init.name in graph_inputs or
+        init.name not in folded_inputs
+    ]
+    initializers.extend(tensor for name, tensor in folded_outputs.items()
+                        if name in used)
+    del graph.node[:]
+    graph.node.extend(nodes)
+    del graph.initializer[:]
+    graph.initializer.extend(initializers)
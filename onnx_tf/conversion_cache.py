@@ -0,0 +1,229 @@
+"""On-disk cache of converted models.
+
+backend.prepare(model, cache_dir=...) stores the converted model as a
+SavedModel under a key hashing the ONNX model and the conversion options,
+and loads it on later calls with the same key instead of converting again.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+
+from onnx import TensorProto
+from onnx.external_data_helper import ExternalDataInfo
+import tensorflow as tf
+
+import onnx_tf.common as common
+from onnx_tf.backend_rep import TensorflowRep
+from onnx_tf.version import git_version
+from onnx_tf.version import version
+
+REP_INFO_FILE = "onnx_tf_rep.json"
+
+
+class ConversionCache(object):
+  """ ConversionCache stores converted models in a directory, one
+  SavedModel per key, and evicts them by age and total size.
+
+  Usage:
+    cache = ConversionCache("/path/to/cache", max_bytes=1 << 30)
+    key = cache.get_key(onnx_model, strict=True)
+    tf_rep = cache.load(key)
+    if tf_rep is None:
+      tf_rep = prepare(onnx_model, strict=True)
+      cache.store(key, tf_rep)
+  """
+
+  def __init__(self, cache_dir, max_bytes=None, max_age=None):
+    """ Create a ConversionCache.
+
+    :param cache_dir: Directory of the cache. It's created on first store.
+    :param max_bytes: Maximum total size of the cache in bytes. Least
+      recently used entries are evicted above it. Default is None, which
+      means no limit.
+    :param max_age: Maximum time in seconds since an entry was last stored
+      or loaded. Older entries are evicted. Default is None, which means
+      no limit.
+    """
+    self._cache_dir = cache_dir
+    self._max_bytes = max_bytes
+    self._max_age = max_age
+
+  @property
+  def cache_dir(self):
+    return self._cache_dir
+
+  @classmethod
+  def get_key(cls, model, external_data_dir=None, **options):
+    """ Get cache key of the given model and conversion options.
+
+    :param model: ONNX ModelProto object.
+    :param external_data_dir: Directory of the external data files of the
+      initializers whose data is not loaded. Their size and modification time
+      are part of the key.
+    :param options: Conversion options, e.g. strict, auto_cast and device.
+    :return: Hex digest string.
+    """
+    external_data = []
+    for location in sorted(cls._get_external_data_locations(model.graph)):
+      path = os.path.join(external_data_dir or "", location)
+      stat = os.stat(path) if os.path.exists(path) else None
+      external_data.append(
+          [location, stat and stat.st_size, stat and stat.st_mtime])
+
+    sha = hashlib.sha256()
+    sha.update(model.SerializeToString(deterministic=True))
+    sha.update(
+        json.dumps(
+            {
+                "opset": sorted([opset.domain, opset.version]
+                                for opset in model.opset_import),
+                "external_data": external_data,
+                "options": options,
+                "onnx_tf": [version, git_version],
+                "tensorflow": tf.__version__
+            },
+            sort_keys=True,
+            default=str).encode("utf-8"))
+    return sha.hexdigest()
+
+  @classmethod
+  def _get_external_data_locations(cls, graph, locations=None):
+    locations = set() if locations is None else locations
+    for init in graph.initializer:
+      if (init.data_location == TensorProto.EXTERNAL and
+          not init.HasField("raw_data")):
+        locations.add(ExternalDataInfo(init).location)
+    for node in graph.node:
+      for attr in node.attribute:
+        for subgraph in list(attr.graphs) + ([attr.g]
+                                             if attr.HasField("g") else []):
+          cls._get_external_data_locations(subgraph, locations)
+    return locations
+
+  def load(self, key):
+    """ Load the converted model of the given key.
+
+    :param key: Cache key.
+    :return: TensorflowRep object, or None if the key is not cached.
+    """
+    path = os.path.join(self._cache_dir, key)
+    info_path = os.path.join(path, REP_INFO_FILE)
+    if not os.path.exists(info_path):
+      return None
+    try:
+      with open(info_path) as info_file:
+        info = json.load(info_file)
+      tf_module = tf.saved_model.load(path)
+      # loads count as uses for eviction
+      os.utime(info_path)
+    except Exception as e:  # pylint: disable=broad-except
+      common.logger.warning(
+          "Fail to load {} from conversion cache, convert again: {}".format(
+              key, e))
+      return None
+
+    tf_rep = TensorflowRep(inputs=info["inputs"], outputs=info["outputs"])
+    tf_rep.tf_module = tf_module
+    tf_rep.signatures = dict([
+        (name, tf.TensorSpec(spec["shape"], spec["dtype"], spec["name"]))
+        for name, spec in info["signatures"].items()
+    ])
+    tf_rep.onnx_op_list = info["onnx_op_list"]
+    common.logger.info("Load converted model {} from {}.".format(
+        key, self._cache_dir))
+    return tf_rep
+
+  def store(self, key, tf_rep):
+    """ Store the converted model of the given key and evict entries over
+    the limits. Failures are logged and leave the cache unchanged.
+
+    :param key: Cache key.
+    :param tf_rep: TensorflowRep object returned by prepare.
+    :return: None.
+    """
+    path = os.path.join(self._cache_dir, key)
+    # export to a hidden directory first, so that other processes never
+    # load a partially written entry
+    tmp_path = os.path.join(self._cache_dir,
+                            ".{}.{}".format(key, uuid.uuid4().hex))
+    try:
+      if not os.path.exists(self._cache_dir):
+        os.makedirs(self._cache_dir)
+      tf_rep.export_graph(tmp_path)
+      info = {
+          "inputs": list(tf_rep.inputs),
+          "outputs": list(tf_rep.outputs),
+          "signatures":
+              dict([(name, {
+                  "shape": spec.shape.as_list(),
+                  "dtype": spec.dtype.name,
+                  "name": spec.name
+              }) for name, spec in tf_rep.signatures.items()]),
+          "onnx_op_list": tf_rep.onnx_op_list
+      }
+      with open(os.path.join(tmp_path, REP_INFO_FILE), "w") as info_file:
+        json.dump(info, info_file)
+      if not os.path.exists(path):
+        os.rename(tmp_path, path)
+    except Exception as e:  # pylint: disable=broad-except
+      common.logger.warning(
+          "Fail to store {} in conversion cache: {}".format(key, e))
+    finally:
+      if os.path.exists(tmp_path):
+        shutil.rmtree(tmp_path, ignore_errors=True)
+    self.evict()
+
+  def evict(self):
+    """ Remove entries older than max_age, then least recently used
+    entries until the cache is within max_bytes.
+
+    :return: List of evicted keys.
+    """
+    if self._max_bytes is None and self._max_age is None:
+      return []
+    if not os.path.isdir(self._cache_dir):
+      return []
+
+    entries = []
+    for key in os.listdir(self._cache_dir):
+      if key.startswith("."):
+        continue
+      path = os.path.join(self._cache_dir, key)
+      try:
+        last_used = os.path.getmtime(os.path.join(path, REP_INFO_FILE))
+        size = self._get_size(path)
+      except OSError:
+        continue
+      entries.append((last_used, size, key))
+    entries.sort()
+
+    now = time.time()
+    total = sum(size for _, size, _ in entries)
+    evicted = []
+    for last_used, size, key in entries:
+      expired = self._max_age is not None and now - last_used > self._max_age
+      too_large = self._max_bytes is not None and total > self._max_bytes
+      if not expired and not too_large:
+        break
+      shutil.rmtree(os.path.join(self._cache_dir, key), ignore_errors=True)
+      total -= size
+      evicted.append(key)
+    if evicted:
+      common.logger.debug("Evict {} from conversion cache.".format(evicted))
+    return evicted
+
+  @classmethod
+  def _get_size(cls, path):
+    size = 0
+    for root, _, files in os.walk(path):
+      for name in files:
+        size += os.path.getsize(os.path.join(root, name))
+    return size
@@ -0,0 +1,209 @@
+"""Profiler of the conversion of ONNX nodes to TF ops.
+
+backend.prepare(model, profile=True) records, for each ONNX node converted
+when the model is traced, the wall time, the number of TF ops emitted and
+the change of resident memory, and reports them per node and per handler.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import contextlib
+import json
+import os
+import threading
+import time
+
+import tensorflow as tf
+
+REPORT_KEYS = ["count", "time", "self_time", "tf_ops", "memory"]
+
+try:
+  _PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+  _PAGE_SIZE = 4096
+
+
+def _get_rss():
+  # Linux only, the memory delta is not reported on other platforms
+  try:
+    with open("/proc/self/statm") as statm:
+      return int(statm.read().split()[1]) * _PAGE_SIZE
+  except (IOError, OSError, IndexError, ValueError):
+    return None
+
+
+class ConversionProfiler(object):
+  """ ConversionProfiler records the conversion of each ONNX node, including
+  the nodes in the bodies of Loop, If and Scan, which are reported under the
+  path of their parent nodes.
+
+  time and memory of a node include the nodes of its subgraphs, self_time
+  does not. tf_ops counts the TF ops added to the graph being traced, the
+  ops of subgraph bodies are counted by their own nodes. memory is the
+  change of the resident set size, on Linux only.
+
+  Usage:
+    tf_rep = prepare(onnx_model, profile=True)
+    tf_rep.run(inputs)
+    print(tf_rep.profiler.format_table())
+    tf_rep.profiler.dump("profile.json")
+  """
+
+  def __init__(self):
+    self._records = []
+    self._lock = threading.Lock()
+    # stack of the nodes being converted, per tracing thread
+    self._local = threading.local()
+
+  @property
+  def records(self):
+    """ List of dicts, one per converted node, in conversion order. A node
+    converted by several traces has several records.
+    """
+    with self._lock:
+      return list(self._records)
+
+  def clear(self):
+    """ Remove all records.
+    """
+    with self._lock:
+      self._records = []
+
+  @contextlib.contextmanager
+  def profile_node(self, node, handler):
+    """ Context manager recording the conversion of a node.
+
+    :param node: OnnxNode object.
+    :param handler: Handler class converting the node.
+    """
+    stack = self._local.__dict__.setdefault("stack", [])
+    name = node.name or node.outputs[0]
+    graph = None if tf.executing_eagerly() else \
+        tf.compat.v1.get_default_graph()
+    path = "/".join(frame["name"] for frame in stack)
+    frame = {"name": name, "children_time": 0.}
+    stack.append(frame)
+    ops_before = graph.version if graph is not None else None
+    rss_before = _get_rss()
+    start = time.time()
+    try:
+      yield
+    finally:
+      elapsed = time.time() - start
+      rss_after = _get_rss()
+      stack.pop()
+      memory = None
+      if rss_before is not None and rss_after is not None:
+        memory = rss_after - rss_before
+      if stack:
+        stack[-1]["children_time"] += elapsed
+      record = {
+          "name": name,
+          "graph": path,
+          "op_type": node.op_type,
+          "domain": node.domain,
+          "handler": handler.__name__,
+          "version": handler.SINCE_VERSION,
+          "time": elapsed,
+          "self_time": elapsed - frame["children_time"],
+          "tf_ops": graph.version - ops_before if graph is not None else None,
+          "memory": memory
+      }
+      with self._lock:
+        self._records.append(record)
+
+  def get_report(self, sort_by="time"):
+    """ Get the report of the records, summed per node and per handler.
+
+    :param sort_by: Key to sort the entries by, in decreasing order. One of
+      count, time, self_time, tf_ops and memory.
+    :return: Dict with the lists of entries in nodes and handlers.
+    """
+    if sort_by not in REPORT_KEYS:
+      raise ValueError("sort_by must be one of {}, but got {}.".format(
+          REPORT_KEYS, sort_by))
+    nodes = {}
+    handlers = {}
+    for record in self.records:
+      node = nodes.setdefault(
+          (record["graph"], record["name"]), {
+              "name": record["name"],
+              "graph": record["graph"],
+              "op_type": record["op_type"],
+              "handler": record["handler"],
+              "count": 0,
+              "time": 0.,
+              "self_time": 0.,
+              "tf_ops": 0,
+              "memory": 0
+          })
+      handler = handlers.setdefault(
+          (record["domain"], record["handler"], record["version"]), {
+              "handler": record["handler"],
+              "op_type": record["op_type"],
+              "domain": record["domain"],
+              "version": record["version"],
+              "count": 0,
+              "time": 0.,
+              "self_time": 0.,
+              "tf_ops": 0,
+              "memory": 0
+          })
+      for entry in [node, handler]:
+        entry["count"] += 1
+        entry["time"] += record["time"]
+        entry["self_time"] += record["self_time"]
+        entry["tf_ops"] += record["tf_ops"] or 0
+        entry["memory"] += record["memory"] or 0
+
+    def sort(entries):
+      return sorted(entries, key=lambda entry: entry[sort_by], reverse=True)
+
+    return {
+        "nodes": sort(nodes.values()),
+        "handlers": sort(handlers.values())
+    }
+
+  def dump(self, path, sort_by="time"):
+    """ Write the report in JSON.
+
+    :param path: Path of the JSON file.
+    :param sort_by: Key to sort the entries by, see get_report.
+    """
+    with open(path, "w") as report_file:
+      json.dump(self.get_report(sort_by), report_file, indent=2)
+
+  def format_table(self, sort_by="time", limit=None):
+    """ Format the report as text tables, one for the nodes and one for the
+    handlers.
+
+    :param sort_by: Key to sort the entries by, see get_report.
+    :param limit: Maximum number of rows of each table, default is all.
+    :return: String.
+    """
+    report = self.get_report(sort_by)
+    row = "{:<40} {:<20} {:>6} {:>10} {:>10} {:>7} {:>10}"
+
+    def format_rows(title, entries, get_name):
+      lines = [
+          row.format(title, "op_type", "count", "time(ms)", "self(ms)",
+                     "tf_ops", "memory(KB)")
+      ]
+      for entry in entries[:limit]:
+        lines.append(
+            row.format(get_name(entry)[-40:], entry["op_type"],
+                       entry["count"], "{:.2f}".format(entry["time"] * 1000),
+                       "{:.2f}".format(entry["self_time"] * 1000),
+                       entry["tf_ops"], entry["memory"] // 1024))
+      return lines
+
+    lines = format_rows(
+        "node", report["nodes"],
+        lambda entry: "/".join(filter(None, [entry["graph"], entry["name"]])))
+    lines.append("")
+    lines += format_rows(
+        "handler", report["handlers"],
+        lambda entry: "{}-{}".format(entry["handler"], entry["version"]))
+    return "\n".join(lines)
@@ -4,12 +4,12 @@ import logging
 import os
 import shutil
 
-import onnx
 import tensorflow as tf
 from tensorflow.core.framework import graph_pb2
 from tensorflow.python.tools import freeze_graph
 
 import onnx_tf.backend as backend
+import onnx_tf.backend_rep as backend_rep
 import onnx_tf.common as common
 from onnx_tf.common import get_unique_suffix
 from onnx_tf.pb_wrapper import TensorflowGraph
@@ -52,6 +52,23 @@ def parse_args(args):
           res.append((l, int(r)))
         setattr(namespace, "opset", res)
 
+  class ShapesAction(argparse.Action):
+    """ Define how to convert command line input shapes to Python objects.
+    Each occurrence of the option appends one dict of input name to shape.
+    """
+
+    def __call__(self, parser, namespace, values, option_string=None):
+      shapes = {}
+      for value in values:
+        name, _, dims = value.rpartition("=")
+        if not name:
+          raise argparse.ArgumentError(
+              self, "expected name=dims, but got {}".format(value))
+        shapes[name] = [int(d) for d in dims.split(",") if d]
+      res = getattr(namespace, self.dest, None) or []
+      res.append(shapes)
+      setattr(namespace, self.dest, res)
+
   def get_param_doc_dict(funcs):
     """Get doc of funcs params.
 
@@ -108,9 +125,48 @@ def parse_args(args):
                          "device": {},
                          "strict": {},
                          "logging_level": {},
-                         "auto_cast": {}
+                         "auto_cast": {},
+                         "jit_compile": {
+                             "action": "store_true"
+                         },
+                         "fold_constants": {
+                             "action": "store_true"
+                         },
+                         "fold_batch_norm": {
+                             "action": "store_true"
+                         }
+                     })])
+
+  # export args
+  # Args must be named consistently with respect to tf_rep.export_graph.
+  add_argument_group(parser, "export arguments",
+                     [(backend_rep.TensorflowRep.export_graph, {
+                         "outputs": {
+                             "nargs": "+"
+                         }
                      })])
 
+  # warmup args
+  group = parser.add_argument_group("warmup arguments")
+  group.add_argument(
+      "--warmup_shapes",
+      nargs="+",
+      action=ShapesAction,
+      metavar="NAME=DIMS",
+      help="Input shapes to trace ahead of time and export as additional "
+      "signatures, e.g. --warmup_shapes x=1,3,224,224 --warmup_shapes "
+      "x=8,3,224,224. Repeat the option for each combination of input shapes. "
+      "(from onnx_tf.backend_rep.warmup)")
+
+  # profile args
+  group = parser.add_argument_group("profile arguments")
+  group.add_argument(
+      "--profile",
+      metavar="PATH",
+      help="Profile the conversion of the nodes, write the report in JSON to "
+      "PATH and log the nodes and handlers taking the most time. "
+      "(from onnx_tf.conversion_profiler.ConversionProfiler)")
+
   return parser.parse_args(args)
 
 
@@ -130,7 +186,16 @@ def convert(infile, outdir, **kwargs):
   common.logger.handlers[0].setLevel(logging_level)
 
   common.logger.info("Start converting onnx pb to tf pb:")
-  onnx_model = onnx.load(infile)
-  tf_rep = backend.prepare(onnx_model, **kwargs)
-  tf_rep.export_graph(outdir)
+  outputs = kwargs.pop("outputs", None)
+  warmup_shapes = kwargs.pop("warmup_shapes", None)
+  profile = kwargs.pop("profile", None)
+  # external data files are memory-mapped by prepare instead of loaded
+  tf_rep = backend.prepare(infile, profile=profile is not None, **kwargs)
+  if warmup_shapes:
+    tf_rep.warmup(warmup_shapes, outputs=outputs)
+  tf_rep.export_graph(outdir, outputs=outputs)
+  if profile is not None:
+    tf_rep.profiler.dump(profile)
+    common.logger.info("Conversion profile written to {}:\n{}".format(
+        profile, tf_rep.profiler.format_table(limit=20)))
   common.logger.info("Converting completes successfully.")
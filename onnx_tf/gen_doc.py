@@ -22,9 +22,13 @@ def gen_api(docs_dir):
   gen_doc_for = {
       'onnx_tf.backend': [
           onnx_tf.backend.prepare,
+          onnx_tf.backend.prepare_many,
+          onnx_tf.backend.fold_constants,
+          onnx_tf.backend.fold_batch_norm,
       ],
       'onnx_tf.backend_rep.TensorflowRep': [
           onnx_tf.backend_rep.TensorflowRep.export_graph,
+          onnx_tf.backend_rep.TensorflowRep.warmup,
       ]
   }
   with open(os.path.join(docs_dir, 'API.md'), 'w') as doc_file:
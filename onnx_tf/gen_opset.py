@@ -9,6 +9,7 @@ import pprint
 from onnx import defs
 
 from onnx_tf.common.handler_helper import get_backend_coverage
+from onnx_tf.common.handler_helper import get_backend_handler_modules
 from onnx_tf.common.handler_helper import get_backend_partial_support_detail
 
 
@@ -22,13 +23,16 @@ def main():
   backend_onnx_coverage, backend_experimental_op = get_backend_coverage()
   backend_opset_dict.update(backend_onnx_coverage.get(defs.ONNX_DOMAIN, {}))
   backend_ps_dict = get_backend_partial_support_detail()
+  backend_modules_dict = get_backend_handler_modules()
 
   with open('opset_version.py', 'w') as version_file:
     pp = pprint.PrettyPrinter(indent=4)
     version_file.write("backend_opset_version = {\n " +
                        pp.pformat(backend_opset_dict)[1:-1] + "\n}\n\n")
     version_file.write("backend_partial_support = {\n " +
-                       pp.pformat(backend_ps_dict)[1:-1] + "\n}\n")
+                       pp.pformat(backend_ps_dict)[1:-1] + "\n}\n\n")
+    version_file.write("backend_handler_modules = {\n " +
+                       pp.pformat(backend_modules_dict)[1:-1] + "\n}\n")
 
 
 if __name__ == '__main__':
@@ -8,8 +8,7 @@ class AveragePool(PoolMixin, BackendHandler):
 
   @classmethod
   def _common(cls, node, **kwargs):
-    return cls.pool(node, kwargs["tensor_dict"], "AVG",
-                    kwargs.get("strict", True))
+    return cls.pool(node, kwargs["tensor_dict"], "AVG", kwargs["ctx"].device)
 
   @classmethod
   def version_1(cls, node, **kwargs):
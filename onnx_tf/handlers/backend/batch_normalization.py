@@ -1,5 +1,7 @@
 import tensorflow as tf
 
+from onnx_tf.common.layout_helper import get_channels_first_perm
+from onnx_tf.common.layout_helper import get_channels_last_input
 from onnx_tf.handlers.backend_handler import BackendHandler
 from onnx_tf.handlers.handler import onnx_op
 from onnx_tf.handlers.handler import tf_func
@@ -43,6 +45,19 @@ class BatchNormalization(BackendHandler):
 
     # from version 7, force to use test mode
     if cls.SINCE_VERSION >= 7 or node.attrs.get("is_test", 0):
+      ctx = kwargs.get("ctx", None)
+      x_channels_last = get_channels_last_input(x) if (
+          ctx and ctx.optimize_layout and ctx.device == 'CPU') else None
+      if x_channels_last is not None:
+        # normalize the channels last tensor x was transposed from, the
+        # params broadcast on its last dimension
+        inputs = [x_channels_last] + [
+            tensor_dict[node.inputs[i]] for i in [3, 4, 2, 1]
+        ]
+        return [
+            tf.transpose(cls.make_tensor_from_onnx_node(node, inputs=inputs),
+                         perm=get_channels_first_perm(x_rank))
+        ]
       inputs = [x, running_mean, running_variance, bias, scale]
       return [cls.make_tensor_from_onnx_node(node, inputs=inputs)]
     spatial = node.attrs.get("spatial", 1) == 1
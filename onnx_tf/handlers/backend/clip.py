@@ -1,7 +1,6 @@
 import tensorflow as tf
 
 from onnx_tf.common import exception
-from onnx_tf.common import sys_config
 from onnx_tf.handlers.backend_handler import BackendHandler
 from onnx_tf.handlers.handler import onnx_op
 import onnx_tf.common.data_type as data_type
@@ -16,20 +15,20 @@ class Clip(BackendHandler):
       tf.int8: tf.int32,
       tf.int16: tf.int32
   }
+  auto_cast_map = {tf.uint64: tf.int64}
   supported_types = [
       tf.int32, tf.int64, tf.float16, tf.float32, tf.float64, tf.bfloat16
   ]
 
   @classmethod
   def args_check(cls, node, **kwargs):
-    # update cast map based on the auto_cast config option
-    cls.cast_map[tf.uint64] = tf.int64 if sys_config.auto_cast else None
+    cast_map = cls.get_cast_map(cls.cast_map, cls.auto_cast_map, **kwargs)
 
     x = kwargs["tensor_dict"][node.inputs[0]]
 
     # throw an error if the data type is not natively supported by
     # Tensorflow, cannot be safely cast, and auto-cast option is False
-    if x.dtype in cls.cast_map and cls.cast_map[x.dtype] is None:
+    if x.dtype in cast_map and cast_map[x.dtype] is None:
       exception.DTYPE_NOT_CAST_EXCEPT(
           "Clip input " + node.inputs[0] + " with data type '" +
           data_type.tf_to_np_str(x.dtype) + "'",
@@ -37,6 +36,7 @@ class Clip(BackendHandler):
 
   @classmethod
   def _common(cls, node, **kwargs):
+    cast_map = cls.get_cast_map(cls.cast_map, cls.auto_cast_map, **kwargs)
     tensor_dict = kwargs["tensor_dict"]
     x = tensor_dict[node.inputs[0]]
     x_dtype = x.dtype
@@ -54,12 +54,12 @@ class Clip(BackendHandler):
 
     # tf.clip_by_value doesn't support uint8, uint16, uint32, int8 and int16
     # dtype for x, therefore need to upcast it to tf.int32 or tf.int64
-    need_cast = x_dtype in cls.cast_map
-    x = tf.cast(x, cls.cast_map[x_dtype]) if need_cast else x
+    need_cast = x_dtype in cast_map
+    x = tf.cast(x, cast_map[x_dtype]) if need_cast else x
     clip_value_min = tf.cast(
-        clip_value_min, cls.cast_map[x_dtype]) if need_cast else clip_value_min
+        clip_value_min, cast_map[x_dtype]) if need_cast else clip_value_min
     clip_value_max = tf.cast(
-        clip_value_max, cls.cast_map[x_dtype]) if need_cast else clip_value_max
+        clip_value_max, cast_map[x_dtype]) if need_cast else clip_value_max
     y = tf.clip_by_value(x, clip_value_min, clip_value_max)
     y = tf.cast(y, x_dtype) if need_cast else y
 
@@ -1,4 +1,3 @@
-import copy
 import tensorflow as tf
 
 from onnx_tf.handlers.backend_handler import BackendHandler
@@ -12,7 +11,7 @@ class Compress(BackendHandler):
 
   @classmethod
   def _common(cls, node, **kwargs):
-    attrs = copy.deepcopy(node.attrs)
+    attrs = dict(node.attrs)
     tensor_dict = kwargs["tensor_dict"]
     x = tensor_dict[node.inputs[0]]
     condition = tensor_dict[node.inputs[1]]
@@ -1,5 +1,3 @@
-import copy
-
 import tensorflow as tf
 
 from onnx import numpy_helper
@@ -15,7 +13,7 @@ class ConstantOfShape(BackendHandler):
 
   @classmethod
   def version_9(cls, node, **kwargs):
-    attrs = copy.deepcopy(node.attrs)
+    attrs = dict(node.attrs)
 
     shape = kwargs["tensor_dict"][node.inputs[0]]
 
@@ -8,8 +8,14 @@ class Conv(ConvMixin, BackendHandler):
 
   @classmethod
   def version_1(cls, node, **kwargs):
-    return cls.conv(node, kwargs["tensor_dict"])
+    return cls.conv(node,
+                    kwargs["tensor_dict"],
+                    device=kwargs["ctx"].device,
+                    ctx=kwargs["ctx"])
 
   @classmethod
   def version_11(cls, node, **kwargs):
-    return cls.conv(node, kwargs["tensor_dict"])
+    return cls.conv(node,
+                    kwargs["tensor_dict"],
+                    device=kwargs["ctx"].device,
+                    ctx=kwargs["ctx"])
@@ -1,3 +1,5 @@
+import copy
+
 import tensorflow as tf
 
 from onnx_tf.handlers.backend_handler import BackendHandler
@@ -21,16 +23,18 @@ class ConvInteger(ConvMixin, BackendHandler):
     w = tensor_dict[node.inputs[1]]
 
     def process_conv(new_x, new_w):
-      # Remove zero-points from inputs
-      if len(node.inputs) == 4:
-        node.inputs.remove(node.inputs[3])
-      if len(node.inputs) == 3:
-        node.inputs.remove(node.inputs[2])
+      # Remove zero-points from inputs of a copy of the node, the node is
+      # shared by the traces of the model
+      conv_node = copy.copy(node)
+      conv_node.inputs = node.inputs[:2]
 
       new_dict = {node.inputs[0]: new_x, node.inputs[1]: new_w}
 
       # Use common conv handling
-      conv_node = cls.conv(node, new_dict)
+      conv_node = cls.conv(conv_node,
+                           new_dict,
+                           device=kwargs["ctx"].device,
+                           ctx=kwargs["ctx"])
 
       return conv_node
 
@@ -39,12 +43,10 @@ class ConvInteger(ConvMixin, BackendHandler):
         x, tensor_dict[node.inputs[2]]) if len(node.inputs) > 2 else tf.cast(
             x, tf.float32)
 
-    # Apply w_zero_point next
-    if len(node.inputs) == 4:
-      w_zero_point = tensor_dict[node.inputs[3]]
+    def apply_w_zero_point(w, w_zero_point):
       if w_zero_point.shape.rank == 0:
         # Simply apply w_zero_point for scalar
-        w = cls._apply_zero_point(w, w_zero_point)
+        return cls._apply_zero_point(w, w_zero_point)
       elif w_zero_point.shape.rank == 1:
         # Need additional processing for 1d w_zero_point
         tensor_list = []
@@ -53,11 +55,20 @@ class ConvInteger(ConvMixin, BackendHandler):
           # Apply w_zero_point for each element in 1d tensor
           out_tensor = cls._apply_zero_point(w[i], w_zero_point[i])
           tensor_list.append(tf.reshape(out_tensor, process_shape))
-        w = tf.concat(tensor_list, 0)
+        return tf.concat(tensor_list, 0)
       else:
         raise ValueError("Unsupported w zero point: {}".format(w_zero_point))
+
+    # Apply w_zero_point next, to a constant w once
+    if len(node.inputs) == 4:
+      w = cls.run_on_constants(apply_w_zero_point,
+                               [w, tensor_dict[node.inputs[3]]],
+                               "convinteger_w",
+                               ctx=kwargs["ctx"])
     else:
       # Just cast without processing w
-      w = tf.cast(w, tf.float32)
+      w = cls.run_on_constants(lambda w: tf.cast(w, tf.float32), [w],
+                               "convinteger_w",
+                               ctx=kwargs["ctx"])
 
     return [tf.cast(process_conv(x, w)[0], tf.int32)]
@@ -3,7 +3,9 @@ import tensorflow as tf
 from onnx_tf.common import exception
 from onnx_tf.common import get_data_format
 from onnx_tf.common import get_perm_from_formats
+from onnx_tf.common.tf_helper import get_pad_input
 from onnx_tf.common.tf_helper import tf_shape
+from onnx_tf.common.tf_helper import tf_transpose
 from onnx_tf.common import sys_config
 from .broadcast_mixin import BroadcastMixin
 from .pad_mixin import PadMixin
@@ -12,11 +14,15 @@ from .pad_mixin import PadMixin
 # is not natively supported in Tensorflow.
 PAD_TF_INCOMPATIBLE = "PAD_TF_INCOMPATIBLE"
 
+# (device, spatial size, transpose, dtype) to whether TF runs grouped
+# convolutions of the kind in a single op
+_grouped_conv_support = {}
+
 
 class ConvMixin(BroadcastMixin):
 
   @classmethod
-  def conv(cls, node, input_dict, transpose=False):
+  def conv(cls, node, input_dict, transpose=False, device=None, ctx=None):
     """ Convolution method for both conv and transposed conv
     For transposed conv,
       Attr pads is not used for input, but declares how much output is padded.
@@ -25,13 +31,18 @@ class ConvMixin(BroadcastMixin):
         output = conv_transpose_output + output_padding - pads
       And conv_transpose_output shape should be:
         conv_transpose_output_shape[i] = strides[i] * (input_shape[i] - 1) + kernel_shape[i]
+    The compute format is channel first on CUDA, device defaults to
+    sys_config.device.
+    Constant weights are transformed to the TF layout once, the result is
+    kept in ctx if given.
     """
+    device = device or sys_config.device
     x = input_dict[node.inputs[0]]
     x_rank = len(x.get_shape())
     x_shape = tf_shape(x, tf.int32)
     spatial_size = x_rank - 2
 
-    storage_format, compute_format = get_data_format(x_rank)
+    storage_format, compute_format = get_data_format(x_rank, device)
     compute_c_idx = compute_format.find("C")
     spatial_format = "".join([d for d in compute_format if d not in ["N", "C"]])
 
@@ -56,18 +67,80 @@ class ConvMixin(BroadcastMixin):
     else:
       kernel_shape = tf_shape(in_weights, tf.int32)[2:]
 
-    weights = tf.transpose(in_weights, perm)
+    group = node.attrs.get("group", 1)
     dilations = node.attrs.get("dilations", [1] * spatial_size)
     strides = node.attrs.get("strides", [1] * spatial_size)
 
+    # the groups are convolved by a single op when asked in ctx and TF
+    # supports it, else the input and the weights are split into the groups.
+    # The support is checked on the converting machine, so it's opt-in, the
+    # split groups run on any machine the model is exported to
+    depthwise = cls._is_depthwise(in_weights, group, strides, dilations,
+                                  transpose)
+    native_grouped_conv = ctx is not None and ctx.native_grouped_conv
+    if group == 1 or depthwise or (native_grouped_conv and
+                                   cls._supports_grouped_conv(
+                                       device, spatial_size, transpose,
+                                       x.dtype)):
+      num_splits = 1
+    else:
+      num_splits = group
+
+    def transform_weights(in_weights):
+      weights = tf.transpose(in_weights, perm)
+      if depthwise:
+        # (KH x KW x 1 x M) to (KH x KW x C x M/C) for conv and
+        # (KH x KW x 1 x C) to (KH x KW x C x 1) for transposed conv
+        return [
+            weights,
+            tf.reshape(weights, weights.shape[:2].as_list() + [group, -1])
+        ]
+      return [weights] + tf.split(weights, num_or_size_splits=num_splits,
+                                  axis=-1)
+
+    transformed = cls.run_on_constants(
+        transform_weights, [in_weights],
+        ("conv_weights", group, num_splits, depthwise),
+        ctx=ctx)
+    weights, weight_groups = transformed[0], transformed[1:]
+
     pads = node.attrs.get("pads", [0, 0] * spatial_size)
 
+    if not transpose and node.attrs.get("auto_pad", "NOTSET") == "NOTSET":
+      # the zero pads of the spatial dimensions of a Pad node producing x are
+      # added to pads, and done by the convolution with its own
+      pad_input, paddings = get_pad_input(x)
+      if pad_input is not None and not paddings[:2].any():
+        x = pad_input
+        pads = [
+            p + int(paddings[2 + i % spatial_size][i // spatial_size])
+            for i, p in enumerate(pads)
+        ]
+
+    if device != 'CUDA':
+      # transpose before padding, so that the transpose cancels the one to
+      # channels first of the node producing x
+      x = tf_transpose(x,
+                       perm=get_perm_from_formats(storage_format,
+                                                  compute_format))
+
     # Check auto_pad nonexistent or NOTSET first
     if "auto_pad" not in node.attrs or node.attrs["auto_pad"] == "NOTSET":
       if not transpose:
-        if pads != [0, 0] * spatial_size:
-          x = PadMixin.get_padding_as_op(x, pads)
-        pad_mode = "VALID"
+        if pads == [0, 0] * spatial_size:
+          pad_mode = "VALID"
+        elif spatial_size == 2 and not depthwise:
+          # explicit padding of tf.nn.conv2d, instead of a padded copy of x.
+          # The oneDNN kernels of TF 2.13 abort on depthwise convolutions
+          # with explicit padding fused with a bias add
+          pad_mode = [[0, 0]] + [[pads[i], pads[i + spatial_size]]
+                                 for i in range(spatial_size)]
+          pad_mode.insert(compute_c_idx, [0, 0])
+        else:
+          x = PadMixin.get_padding_as_op(x,
+                                         pads,
+                                         channels_last=device != 'CUDA')
+          pad_mode = "VALID"
       else:
         pad_mode = "NOTSET"
     # Then we use auto_pad to setup pad_mode
@@ -90,16 +163,11 @@ class ConvMixin(BroadcastMixin):
         exception.OP_UNSUPPORTED_EXCEPT("Conv with auto_pad `SAME_LOWER`",
                                         "Tensorflow")
 
-    group = node.attrs.get("group", 1)
-
-    weight_groups = tf.split(weights, num_or_size_splits=group, axis=-1)
-
-    if sys_config.device == 'CUDA':
+    if num_splits == 1:
+      xs = [x]
+    elif device == 'CUDA':
       xs = tf.split(x, num_or_size_splits=group, axis=1)
     else:
-      x = tf.transpose(x,
-                       perm=get_perm_from_formats(storage_format,
-                                                  compute_format))
       xs = tf.split(x, num_or_size_splits=group, axis=-1)
 
     if transpose:
@@ -116,6 +184,8 @@ class ConvMixin(BroadcastMixin):
         weights_shape = tf_shape(weights, tf.int32)
         output_shape = node.attrs.get("output_shape", None)
         conv_output_shape = [x_shape[storage_format.find("N")]]
+        # output channels of the groups convolved at once
+        out_channels = weights_shape[-2] * (group // num_splits)
 
         # calculate output shape
         if pad_mode == "NOTSET":
@@ -130,14 +200,16 @@ class ConvMixin(BroadcastMixin):
                 s + pads[i] + pads[spatial_size + i]
                 for i, s in enumerate(output_shape[-2:])
             ]
-          conv_output_shape.insert(compute_c_idx, weights_shape[-2])
+          conv_output_shape.insert(compute_c_idx, out_channels)
 
           # make strides to match input rank
           strides_full = [1] + strides
           strides_full.insert(compute_c_idx, 1)
 
           # get corresponding function in tf
-          if spatial_size == 1:
+          if depthwise:
+            conv_func = cls._depthwise_conv2d_transpose
+          elif spatial_size == 1:
             conv_func = tf.nn.conv1d_transpose
             strides_full = strides[0]
           elif spatial_size == 2:
@@ -196,14 +268,16 @@ class ConvMixin(BroadcastMixin):
                 strides[i] * x_spatial_shape[i]
                 for i in list(range(spatial_size))
             ]
-          conv_output_shape.insert(compute_c_idx, weights_shape[-2])
+          conv_output_shape.insert(compute_c_idx, out_channels)
 
           # make strides to match input rank
           strides_full = [1] + strides
           strides_full.insert(compute_c_idx, 1)
 
           # get corresponding function in tf
-          if spatial_size == 1:
+          if depthwise:
+            conv_func = cls._depthwise_conv2d_transpose
+          elif spatial_size == 1:
             conv_func = tf.nn.conv1d_transpose
             strides_full = strides[0]
           elif spatial_size == 2:
@@ -224,19 +298,33 @@ class ConvMixin(BroadcastMixin):
                               data_format=compute_format)
           convolved.append(conv_rs)
 
+    elif depthwise:
+      strides_full = [1] + strides
+      strides_full.insert(compute_c_idx, 1)
+      convolved = [
+          tf.nn.depthwise_conv2d(x,
+                                 weight_groups[0],
+                                 strides=strides_full,
+                                 padding=pad_mode,
+                                 data_format=compute_format,
+                                 dilations=dilations)
+      ]
     else:
+      # tf.nn.convolution doesn't take explicit padding
+      conv_func = tf.nn.conv2d if isinstance(pad_mode,
+                                             list) else tf.nn.convolution
       convolved = [
-          tf.nn.convolution(x,
-                            weight,
-                            padding=pad_mode,
-                            strides=strides,
-                            dilations=dilations,
-                            data_format=compute_format)
+          conv_func(x,
+                    weight,
+                    padding=pad_mode,
+                    strides=strides,
+                    dilations=dilations,
+                    data_format=compute_format)
           for (x, weight) in zip(xs, weight_groups)
       ]
 
     if len(node.inputs) == 2:
-      if sys_config.device == 'CUDA':
+      if device == 'CUDA':
         output = tf.concat(convolved, axis=1)
       else:
         output = tf.concat(convolved, axis=-1)
@@ -247,7 +335,7 @@ class ConvMixin(BroadcastMixin):
       bias = input_dict[node.inputs[2]]
       bias = cls.explicit_broadcast([x, bias], compute_c_idx)
 
-      if sys_config.device == 'CUDA':
+      if device == 'CUDA':
         output = tf.concat(convolved, axis=1)
         output = tf.add(output, bias)
       else:
@@ -258,3 +346,80 @@ class ConvMixin(BroadcastMixin):
                                   compute_format, storage_format))
 
     return [output]
+
+  @classmethod
+  def _is_depthwise(cls, in_weights, group, strides, dilations, transpose):
+    """ Check whether a 2D convolution is depthwise, that is each group has
+    a single input channel, and tf.nn.depthwise_conv2d or its transpose can
+    compute it. A depthwise transposed convolution must have a single output
+    channel per group too.
+    """
+    shape = in_weights.get_shape()
+    if group == 1 or shape.rank != 4 or not shape.is_fully_defined():
+      return False
+    if transpose:
+      # (C x M/group x KH x KW)
+      if shape[0] != group or shape[1] != 1:
+        return False
+    elif shape[1] != 1:
+      # (M x C/group x KH x KW)
+      return False
+    # the strides must be equal, and can't be combined with dilations
+    return strides[0] == strides[1] and (strides == [1, 1] or
+                                         dilations == [1, 1])
+
+  @classmethod
+  def _depthwise_conv2d_transpose(cls, x, weight, output_shape, strides,
+                                  padding, data_format):
+    return tf.nn.depthwise_conv2d_backprop_input(output_shape,
+                                                 weight,
+                                                 x,
+                                                 strides,
+                                                 padding,
+                                                 data_format=data_format)
+
+  @classmethod
+  def _supports_grouped_conv(cls, device, spatial_size, transpose, dtype):
+    """ Check whether TF runs grouped convolutions or transposed
+    convolutions of spatial_size dimensions and dtype on device in a single
+    op, by running a small one the first time. Their support depends on the
+    kernels TF is built with, for example the oneDNN ones on CPU, which
+    don't cover all the dtypes.
+    """
+    key = (device, spatial_size, transpose, dtype)
+    if key in _grouped_conv_support:
+      return _grouped_conv_support[key]
+    _, compute_format = get_data_format(spatial_size + 2, device)
+    compute_c_idx = compute_format.find("C")
+    # 2 groups of 1 input and 1 output channel
+    x_shape = [1] * (spatial_size + 1)
+    x_shape.insert(compute_c_idx, 2)
+    weights_shape = [1] * spatial_size + [1, 2]
+    conv_funcs = [
+        tf.nn.conv1d_transpose, tf.nn.conv2d_transpose, tf.nn.conv3d_transpose
+    ]
+    supported = False
+    with tf.init_scope(), tf.device("/GPU:0" if device ==
+                                    "CUDA" else "/CPU:0"):
+      try:
+        x = tf.ones(x_shape, dtype)
+        weights = tf.ones(weights_shape, dtype)
+        if transpose:
+          if spatial_size <= len(conv_funcs):
+            conv_funcs[spatial_size - 1](x,
+                                         weights,
+                                         x_shape,
+                                         1,
+                                         padding="VALID",
+                                         data_format=compute_format)
+            supported = True
+        else:
+          tf.nn.convolution(x,
+                            weights,
+                            padding="VALID",
+                            data_format=compute_format)
+          supported = True
+      except (tf.errors.OpError, ValueError):
+        pass
+    _grouped_conv_support[key] = supported
+    return supported
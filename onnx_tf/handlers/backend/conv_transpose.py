@@ -14,8 +14,16 @@ class ConvTranspose(ConvMixin, BackendHandler):
 
   @classmethod
   def version_1(cls, node, **kwargs):
-    return cls.conv(node, kwargs["tensor_dict"], transpose=True)
+    return cls.conv(node,
+                    kwargs["tensor_dict"],
+                    transpose=True,
+                    device=kwargs["ctx"].device,
+                    ctx=kwargs["ctx"])
 
   @classmethod
   def version_11(cls, node, **kwargs):
-    return cls.conv(node, kwargs["tensor_dict"], transpose=True)
+    return cls.conv(node,
+                    kwargs["tensor_dict"],
+                    transpose=True,
+                    device=kwargs["ctx"].device,
+                    ctx=kwargs["ctx"])
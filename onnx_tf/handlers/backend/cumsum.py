@@ -3,7 +3,6 @@ import tensorflow as tf
 from onnx_tf.handlers.backend_handler import BackendHandler
 from onnx_tf.handlers.handler import onnx_op
 from onnx_tf.handlers.handler import tf_func
-from onnx_tf.common import sys_config
 from onnx_tf.common import exception
 from onnx_tf.common import data_type
 #import onnx_tf.common.data_type as data_type
@@ -13,18 +12,18 @@ from onnx_tf.common import data_type
 @tf_func(tf.math.cumsum)
 class CumSum(BackendHandler):
   cast_map = {tf.uint32: tf.int64}
+  auto_cast_map = {tf.uint64: tf.int64}
   supported_types = [tf.int32, tf.int64, tf.float32, tf.float64]
 
   @classmethod
   def args_check(cls, node, **kwargs):
-    # update cast map based on the auto_cast config option
-    cls.cast_map[tf.uint64] = tf.int64 if sys_config.auto_cast else None
+    cast_map = cls.get_cast_map(cls.cast_map, cls.auto_cast_map, **kwargs)
 
     x = kwargs["tensor_dict"][node.inputs[0]]
 
     # throw an error if the data type is not natively supported by
     # Tensorflow, cannot be safely cast, and auto-cast option is False
-    if x.dtype in cls.cast_map and cls.cast_map[x.dtype] is None:
+    if x.dtype in cast_map and cast_map[x.dtype] is None:
       exception.DTYPE_NOT_CAST_EXCEPT(
           "CumSum input " + node.inputs[0] + " with data type '" +
           data_type.tf_to_np_str(x.dtype) + "'",
@@ -32,11 +31,12 @@ class CumSum(BackendHandler):
 
   @classmethod
   def version_11(cls, node, **kwargs):
+    cast_map = cls.get_cast_map(cls.cast_map, cls.auto_cast_map, **kwargs)
     x = kwargs["tensor_dict"][node.inputs[0]]
 
     # handle data types that are not natively supported by Tensorflow
     dtype = x.dtype
-    x = tf.cast(x, cls.cast_map[dtype]) if dtype in cls.cast_map else x
+    x = tf.cast(x, cast_map[dtype]) if dtype in cast_map else x
     inputs = [x]
 
     if len(node.inputs) > 1:
@@ -50,4 +50,4 @@ class CumSum(BackendHandler):
     }
 
     result = cls.make_tensor_from_onnx_node(node, inputs=inputs, attrs=attrs)
-    return [tf.cast(result, dtype) if dtype in cls.cast_map else result]
+    return [tf.cast(result, dtype) if dtype in cast_map else result]
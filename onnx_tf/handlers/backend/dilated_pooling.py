@@ -8,6 +8,7 @@ from onnx_tf.common import get_perm_from_formats
 from onnx_tf.common import pooling_helper
 from onnx_tf.common.tf_helper import tf_shape
 from onnx_tf.common.tf_helper import tf_product
+from onnx_tf.common.tf_helper import tf_transpose
 
 
 class DilatedPooling(object):
@@ -22,7 +23,8 @@ class DilatedPooling(object):
 
         In addition to the standard features of pooling operations in
         Tensorflow, these methods support dilations, ceil mode, SAME_LOWER and
-        explicit padding.
+        explicit padding, with average pools counting the padded values or
+        not (`_avg_pool_excluding_pads`).
 
         Dilations are partly supported in Tensorflow in `tf.nn.pool` and
         `tf.nn.dilation2d`. The code will try to use the Tensoflow build-in
@@ -154,7 +156,8 @@ class DilatedPooling(object):
                ceil_mode=False,
                count_include_pad=False,
                pooling_type="MAX",
-               p=2):
+               p=2,
+               device=None):
     self.input = tf.convert_to_tensor(input)
 
     self.kernel_shape = kernel_shape
@@ -166,6 +169,7 @@ class DilatedPooling(object):
     self.count_include_pad = count_include_pad
     self.pooling_type = pooling_type.upper()
     self.p = p
+    self.device = device
 
     self.is_known_shape = self.input.shape.is_fully_defined()
     self.spatial_size = len(kernel_shape)
@@ -184,7 +188,7 @@ class DilatedPooling(object):
       self.padding_constant = 0
 
     self.storage_format, self.compute_format = get_data_format(
-        self.spatial_size + 2)
+        self.spatial_size + 2, device)
     self.need_trans = self.storage_format != self.compute_format
 
   def _calc_input_ind(self, output_ind, kernel, dilation, stride):
@@ -563,7 +567,7 @@ class DilatedPooling(object):
       kernel_shape = [1] + list(self.kernel_shape) + [1]
 
       if self.need_trans:
-        new_input = tf.transpose(new_input,
+        new_input = tf_transpose(new_input,
                                  perm=get_perm_from_formats(
                                      self.storage_format, self.compute_format))
 
@@ -590,7 +594,7 @@ class DilatedPooling(object):
       kernel_shape = [1] + list(self.kernel_shape) + [1]
 
       if self.need_trans:
-        self.input = tf.transpose(self.input,
+        self.input = tf_transpose(self.input,
                                   perm=get_perm_from_formats(
                                       self.storage_format, self.compute_format))
 
@@ -629,11 +633,13 @@ class DilatedPooling(object):
             SAME_* padding is provided or ceil_mode is True
     """
 
-    assert self.is_supported()
+    if self._is_pad_excluded():
+      return self._avg_pool_excluding_pads(force_custom_impl)
 
     if self.is_explicit_padding or self.padding.lower() == "same_lower" \
             or (self.padding.lower() == "same_upper" and
-                self.count_include_pad) or self.pooling_type.upper() == "LP":
+                self.count_include_pad) or self.pooling_type.upper() == "LP" \
+            or self.ceil_mode:
       # pad the input
       self._pad_input()
 
@@ -655,7 +661,7 @@ class DilatedPooling(object):
       self.compute_format = 'NHWC'
       self.need_trans = self.storage_format.startswith("NC")
       if self.need_trans:
-        self.input = tf.transpose(self.input,
+        self.input = tf_transpose(self.input,
                                   perm=get_perm_from_formats(
                                       self.storage_format, self.compute_format))
 
@@ -674,7 +680,7 @@ class DilatedPooling(object):
             not force_custom_impl:
 
       if self.need_trans:
-        self.input = tf.transpose(self.input,
+        self.input = tf_transpose(self.input,
                                   perm=get_perm_from_formats(
                                       self.storage_format, self.compute_format))
 
@@ -715,7 +721,7 @@ class DilatedPooling(object):
       input_ = self._remove_dilations()
 
       if self.need_trans:
-        input_ = tf.transpose(input_,
+        input_ = tf_transpose(input_,
                               perm=get_perm_from_formats(
                                   self.storage_format, self.compute_format))
 
@@ -736,30 +742,43 @@ class DilatedPooling(object):
 
     return pooled
 
-  def is_supported(self):
+  def _avg_pool_excluding_pads(self, force_custom_impl=False):
     """
-            Function to check if the current set of arguments are
-            supported for average pool
+            Does an average pool excluding the padded values from the count
+            of every sliding window, which Tensorflow pooling ops only do for
+            SAME_UPPER padding.
+
+            The sums of the sliding windows are averaged over the padded
+            input the same way as with count_include_pad, then divided by
+            the average of a mask of ones padded the same way, which is the
+            fraction of the values of every window that are not padding.
     """
-    # check for maxpool
-    if self.pooling_type.startswith("MAX") or \
-       self.pooling_type=="LP":
+    kwargs = dict(kernel_shape=self.kernel_shape,
+                  strides=self.strides,
+                  dilations=self.dilations,
+                  padding=self.padding,
+                  ceil_mode=self.ceil_mode,
+                  count_include_pad=True,
+                  pooling_type="AVG",
+                  device=self.device)
+    pooled = DilatedPooling(input=self.input,
+                            **kwargs).dilated_pool(force_custom_impl)
+    # the mask is the same for all the batches and channels
+    mask = tf.ones_like(self.input[:1, :1])
+    counts = DilatedPooling(input=mask,
+                            **kwargs).dilated_pool(force_custom_impl)
+    return pooled / counts
+
+  def _is_pad_excluded(self):
+    """
+            Check if the padded values have to be excluded from the count of
+            the sliding windows of an average pool, as the Tensorflow pooling
+            ops don't support it for the current set of arguments
+    """
+    if self.pooling_type != "AVG" or self.count_include_pad:
+      return False
+    if self.ceil_mode:
       return True
-    else:
-      # if count_include_pad is true it is fully supported
-      if self.count_include_pad:
-        return True
-      # ceil mode is not supported
-      elif self.ceil_mode:
-        return False
-      # explicit padding with padding values set to 0 is supported
-      elif (self.is_explicit_padding and
-            self.padding == [0] * self.spatial_size * 2):
-        return True
-      # "valid" and "same_upper" auto padding is supported
-      elif (not self.is_explicit_padding and
-            self.padding.lower() in ["valid", "same_upper"]):
-        return True
-      # any other case is not supported
-      else:
-        return False
+    if self.is_explicit_padding:
+      return self.padding != [0] * self.spatial_size * 2
+    return self.padding.lower() not in ["valid", "same_upper"]
@@ -1,5 +1,3 @@
-import copy
-
 import tensorflow as tf
 
 from onnx_tf.handlers.backend_handler import BackendHandler
@@ -15,7 +13,7 @@ class Dropout(BackendHandler):
   def _common(cls, node, **kwargs):
     tensor_dict = kwargs["tensor_dict"]
     x = tensor_dict[node.inputs[0]]
-    attrs = copy.deepcopy(node.attrs)
+    attrs = dict(node.attrs)
 
     if cls.SINCE_VERSION < 7 and attrs.pop("is_test", 0) == 0:
       attrs["keep_prob"] = 1 - attrs.pop("ratio", 0.5)
@@ -13,8 +13,8 @@ class EyeLike(BackendHandler):
   def version_9(cls, node, **kwargs):
 
     inp = kwargs["tensor_dict"][node.inputs[0]]
-    dtype = node.attrs.pop("dtype", inp.dtype)
-    offset = node.attrs.pop("k", 0)
+    dtype = node.attrs.get("dtype", inp.dtype)
+    offset = node.attrs.get("k", 0)
 
     # If the shape of input is static, then the handler
     # can use python code to calculate the eye shape and
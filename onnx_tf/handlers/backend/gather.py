@@ -1,4 +1,3 @@
-import copy
 import tensorflow as tf
 
 from onnx_tf.handlers.backend_handler import BackendHandler
@@ -19,7 +18,7 @@ class Gather(GatherAndScatterMixin, BackendHandler):
   def version_11(cls, node, **kwargs):
     x = kwargs["tensor_dict"][node.inputs[0]]
     indices = kwargs["tensor_dict"][node.inputs[1]]
-    attrs = copy.deepcopy(node.attrs)
+    attrs = dict(node.attrs)
     axis = attrs.get("axis", 0)
     result = cls.chk_idx_out_of_bounds_along_axis(x, axis, indices)
     msg = 'Gather indices are out of bounds, please double check the indices and retry.'
@@ -223,7 +223,7 @@ class GRU(RNNMixin, BackendHandler):
 
       outputs, states = cls.rnn(x, tf.compat.v1.nn.rnn_cell.GRUCell,
                                 cell_kwargs, rnn_kwargs, tf_activations,
-                                direction)
+                                direction, kwargs["ctx"].rnn_cells)
 
     if num_directions == 1:
       state = states[0]
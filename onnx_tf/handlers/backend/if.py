@@ -38,14 +38,16 @@ class If(BackendHandler):
       subgraph_tensor_dict = onnx_tf.backend.onnx_graph_to_tensorflow_ops(
           subgraph=then_branch,
           tensor_dict=dict(kwargs["tensor_dict"]),
-          opset=current_opset)
+          opset=current_opset,
+          ctx=kwargs["ctx"])
       return [subgraph_tensor_dict[o.name] for o in then_branch.output]
 
     def false_fn():
       subgraph_tensor_dict = onnx_tf.backend.onnx_graph_to_tensorflow_ops(
           subgraph=else_branch,
           tensor_dict=dict(kwargs["tensor_dict"]),
-          opset=current_opset)
+          opset=current_opset,
+          ctx=kwargs["ctx"])
       return [subgraph_tensor_dict[o.name] for o in else_branch.output]
 
     return cls.make_tensor_from_onnx_node(node,
@@ -54,7 +54,10 @@ class Loop(BackendHandler):
       for i in range(2, len(body.input)):
         subgraph_tensor_dict[body.input[i].name] = v[i - 2]
       subgraph_tensor_dict = onnx_tf.backend.onnx_graph_to_tensorflow_ops(
-          subgraph=body, tensor_dict=subgraph_tensor_dict, opset=current_opset)
+          subgraph=body,
+          tensor_dict=subgraph_tensor_dict,
+          opset=current_opset,
+          ctx=kwargs["ctx"])
       outputs = [subgraph_tensor_dict[output.name] for output in body.output]
       for i in range(scan_outputs_start_index, len(outputs)):
         s_index = i - scan_outputs_start_index
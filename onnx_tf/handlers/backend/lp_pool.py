@@ -8,8 +8,7 @@ class LpPool(PoolMixin, BackendHandler):
 
   @classmethod
   def _common(cls, node, **kwargs):
-    return cls.pool(node, kwargs["tensor_dict"], "LP",
-                    kwargs.get("strict", True))
+    return cls.pool(node, kwargs["tensor_dict"], "LP", kwargs["ctx"].device)
 
   @classmethod
   def version_1(cls, node, **kwargs):
@@ -1,5 +1,3 @@
-import copy
-
 import tensorflow as tf
 import numpy as np
 
@@ -14,7 +12,7 @@ class LRN(BackendHandler):
 
   @classmethod
   def _common(cls, node, **kwargs):
-    attrs = copy.deepcopy(node.attrs)
+    attrs = dict(node.attrs)
     alpha = attrs.get("alpha", 1e-4)
     attrs.setdefault("beta", 0.75)
     size = attrs["size"]
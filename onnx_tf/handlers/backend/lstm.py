@@ -239,7 +239,7 @@ class LSTM(RNNMixin, BackendHandler):
 
       outputs, states = cls.rnn(x, tf.compat.v1.nn.rnn_cell.LSTMCell,
                                 cell_kwargs, rnn_kwargs, tf_activations,
-                                direction)
+                                direction, kwargs["ctx"].rnn_cells)
 
     if num_directions == 1:
       state = states[0]
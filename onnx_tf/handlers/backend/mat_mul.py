@@ -2,7 +2,6 @@ import tensorflow as tf
 
 from onnx_tf.common import exception
 from onnx_tf.common import data_type
-from onnx_tf.common import sys_config
 from onnx_tf.handlers.backend_handler import BackendHandler
 from onnx_tf.handlers.handler import onnx_op
 from onnx_tf.handlers.handler import tf_func
@@ -17,12 +16,13 @@ class MatMul(BackendHandler):
   cast_map = {
       tf.uint32: tf.int64
   }
-  cast_map[tf.uint64] = tf.int64 if sys_config.auto_cast else None
+  auto_cast_map = {tf.uint64: tf.int64}
 
   @classmethod
   def args_check(cls, node, **kwargs):
+    cast_map = cls.get_cast_map(cls.cast_map, cls.auto_cast_map, **kwargs)
     dtype = kwargs["tensor_dict"][node.inputs[0]].dtype
-    if dtype in cls.cast_map and cls.cast_map[dtype] is None:
+    if dtype in cast_map and cast_map[dtype] is None:
       exception.DTYPE_NOT_CAST_EXCEPT(
           "MatMul input " + node.inputs[0] + " with data type '" +
           data_type.tf_to_np_str(dtype) + "'",
@@ -30,12 +30,13 @@ class MatMul(BackendHandler):
 
   @classmethod
   def _common(cls, node, **kwargs):
+    cast_map = cls.get_cast_map(cls.cast_map, cls.auto_cast_map, **kwargs)
     values = [kwargs["tensor_dict"][inp] for inp in node.inputs]
     dtype = values[0].dtype
-    if dtype in cls.cast_map:
-      values = [tf.cast(v, cls.cast_map[v.dtype]) for v in values]
+    if dtype in cast_map:
+      values = [tf.cast(v, cast_map[v.dtype]) for v in values]
     result = cls.make_tensor_from_onnx_node(node, inputs=values, **kwargs)
-    return [tf.cast(result, dtype) if dtype in cls.cast_map else result]
+    return [tf.cast(result, dtype) if dtype in cast_map else result]
 
   @classmethod
   def version_1(cls, node, **kwargs):
@@ -1,5 +1,3 @@
-import copy
-
 from .broadcast_mixin import BroadcastMixin
 
 
@@ -15,7 +13,7 @@ class ReductionMixin(BroadcastMixin):
 
   @classmethod
   def _common(cls, node, **kwargs):
-    attrs = copy.deepcopy(node.attrs)
+    attrs = dict(node.attrs)
     axis = attrs.pop("axes", None)
     if isinstance(axis, (list, tuple)) and len(axis) == 1:
       axis = axis[0]
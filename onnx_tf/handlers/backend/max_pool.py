@@ -17,7 +17,7 @@ class MaxPool(PoolMixin, BackendHandler):
   def _common(cls, node, **kwargs):
     pool_type = "MAX" if len(node.outputs) == 1 else "MAX_WITH_ARGMAX"
     return cls.pool(node, kwargs["tensor_dict"], pool_type,
-                    kwargs.get("strict", True))
+                    kwargs["ctx"].device)
 
   @classmethod
   def version_1(cls, node, **kwargs):
@@ -2,7 +2,6 @@ import tensorflow as tf
 
 from onnx_tf.common import exception
 from onnx_tf.common import data_type
-from onnx_tf.common import sys_config
 from onnx_tf.handlers.backend_handler import BackendHandler
 from onnx_tf.handlers.handler import onnx_op
 
@@ -19,15 +18,14 @@ class Min(BackendHandler):
       tf.int8: tf.int32,
       tf.int16: tf.int32
   }
+  auto_cast_map = {tf.uint64: tf.int64}
 
   @classmethod
   def args_check(cls, node, **kwargs):
-    # update cast map based on the auto_cast config option
-    cls.cast_map[tf.uint64] = tf.int64 if sys_config.auto_cast else None
-
+    cast_map = cls.get_cast_map(cls.cast_map, cls.auto_cast_map, **kwargs)
     inp_dtype = kwargs["tensor_dict"][node.inputs[0]].dtype
 
-    if inp_dtype in cls.cast_map and cls.cast_map[inp_dtype] is None:
+    if inp_dtype in cast_map and cast_map[inp_dtype] is None:
       exception.DTYPE_NOT_CAST_EXCEPT(
           "Min input " + node.inputs[0] + " with data type '" +
           data_type.tf_to_np_str(inp_dtype) + "'",
@@ -35,14 +33,15 @@ class Min(BackendHandler):
 
   @classmethod
   def _common(cls, node, **kwargs):
+    cast_map = cls.get_cast_map(cls.cast_map, cls.auto_cast_map, **kwargs)
     values = [kwargs["tensor_dict"][inp] for inp in node.inputs]
     dtype = values[0].dtype
-    if dtype in cls.cast_map:
-      values = [tf.cast(v, cls.cast_map[dtype]) for v in values]
+    if dtype in cast_map:
+      values = [tf.cast(v, cast_map[dtype]) for v in values]
     result = values[0]
     for i in range(1, len(values)):
       result = tf.minimum(result, values[i])
-    return [tf.cast(result, dtype) if dtype in cls.cast_map else result]
+    return [tf.cast(result, dtype) if dtype in cast_map else result]
 
   @classmethod
   def version_1(cls, node, **kwargs):
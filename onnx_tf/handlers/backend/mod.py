@@ -1,7 +1,6 @@
 import tensorflow as tf
 
 from onnx_tf.common import exception
-from onnx_tf.common import sys_config
 from onnx_tf.handlers.backend_handler import BackendHandler
 from onnx_tf.handlers.handler import onnx_op
 from .math_mixin import ArithmeticMixin
@@ -17,21 +16,21 @@ class Mod(ArithmeticMixin, BackendHandler):
       tf.int8: tf.int32,
       tf.int16: tf.int32
   }
+  auto_cast_map = {tf.uint64: tf.int64}
   supported_types = [
       tf.int32, tf.int64, tf.float16, tf.float32, tf.float64, tf.bfloat16
   ]
 
   @classmethod
   def args_check(cls, node, **kwargs):
-    # update cast map based on the auto_cast config option
-    cls.cast_map[tf.uint64] = tf.int64 if sys_config.auto_cast else None
+    cast_map = cls.get_cast_map(cls.cast_map, cls.auto_cast_map, **kwargs)
 
     x = kwargs["tensor_dict"][node.inputs[0]]
     y = kwargs["tensor_dict"][node.inputs[1]]
 
     # throw an error if the data type is not natively supported by
     # Tensorflow, cannot be safely cast, and auto-cast option is False
-    if x.dtype in cls.cast_map and cls.cast_map[x.dtype] is None:
+    if x.dtype in cast_map and cast_map[x.dtype] is None:
       exception.DTYPE_NOT_CAST_EXCEPT(
           "Mod input " + node.inputs[0] + " with data type '" +
           data_type.tf_to_np_str(x.dtype) + "'",
@@ -44,6 +43,7 @@ class Mod(ArithmeticMixin, BackendHandler):
 
   @classmethod
   def _common(cls, node, **kwargs):
+    cast_map = cls.get_cast_map(cls.cast_map, cls.auto_cast_map, **kwargs)
     x = kwargs["tensor_dict"][node.inputs[0]]
     y = kwargs["tensor_dict"][node.inputs[1]]
     x_dtype = x.dtype
@@ -51,9 +51,9 @@ class Mod(ArithmeticMixin, BackendHandler):
     fmod = node.attrs.get("fmod", 0)
 
     # cast inputs if not natively support by Tensorflow API
-    need_cast = x_dtype in cls.cast_map
-    x = tf.cast(x, cls.cast_map[x_dtype]) if need_cast else x
-    y = tf.cast(y, cls.cast_map[y_dtype]) if need_cast else y
+    need_cast = x_dtype in cast_map
+    x = tf.cast(x, cast_map[x_dtype]) if need_cast else x
+    y = tf.cast(y, cast_map[y_dtype]) if need_cast else y
 
     tf_func = tf.truncatemod if fmod == 1 else tf.math.floormod
     z = cls.make_tensor_from_onnx_node(node,
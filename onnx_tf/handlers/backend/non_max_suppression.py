@@ -1,6 +1,5 @@
 import tensorflow as tf
 
-from onnx_tf.common import get_variable_name
 from onnx_tf.common.tf_helper import tf_shape
 from onnx_tf.handlers.backend_handler import BackendHandler
 from onnx_tf.handlers.handler import onnx_op
@@ -8,23 +7,6 @@ from onnx_tf.handlers.handler import onnx_op
 
 @onnx_op("NonMaxSuppression")
 class NonMaxSuppression(BackendHandler):
-  var_name = 'result'
-
-  @classmethod
-  def get_req_vars_template(cls, node, init_dict):
-    """ Get required variables template, which is a
-    dictionary of variable names with initial value and
-    shape.
-    :param node: OnnxNode object.
-    :param init_dict: initializer dictionary of the graph.
-    :return: template dictionary.
-    """
-    return {
-        cls.var_name: [
-            tf.constant([[0, 0, 0]], dtype=tf.int64),
-            tf.TensorShape([None, 3])
-        ]
-    }
 
   @classmethod
   def _common(cls, node, **kwargs):
@@ -32,7 +14,7 @@ class NonMaxSuppression(BackendHandler):
     boxes = tensor_dict[node.inputs[0]]
     scores = tensor_dict[node.inputs[1]]
     # in ONNX spec max_output_boxes_per_class need to be in int64 but
-    # max_output_boxes for tf.image.non_max_suppression must be in tf.int32
+    # max_output_size for NonMaxSuppressionV4 must be in tf.int32
     # therefore need to cast this input to tf.int32
     max_output_boxes_per_class = tf.cast(
         tensor_dict[node.inputs[2]],
@@ -68,46 +50,64 @@ class NonMaxSuppression(BackendHandler):
       boxes_t = tf.concat([y1, x1, y2, x2], 1)
       boxes = tf.transpose(boxes_t, perm=[0, 2, 1])
 
-    def create_nodes(boxes, scores, max_output_boxes_per_class, iou_threshold,
-                     score_threshold, result):
-      # get number of batches in boxes
-      num_batches = tf_shape(boxes)[0]
-      for batch_i in tf.range(num_batches):
-        # get boxes in batch_i only
-        tf_boxes = tf.squeeze(tf.gather(boxes, [batch_i]), axis=0)
-        # get scores of all classes in batch_i only
-        batch_i_scores = tf.squeeze(tf.gather(scores, [batch_i]), axis=0)
-        # get number of classess in batch_i only
-        num_classes = tf_shape(batch_i_scores)[0]
-        for class_j in tf.range(num_classes):
-          # get scores in class_j for batch_i only
-          tf_scores = tf.squeeze(tf.gather(batch_i_scores, [class_j]), axis=0)
-          # get the selected boxes indices
-          selected_indices = tf.image.non_max_suppression(
-              tf_boxes, tf_scores, max_output_boxes_per_class, iou_threshold,
-              score_threshold)
-          # add batch and class information into the indices
-          output = tf.transpose([tf.cast(selected_indices, dtype=tf.int64)])
-          paddings = tf.constant([[0, 0], [1, 0]])
-          output = tf.pad(output,
-                          paddings,
-                          constant_values=tf.cast(class_j, dtype=tf.int64))
-          output = tf.pad(output,
-                          paddings,
-                          constant_values=tf.cast(batch_i, dtype=tf.int64))
-          # tf.function will auto convert "result" from variable to placeholder
-          # therefore don't need to use assign here
-          result = output if tf.equal(batch_i, 0) and tf.equal(
-              class_j, 0) else tf.concat([result, output], 0)
-
-      return result
-
-    result = tensor_dict[get_variable_name(node, cls.var_name)]
     return [
-        create_nodes(boxes, scores, max_output_boxes_per_class, iou_threshold,
-                     score_threshold, result)
+        cls._batched_non_max_suppression(boxes, scores,
+                                         max_output_boxes_per_class,
+                                         iou_threshold, score_threshold)
     ]
 
+  @classmethod
+  def _batched_non_max_suppression(cls, boxes, scores,
+                                   max_output_boxes_per_class, iou_threshold,
+                                   score_threshold):
+    """ Non max suppression of the boxes of all the batches and classes.
+    The indices of the boxes selected for each batch and class are padded to
+    max_output_boxes_per_class, clamped to the number of boxes, so that the suppressions are independent
+    iterations of a tf.map_fn, which can run in parallel, and the selected
+    boxes are gathered at once instead of concatenated one by one.
+
+    :param boxes: Tensor of shape [num_batches, num_boxes, 4].
+    :param scores: Tensor of shape [num_batches, num_classes, num_boxes].
+    :return: int64 Tensor of the [batch, class, box] indices of the selected
+      boxes, in the order of the batches, then classes, then selection.
+    """
+    scores_shape = tf_shape(scores, tf.int32)
+    num_classes = scores_shape[1]
+    # [batch * class, box]
+    class_scores = tf.reshape(scores, [-1, scores_shape[2]])
+    batch_indices = tf.repeat(tf.range(scores_shape[0]), num_classes)
+    # no more boxes than given can be selected, and models often set a huge
+    # max_output_boxes_per_class, which would be the size of the padding
+    max_output_size = tf.minimum(max_output_boxes_per_class,
+                                 tf_shape(boxes, tf.int32)[1])
+
+    def suppress(inputs):
+      batch_i, scores_i = inputs
+      outputs = tf.raw_ops.NonMaxSuppressionV4(
+          boxes=tf.gather(boxes, batch_i),
+          scores=scores_i,
+          max_output_size=max_output_size,
+          iou_threshold=tf.cast(iou_threshold, tf.float32),
+          score_threshold=tf.cast(score_threshold, tf.float32),
+          pad_to_max_output_size=True)
+      return outputs.selected_indices, outputs.valid_outputs
+
+    selected, num_selected = tf.map_fn(
+        suppress, (batch_indices, class_scores),
+        fn_output_signature=(tf.TensorSpec([None], tf.int32),
+                             tf.TensorSpec([], tf.int32)),
+        parallel_iterations=32)
+
+    # [batch * class, index] of the selected boxes
+    indices = tf.where(
+        tf.range(tf_shape(selected, tf.int32)[1]) < tf.expand_dims(
+            num_selected, 1))
+    box_indices = tf.cast(tf.gather_nd(selected, indices), tf.int64)
+    num_classes = tf.cast(num_classes, tf.int64)
+    return tf.stack([
+        indices[:, 0] // num_classes, indices[:, 0] % num_classes, box_indices
+    ], 1)
+
   @classmethod
   def version_10(cls, node, **kwargs):
     return cls._common(node, **kwargs)
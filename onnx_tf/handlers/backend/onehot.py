@@ -1,9 +1,7 @@
-import copy
 import tensorflow as tf
 
 from onnx_tf.common import exception
 from onnx_tf.common import data_type
-from onnx_tf.common import sys_config
 from onnx_tf.common.tf_helper import tf_shape
 from onnx_tf.handlers.backend_handler import BackendHandler
 from onnx_tf.handlers.handler import onnx_op
@@ -24,6 +22,7 @@ class OneHot(BackendHandler):
       tf.float32: tf.int64,
       tf.float64: tf.int64
   }
+  indices_auto_cast_map = {tf.uint64: tf.int64}
   depth_supported_type = [tf.int32]
   depth_cast_map = {
       tf.uint8: tf.int32,
@@ -36,27 +35,31 @@ class OneHot(BackendHandler):
       tf.float32: tf.int32,
       tf.float64: tf.int32
   }
+  depth_auto_cast_map = {
+      tf.uint32: tf.int32,
+      tf.uint64: tf.int32,
+      tf.int64: tf.int32
+  }
 
   @classmethod
   def args_check(cls, node, **kwargs):
-    # update cast_map base on auto_cast flag
-    cls.indices_cast_map[tf.uint64] = tf.int64 if sys_config.auto_cast else None
-    cls.depth_cast_map[tf.uint32] = tf.int32 if sys_config.auto_cast else None
-    cls.depth_cast_map[tf.uint64] = tf.int32 if sys_config.auto_cast else None
-    cls.depth_cast_map[tf.int64] = tf.int32 if sys_config.auto_cast else None
+    indices_cast_map = cls.get_cast_map(cls.indices_cast_map,
+                                        cls.indices_auto_cast_map, **kwargs)
+    depth_cast_map = cls.get_cast_map(cls.depth_cast_map,
+                                      cls.depth_auto_cast_map, **kwargs)
 
     tensor_dict = kwargs["tensor_dict"]
     indices = tensor_dict[node.inputs[0]]
     depth = tensor_dict[node.inputs[1]]
     indices_dtype = indices.dtype
     depth_dtype = depth.dtype
-    if indices_dtype in cls.indices_cast_map and cls.indices_cast_map[
+    if indices_dtype in indices_cast_map and indices_cast_map[
         indices_dtype] is None:
       exception.DTYPE_NOT_CAST_EXCEPT(
           "OneHot input " + node.inputs[0] + " with data type '" +
           data_type.tf_to_np_str(indices_dtype) + "'",
           data_type.tf_to_np_str_list(cls.indices_supported_type))
-    if depth_dtype in cls.depth_cast_map and cls.depth_cast_map[
+    if depth_dtype in depth_cast_map and depth_cast_map[
         depth_dtype] is None:
       exception.DTYPE_NOT_CAST_EXCEPT(
           "OneHot input " + node.inputs[1] + " with data type '" +
@@ -72,7 +75,11 @@ class OneHot(BackendHandler):
 
   @classmethod
   def _common(cls, node, **kwargs):
-    attrs = copy.deepcopy(node.attrs)
+    indices_cast_map = cls.get_cast_map(cls.indices_cast_map,
+                                        cls.indices_auto_cast_map, **kwargs)
+    depth_cast_map = cls.get_cast_map(cls.depth_cast_map,
+                                      cls.depth_auto_cast_map, **kwargs)
+    attrs = dict(node.attrs)
     tensor_dict = kwargs["tensor_dict"]
     indices = tensor_dict[node.inputs[0]]
     depth = tensor_dict[node.inputs[1]]
@@ -82,12 +89,12 @@ class OneHot(BackendHandler):
     axis = axis if axis >= 0 else len(tf_shape(indices)) + axis + 1
 
     # process tf.one_hot unsupported datatype for indices
-    indices = tf.cast(indices, cls.indices_cast_map[
-        indices.dtype]) if indices.dtype in cls.indices_cast_map else indices
+    indices = tf.cast(indices, indices_cast_map[
+        indices.dtype]) if indices.dtype in indices_cast_map else indices
 
     # process tf.one_hot unsupported datatype for depth
-    depth = tf.cast(depth, cls.depth_cast_map[
-        depth.dtype]) if depth.dtype in cls.depth_cast_map else depth
+    depth = tf.cast(depth, depth_cast_map[
+        depth.dtype]) if depth.dtype in depth_cast_map else depth
 
     # depth can be either a scalar or a 1D tensor of size 1 according
     # to ONNX schema, although operators doc states only scalar.
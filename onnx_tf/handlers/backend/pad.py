@@ -1,5 +1,7 @@
+import numpy as np
 import tensorflow as tf
 
+from onnx_tf.common.tf_helper import is_eager_tensor
 from onnx_tf.handlers.backend_handler import BackendHandler
 from onnx_tf.handlers.handler import onnx_op
 from onnx_tf.handlers.handler import tf_func
@@ -14,7 +16,9 @@ class Pad(BackendHandler):
     tensor_dict = kwargs["tensor_dict"]
     x = tensor_dict[node.inputs[0]]
     num_dim = len(tensor_dict[node.inputs[0]].get_shape())
-    mode = node.attrs.pop("mode", "constant")
+    # mode is an input of tf.pad, the other attributes are not passed
+    attrs = dict(node.attrs)
+    mode = attrs.pop("mode", "constant")
 
     def check_positive(pads):
       p = tf.greater_equal(pads, tf.zeros((1), dtype=pads.dtype))
@@ -44,8 +48,12 @@ class Pad(BackendHandler):
         return i + 1, x
 
       # tf requires int32 paddings
-      paddings = tf.cast(tf.transpose(tf.reshape(paddings, [2, num_dim])),
-                         dtype=tf.int32)
+      if isinstance(paddings, np.ndarray):
+        paddings = np.transpose(paddings.reshape([2, num_dim])).astype(
+            np.int32)
+      else:
+        paddings = tf.cast(tf.transpose(tf.reshape(paddings, [2, num_dim])),
+                           dtype=tf.int32)
 
       if mode.lower() == "edge":
         # Tensorflow doesn't support edge mode so we need to implement the
@@ -61,17 +69,29 @@ class Pad(BackendHandler):
 
       return [
           cls.make_tensor_from_onnx_node(
-              node, inputs=[x, paddings, mode, constant_values], **kwargs)
+              node,
+              inputs=[x, paddings, mode, constant_values],
+              attrs=attrs,
+              **kwargs)
       ]
 
     if cls.SINCE_VERSION < 11:  # for opset 1 and opset 2
-      paddings = tf.constant(node.attrs.pop("pads", None), tf.int32)
-      constant_values = node.attrs.pop("value", 0.)
+      paddings = np.array(attrs.pop("pads", None), np.int32)
+      constant_values = attrs.pop("value", 0.)
 
     else:  # for opset 11
       paddings = tensor_dict[node.inputs[1]]
       constant_values = tensor_dict[node.inputs[2]] if len(
           node.inputs) == 3 else 0
+      # the values of constant inputs are put in the graph, so that the
+      # convolution handlers can see the zero pads they can do themselves
+      if is_eager_tensor(paddings):
+        paddings = paddings.numpy()
+      if is_eager_tensor(constant_values):
+        constant_values = constant_values.numpy()
+
+    if isinstance(paddings, np.ndarray) and (paddings >= 0).all():
+      return process_pos_pads(x, paddings, constant_values)
 
     cond = tf.cond(check_positive(paddings),
                    lambda: process_pos_pads(x, paddings, constant_values),
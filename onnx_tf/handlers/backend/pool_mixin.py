@@ -2,11 +2,8 @@ import tensorflow as tf
 
 from onnx_tf.common import exception
 from onnx_tf.common import get_perm_from_formats
-from onnx_tf.common import logger
 from onnx_tf.common import sys_config
-from onnx_tf.common.pooling_helper import py_pool
 from onnx_tf.common.pooling_helper import calc_pads_same
-from onnx_tf.common.pooling_helper import calc_output_shape
 from onnx_tf.common.tf_helper import tf_shape
 from .dilated_pooling import DilatedPooling
 
@@ -15,7 +12,8 @@ class PoolMixin(object):
 
   @classmethod
   @tf.autograph.experimental.do_not_convert()
-  def pool(cls, node, input_dict, pooling_type, strict=True):
+  def pool(cls, node, input_dict, pooling_type, device=None):
+    device = device or sys_config.device
     x = input_dict[node.inputs[0]]
 
     kernel_shape = node.attrs["kernel_shape"]
@@ -67,7 +65,7 @@ class PoolMixin(object):
     # need to cast to float16 in order to run with NCHW data format
     need_cast = pooling_type in [
         'MAX', 'MAX_WITH_ARGMAX'
-    ] and sys_config.device == 'CUDA' and x_dtype in [tf.int8, tf.uint8]
+    ] and device == 'CUDA' and x_dtype in [tf.int8, tf.uint8]
     x = tf.cast(x, tf.float16) if need_cast else x
 
     dp = DilatedPooling(input=x,
@@ -78,30 +76,8 @@ class PoolMixin(object):
                         ceil_mode=ceil_mode,
                         pooling_type=pooling_type,
                         count_include_pad=count_include_pad,
+                        device=device,
                         p=p)
-    if not dp.is_supported():
-      if strict:
-        logger.warning("Using the pooling op in compatibility mode. "
-                       "This means your graph cannot be serialized.")
-
-        result = tf.numpy_function(py_pool, [
-            x, kernel_shape, strides, dilations, pads, ceil_mode, pooling_type,
-            False
-        ], x.dtype)
-
-        if x.shape.is_fully_defined():
-          shape = x.get_shape()
-          output_shape = shape[0:2] + calc_output_shape(
-              shape[2:x_rank], kernel_shape, strides, dilations, pads,
-              ceil_mode)
-        else:
-          output_shape = [None] * x_rank
-        result.set_shape(output_shape)
-        return [result]
-      else:
-        exception.OP_UNSUPPORTED_EXCEPT(
-            "strict == 0 and " + pooling_name + " arguments not compatible",
-            "Tensorflow")
 
     from absl import logging
     logging.set_verbosity(logging.INFO)
@@ -4,7 +4,6 @@ from onnx_tf.handlers.backend_handler import BackendHandler
 from onnx_tf.handlers.handler import onnx_op
 from onnx_tf.handlers.handler import tf_func
 from .math_mixin import BasicMathMixin
-from onnx_tf.common import sys_config
 from onnx_tf.common import exception
 from onnx_tf.common import data_type
 
@@ -20,18 +19,19 @@ class Pow(BasicMathMixin, BackendHandler):
       tf.int8: tf.int16,
       tf.int16: tf.int32
   }
+  y_auto_cast_map = {tf.uint64: tf.int64}
   supported_types = [tf.int32, tf.int64, tf.float16, tf.float32, tf.float64]
 
   @classmethod
   def args_check(cls, node, **kwargs):
-    # update cast map based on the auto_cast config option
-    cls.y_cast_map[tf.uint64] = tf.int64 if sys_config.auto_cast else None
+    y_cast_map = cls.get_cast_map(cls.y_cast_map, cls.y_auto_cast_map,
+                                  **kwargs)
 
     y = kwargs["tensor_dict"][node.inputs[1]]
 
     # throw an error if the data type is not natively supported by
     # Tensorflow, cannot be safely cast, and auto-cast option is False
-    if y.dtype in cls.y_cast_map and cls.y_cast_map[y.dtype] is None:
+    if y.dtype in y_cast_map and y_cast_map[y.dtype] is None:
       exception.DTYPE_NOT_CAST_EXCEPT(
           "Pow input " + node.inputs[1] + " with data type '" +
           data_type.tf_to_np_str(y.dtype) + "'",
@@ -1,3 +1,5 @@
+import copy
+
 import tensorflow as tf
 
 from onnx_tf.handlers.backend_handler import BackendHandler
@@ -39,21 +41,30 @@ class QLinearConv(ConvMixin, BackendHandler):
     y_zero_point = tensor_dict[node.inputs[7]]
 
     output_dtype = x.dtype
+    channels = x.shape[1]
+
+    def to_1d(w_zero_point, w_scale):
+      # Convert w_zero_point and w_scale to 1-D if scalar
+      if len(w_zero_point.shape) == 0:
+        w_zero_point = tf.fill([channels], w_zero_point)
+      elif len(w_zero_point.shape) > 1:
+        raise ValueError("Unsupported zero point: {}".format(w_zero_point))
 
-    # Convert w_zero_point and w_scale to 1-D if scalar
-    if len(w_zero_point.shape) == 0:
-      w_zero_point = tf.fill([x.shape[1]], w_zero_point)
-    elif len(w_zero_point.shape) > 1:
-      raise ValueError("Unsupported zero point: {}".format(w_zero_point))
+      if len(w_scale.shape) == 0:
+        w_scale = tf.fill([channels], w_scale)
+      elif len(w_scale.shape) > 1:
+        raise ValueError("Unsupported scale: {}".format(w_scale))
+      return w_zero_point, w_scale
 
-    if len(w_scale.shape) == 0:
-      w_scale = tf.fill([x.shape[1]], w_scale)
-    elif len(w_scale.shape) > 1:
-      raise ValueError("Unsupported scale: {}".format(w_scale))
+    def dequantize_w(w, w_zero_point, w_scale):
+      return cls._dequantize_w(w, *to_1d(w_zero_point, w_scale))
 
-    # Dequantize variables to float32
+    # Dequantize variables to float32, a constant w once
     x = cls._dequantize_tensor(x, x_zero_point, x_scale)
-    w = cls._dequantize_w(w, w_zero_point, w_scale)
+    w = cls.run_on_constants(dequantize_w, [w, w_zero_point, w_scale],
+                             ("qlinearconv_w", channels),
+                             ctx=kwargs["ctx"])
+    w_zero_point, w_scale = to_1d(w_zero_point, w_scale)
     y_zero_point = tf.cast(y_zero_point, tf.float32)
 
     new_dict = tensor_dict.copy()
@@ -67,15 +78,17 @@ class QLinearConv(ConvMixin, BackendHandler):
       B = tf.cast(B, tf.float32)
       B_scale = x_scale * w_scale
       B = tf.round(B / B_scale)
-      # Remove bias from inputs
-      node.inputs.remove(node.inputs[8])
 
-    # Remove scales and zero-points from inputs
-    for i in [7, 6, 5, 4, 2, 1]:
-      node.inputs.remove(node.inputs[i])
+    # Remove bias, scales and zero-points from inputs of a copy of the node,
+    # the node is shared by the traces of the model
+    node = copy.copy(node)
+    node.inputs = [node.inputs[0], node.inputs[3]]
 
     # Use common conv handling
-    conv_node = cls.conv(node, new_dict)[0]
+    conv_node = cls.conv(node,
+                         new_dict,
+                         device=kwargs["ctx"].device,
+                         ctx=kwargs["ctx"])[0]
 
     # Process output
     y = tf.round(conv_node / y_scale) + y_zero_point
@@ -1,5 +1,3 @@
-import copy
-
 import tensorflow as tf
 
 from onnx_tf.handlers.backend_handler import BackendHandler
@@ -32,7 +30,7 @@ class Reshape(BackendHandler):
 
     # Perform the copy wherever requested (wherever dim_size == 0)
     copied_shape = shape + indices_scattered
-    attrs = copy.deepcopy(node.attrs)
+    attrs = dict(node.attrs)
     attrs.pop("shape", None)
     return [
         cls.make_tensor_from_onnx_node(node,
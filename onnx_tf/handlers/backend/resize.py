@@ -2,7 +2,6 @@ import tensorflow as tf
 
 from onnx_tf.common import exception
 from onnx_tf.common import data_type
-from onnx_tf.common import sys_config
 from onnx_tf.common.tf_helper import tf_shape
 from onnx_tf.handlers.backend_handler import BackendHandler
 from onnx_tf.handlers.handler import onnx_op
@@ -48,27 +47,34 @@ class Resize(BackendHandler):
       tf.float32, tf.float64, tf.bfloat16
   ]
   x_cast_map = {tf.uint32: tf.int64, tf.bool: None, tf.string: None}
+  x_auto_cast_map = {
+      tf.uint64: tf.int64,
+      tf.complex64: tf.float64,
+      tf.complex128: tf.float64
+  }
   cr_x_supported_types = x_supported_types
   cr_x_supported_types.remove(tf.bfloat16)
   cr_x_cast_map = x_cast_map
   cr_x_cast_map[tf.bfloat16] = tf.float32
   roi_supported_types = [tf.float32]
   roi_cast_map = {tf.float16: tf.float32}
+  roi_auto_cast_map = {tf.float64: tf.float32}
 
   @classmethod
   def args_check(cls, node, **kwargs):
-    # update cast maps based on the auto_cast config option
-    cls.x_cast_map[tf.uint64] = tf.int64 if sys_config.auto_cast else None
-    cls.x_cast_map[tf.complex64] = tf.float64 if sys_config.auto_cast else None
-    cls.x_cast_map[tf.complex128] = tf.float64 if sys_config.auto_cast else None
-    cls.roi_cast_map[tf.float64] = tf.float32 if sys_config.auto_cast else None
+    cr_x_cast_map = cls.get_cast_map(cls.cr_x_cast_map, cls.x_auto_cast_map,
+                                     **kwargs)
+    x_cast_map = cls.get_cast_map(cls.x_cast_map, cls.x_auto_cast_map,
+                                  **kwargs)
+    roi_cast_map = cls.get_cast_map(cls.roi_cast_map, cls.roi_auto_cast_map,
+                                    **kwargs)
 
     x = kwargs["tensor_dict"][node.inputs[0]]
     x_shape = x.get_shape().as_list()
     x_dtype = x.dtype
     if len(x_shape) != 4:
       exception.OP_UNSUPPORTED_EXCEPT("Resize required 4D input", "Tensorflow")
-    if x_dtype in cls.x_cast_map and cls.x_cast_map[x_dtype] is None:
+    if x_dtype in x_cast_map and x_cast_map[x_dtype] is None:
       exception.DTYPE_NOT_CAST_EXCEPT(
           "Resize input " + node.inputs[0] + " with data type '" +
           data_type.tf_to_np_str(x_dtype) + "'",
@@ -109,14 +115,14 @@ class Resize(BackendHandler):
       mode = node.attrs.get("mode", "nearest")
       nearest_mode = node.attrs.get("nearest_mode", "round_prefer_floor")
       if coordinate_transformation_mode == "tf_crop_and_resize":
-        if x_dtype in cls.cr_x_cast_map and cls.cr_x_cast_map[x_dtype] is None:
+        if x_dtype in cr_x_cast_map and cr_x_cast_map[x_dtype] is None:
           exception.DTYPE_NOT_CAST_EXCEPT(
               "Resize input " + node.inputs[0] + " with data type '" +
               data_type.tf_to_np_str(x_dtype) + "'",
               data_type.tf_to_np_str_list(cls.cr_x_supported_types))
         roi = kwargs["tensor_dict"][node.inputs[1]]
         roi_dtype = roi.dtype
-        if roi_dtype in cls.roi_cast_map and cls.roi_cast_map[roi_dtype] is None:
+        if roi_dtype in roi_cast_map and roi_cast_map[roi_dtype] is None:
           exception.DTYPE_NOT_CAST_EXCEPT(
               "Resize input " + node.inputs[1] + " with data type '" +
               data_type.tf_to_np_str(roi_dtype) + "'",
@@ -158,6 +164,8 @@ class Resize(BackendHandler):
 
   @classmethod
   def version_10(cls, node, **kwargs):
+    x_cast_map = cls.get_cast_map(cls.x_cast_map, cls.x_auto_cast_map,
+                                  **kwargs)
     # x, roi and scales are all in NCHW format
     x = kwargs["tensor_dict"][node.inputs[0]]
     x_shape = tf_shape(x)
@@ -177,7 +185,7 @@ class Resize(BackendHandler):
       mode = tf.image.ResizeMethod.NEAREST_NEIGHBOR
 
     # process tf.image.resize unsupported datatype for x
-    x = tf.cast(x, cls.x_cast_map[x_dtype]) if x_dtype in cls.x_cast_map else x
+    x = tf.cast(x, x_cast_map[x_dtype]) if x_dtype in x_cast_map else x
 
     # The input image is in NCHW format. But tf.image.resize only
     # support channel last data format. Therefore need to transpose
@@ -193,6 +201,10 @@ class Resize(BackendHandler):
 
   @classmethod
   def version_11(cls, node, **kwargs):
+    x_cast_map = cls.get_cast_map(cls.x_cast_map, cls.x_auto_cast_map,
+                                  **kwargs)
+    roi_cast_map = cls.get_cast_map(cls.roi_cast_map, cls.roi_auto_cast_map,
+                                    **kwargs)
     # x, roi, scales and sizes are all in NCHW format
     tensor_dict = kwargs["tensor_dict"]
     x = tensor_dict[node.inputs[0]]
@@ -233,7 +245,7 @@ class Resize(BackendHandler):
     new_size.set_shape([2])
 
     # process tf.image.resize and tf.image.crop_and_resize unsupported datatype for x
-    x = tf.cast(x, cls.x_cast_map[x_dtype]) if x_dtype in cls.x_cast_map else x
+    x = tf.cast(x, x_cast_map[x_dtype]) if x_dtype in x_cast_map else x
 
     # The input image is in NCHW format. But tf.image.crop_and_resize,
     # tf.image.resize and tf.compat.v1.image.resize_xx only support
@@ -245,7 +257,7 @@ class Resize(BackendHandler):
       # process tf.image.crop_and_resize unsupported datatype for boxes(roi in onnx resize)
       roi = tf.cast(
           roi,
-          cls.roi_cast_map[roi_dtype]) if roi_dtype in cls.roi_cast_map else roi
+          roi_cast_map[roi_dtype]) if roi_dtype in roi_cast_map else roi
       # get boxes for crop
       indices = []
       x_rank = len(x.get_shape())
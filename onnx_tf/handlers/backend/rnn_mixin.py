@@ -25,15 +25,23 @@ class RNNMixin(object):
       "thresholded_relu": tf.keras.layers.ThresholdedReLU,
   }
 
-  rnn_cell = None
-
   @classmethod
-  def rnn(cls, x, cell_class, cell_kwargs, rnn_kwargs, activations, direction):
+  def rnn(cls,
+          x,
+          cell_class,
+          cell_kwargs,
+          rnn_kwargs,
+          activations,
+          direction,
+          rnn_cells=None):
     cell_kwargs["activation"] = activations[0]
 
-    if cls.rnn_cell is None:
-      cls.rnn_cell = [cell_class(**cell_kwargs)]
-    rnn_cell = cls.rnn_cell
+    # the forward cell is created once per model, in rnn_cells of its
+    # conversion context, and reused when the model is traced again
+    rnn_cells = {} if rnn_cells is None else rnn_cells
+    if cls.__name__ not in rnn_cells:
+      rnn_cells[cls.__name__] = [cell_class(**cell_kwargs)]
+    rnn_cell = rnn_cells[cls.__name__]
     cell_fw = tf.compat.v1.nn.rnn_cell.MultiRNNCell(rnn_cell)
 
     if direction == "bidirectional":
@@ -16,7 +16,8 @@ class Scan(ScanMixin, BackendHandler):
 
   @classmethod
   def _common(cls, node, **kwargs):
-    return cls.scan(node, kwargs["tensor_dict"], kwargs.get("strict", True))
+    return cls.scan(node, kwargs["tensor_dict"], kwargs.get("strict", True),
+                    kwargs["ctx"])
 
   @classmethod
   def version_8(cls, node, **kwargs):
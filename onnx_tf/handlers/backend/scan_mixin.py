@@ -8,7 +8,7 @@ class ScanMixin(object):
 
   @classmethod
   @tf.autograph.experimental.do_not_convert()
-  def scan(cls, node, input_dict, strict):
+  def scan(cls, node, input_dict, strict, ctx=None):
     current_opset = [make_opsetid(cls.DOMAIN, cls.VERSION)]
 
     body = node.attrs["body"]
@@ -41,7 +41,8 @@ class ScanMixin(object):
           subgraph=body,
           tensor_dict=input_values,
           opset=current_opset,
-          strict=strict)
+          strict=strict,
+          ctx=ctx)
       # return sequence of tensors for every subgraph output
       outputs = [input_values[output.name] for output in body.output]
       return outputs
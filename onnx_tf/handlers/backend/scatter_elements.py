@@ -2,7 +2,6 @@ import tensorflow as tf
 
 from onnx_tf.common import exception
 from onnx_tf.common import data_type
-from onnx_tf.common import sys_config
 from onnx_tf.common.tf_helper import tf_shape
 from onnx_tf.handlers.backend_handler import BackendHandler
 from onnx_tf.handlers.handler import onnx_op
@@ -16,16 +15,18 @@ class ScatterElements(GatherAndScatterMixin, BackendHandler):
       tf.int64, tf.bfloat16, tf.float16, tf.float32, tf.float64
   ]
   cast_map = {}
+  auto_cast_map = {
+      tf.complex64: tf.float64,
+      tf.complex128: tf.float64
+  }
 
   @classmethod
   def args_check(cls, node, **kwargs):
-    # update cast_map base on auto_cast flag
-    cls.cast_map[tf.complex64] = tf.float64 if sys_config.auto_cast else None
-    cls.cast_map[tf.complex128] = tf.float64 if sys_config.auto_cast else None
+    cast_map = cls.get_cast_map(cls.cast_map, cls.auto_cast_map, **kwargs)
 
     data = kwargs["tensor_dict"][node.inputs[0]]
     data_dtype = data.dtype
-    if data_dtype in cls.cast_map and cls.cast_map[data_dtype] is None:
+    if data_dtype in cast_map and cast_map[data_dtype] is None:
       exception.DTYPE_NOT_CAST_EXCEPT(
           "ScatterElements input " + node.inputs[0] + " and " + node.inputs[2] +
           " with data type '" + data_type.tf_to_np_str(data_dtype) + "'",
@@ -33,6 +34,7 @@ class ScatterElements(GatherAndScatterMixin, BackendHandler):
 
   @classmethod
   def _common(cls, node, **kwargs):
+    cast_map = cls.get_cast_map(cls.cast_map, cls.auto_cast_map, **kwargs)
     axis = node.attrs.get("axis", 0)
     data = kwargs["tensor_dict"][node.inputs[0]]
     indices = kwargs["tensor_dict"][node.inputs[1]]
@@ -91,13 +93,13 @@ class ScatterElements(GatherAndScatterMixin, BackendHandler):
       # process tf.tensor_scatter_nd_update unsupported datatype for data and updates
       data = tf.cast(
           data,
-          cls.cast_map[data_dtype]) if data_dtype in cls.cast_map else data
+          cast_map[data_dtype]) if data_dtype in cast_map else data
       updates = tf.cast(
           updates,
-          cls.cast_map[data_dtype]) if data_dtype in cls.cast_map else updates
+          cast_map[data_dtype]) if data_dtype in cast_map else updates
       output = tf.tensor_scatter_nd_update(data, indices, updates)
       return [
-          tf.cast(output, data_dtype) if data_dtype in cls.cast_map else output
+          tf.cast(output, data_dtype) if data_dtype in cast_map else output
       ]
 
   @classmethod
@@ -1,5 +1,3 @@
-import copy
-
 import tensorflow as tf
 
 from onnx_tf.common import get_data_format
@@ -21,7 +19,7 @@ class SpaceToDepth(BackendHandler):
     x = kwargs["tensor_dict"][node.inputs[0]]
     x_rank = len(x.get_shape())
     storage_format, compute_format = get_data_format(x_rank)
-    attrs = copy.deepcopy(node.attrs)
+    attrs = dict(node.attrs)
     attrs["data_format"] = storage_format
     return [
         cls.make_tensor_from_onnx_node(
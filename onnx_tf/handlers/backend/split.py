@@ -1,5 +1,3 @@
-import copy
-
 import tensorflow as tf
 
 from onnx_tf.handlers.backend_handler import BackendHandler
@@ -28,7 +26,7 @@ class Split(BackendHandler):
     tensor_dict = kwargs["tensor_dict"]
     x = tensor_dict[node.inputs[0]]
     x_shape = tf_shape(x)
-    attrs = copy.deepcopy(node.attrs)
+    attrs = dict(node.attrs)
     axis = attrs.get("axis", 0)
     axis = axis if axis >= 0 else len(x.get_shape()) + axis
     if "split" in node.attrs:
@@ -4,6 +4,9 @@ import tensorflow as tf
 from onnx_tf.handlers.backend_handler import BackendHandler
 from onnx_tf.handlers.handler import onnx_op
 
+# Number of buckets of the fingerprints string tokens are encoded with
+_STRING_HASH_BUCKETS = 2**63 - 1
+
 
 @onnx_op("TfIdfVectorizer")
 class TfIdfVectorizer(BackendHandler):
@@ -16,73 +19,112 @@ class TfIdfVectorizer(BackendHandler):
       )
 
   @classmethod
-  def _prepare_ngrams(cls, x, n, skip):
-    # This method transform input into n-grams for a specific skip
-    # input x is a 1D tensor
-    # ex1: x=[1,2,3,4] n=1 skip=0 output=[[1],[2],[3],[4]]
-    # ex2: x=[1,2,3,4] n=2 skip=0 output=[[1,2],[2,3],[3,4]]
-    # ex3: x=[1,2,3,4] n=2 skip=1 output=[[1,3],[2,4]]
-    count = x.shape[0] - n + 1 - skip
-    multiplier = skip + 1
-    ngrams = [x[i * multiplier:i * multiplier + count] for i in range(n)]
-    ngrams = tf.stack(ngrams)
-    ngrams = tf.transpose(ngrams, [1, 0])
-    return ngrams
+  def _encode_tokens(cls, tokens):
+    # Encode string tokens as int64 fingerprints, so that the tokens of the
+    # input and of the pool can be matched by a sorted search
+    if tokens.dtype == tf.string:
+      return tf.strings.to_hash_bucket_fast(tokens, _STRING_HASH_BUCKETS)
+    return tf.cast(tokens, tf.int64)
+
+  @classmethod
+  def _prepare_pool(cls, pool, ngram_counts, ngram_indexes, min_gram_len,
+                    max_gram_len):
+    # This method splits the pool into the ngrams of each length and builds
+    # the sorted tables the ngrams of the input are matched against.
+    # The tokens of the pool are numbered by their rank in the sorted
+    # vocabulary of the pool. An ngram is then matched one token at a time:
+    # the code of its prefix of k + 1 tokens is the rank of
+    # code(prefix of k tokens) * vocabulary size + rank(token k + 1)
+    # among the prefixes of k + 1 tokens of the pool, which keeps the
+    # codes exact and small whatever the ngram length.
+    # ex: pool=[2,3,5,4,5,6,7,8,6,7] ngram_counts=[0,4]
+    #     vocabulary=[2,3,4,5,6,7,8]
+    #     1-grams: tables=[[0,1,3,2]] (ranks of 2,3,5,4)
+    #     2-grams: tables=[[3,4,5],[0*7+4,1*7+5,2*7+6]] (5,6 6,7 7,8)
+    with tf.init_scope():
+      pool = cls._encode_tokens(tf.constant(pool)).numpy()
+    vocabulary = np.unique(pool)
+    ranks = np.searchsorted(vocabulary, pool)
+    starts = list(ngram_counts) + [len(pool)]
+    ngrams = []
+    offset = 0
+    for i in range(len(ngram_counts)):
+      gram_len = i + 1
+      entries = np.reshape(ranks[starts[i]:starts[i + 1]], [-1, gram_len])
+      indexes = ngram_indexes[offset:offset + len(entries)]
+      offset += len(entries)
+      if (gram_len < min_gram_len or gram_len > max_gram_len or
+          len(entries) == 0):
+        continue
+      tables = []
+      codes = np.zeros(len(entries), np.int64)
+      for k in range(gram_len):
+        keys = codes * len(vocabulary) + entries[:, k]
+        table, codes = np.unique(keys, return_inverse=True)
+        tables.append(table)
+      # ngrams listed more than once in the pool count for their first index
+      _, first = np.unique(codes, return_index=True)
+      ngrams.append((gram_len, tables, np.asarray(indexes)[first]))
+    return vocabulary, ngrams
 
   @classmethod
-  def _calc_ngram_skip(cls, x, pool, n, skip=0):
-    # This method calculates ngram counts for specific n and skip
-
-    # Make pool into an array of ngrams
-    pool = np.reshape(pool, (int(len(pool) / n), n))
-
-    # Make input as an array of ngrams
-    new_x = cls._prepare_ngrams(x, n, skip)
-
-    # Loop through the ngram targets in the pool
-    tensor_list = []
-    for i in range(len(pool)):
-      # There is a pending issue in running tf.map_fn with strings
-      # on GPU, https://github.com/tensorflow/tensorflow/issues/28007
-      # So this is a temporary solution to ensure tf.map_fn
-      # runs on CPU. Later can be removed once Tensorflow has the
-      # issue resolved.
-      with tf.device("/cpu:0"):
-        ngram_count = tf.map_fn(lambda in_x: tf.where(
-            tf.reduce_all(
-                tf.equal(in_x, tf.constant(pool[i], dtype=new_x.dtype))),
-            tf.constant([1]), tf.constant([0])),
-                                new_x,
-                                dtype=tf.int32)
-      ngram_count = tf.math.count_nonzero(ngram_count, dtype=tf.int32)
-      ngram_count = tf.reshape(ngram_count, [1])
-      tensor_list.append(ngram_count)
-
-    return tf.concat(tensor_list, 0)
+  def _search(cls, table, keys):
+    # Return the rank of each key in the sorted table and whether it is found
+    flat_keys = tf.reshape(keys, [-1])
+    pos = tf.searchsorted(table, flat_keys, out_type=tf.int64)
+    pos = tf.minimum(pos, len(table) - 1)
+    found = tf.equal(tf.gather(table, pos), flat_keys)
+    return tf.reshape(pos, tf.shape(keys)), tf.reshape(found, tf.shape(keys))
 
   @classmethod
-  def _calc_ngram(cls, x, pool, n, max_skip):
-    # This method calculates ngram counts for a specific n and
-    # all allowable skips
+  def _count_ngrams(cls, ranks, known, vocabulary_size, gram_len, tables,
+                    indexes, max_skip, size):
+    # This method counts the ngrams of one length for all allowable skips
+    # and all rows of the input at once.
+    # ranks and known are [batch, length] tensors of the vocabulary ranks of
+    # the input tokens and whether they are in the vocabulary at all.
 
     # For 1gram, skip is not in use. Not clearly described in ONNX
     # spec, this code logic is based on observation of ONNX examples,
     # tf_batch_uniandbigrams_skip5 and tf_uniandbigrams_skip5,
     # where the 1-gram results [0, 3, 0, 0] and [0, 3, 1, 0]
     # are not the accumulated counts from multiple skips.
-    if n == 1:
-      return cls._calc_ngram_skip(x, pool, n)
-
-    # Loop through maximum allowable skip count and sum up the results
-    result = tf.zeros([int(len(pool) / n)], dtype=tf.int32)
-    max_allowable_skip = np.minimum(max_skip,
-                                    int((int(x.shape[0]) - 1) / (n - 1) - 1))
-
-    for skip in range(max_allowable_skip + 1):
-      # For each skip calculate the ngram counts
-      result += cls._calc_ngram_skip(x, pool, n, skip)
-
-    return result
+    num_skips = 1 if gram_len == 1 else max_skip + 1
+
+    # Positions of the tokens of the ngram starting at every position for
+    # every skip, as a [skips * length, gram_len] tensor
+    # ex: length=4 n=2 skips 0 and 1 positions=[[0,1],[1,2],[2,3],[3,4],
+    #                                           [0,2],[1,3],[2,4],[3,5]]
+    length = tf.shape(ranks, out_type=tf.int64)[1]
+    starts = tf.range(length)[tf.newaxis, :, tf.newaxis]
+    steps = tf.range(1, num_skips + 1, dtype=tf.int64)[:, tf.newaxis,
+                                                       tf.newaxis]
+    offsets = tf.range(gram_len, dtype=tf.int64)[tf.newaxis, tf.newaxis, :]
+    positions = tf.reshape(starts + steps * offsets, [-1, gram_len])
+    in_range = positions[:, -1] < length
+    positions = tf.minimum(positions, length - 1)
+
+    # [batch, skips * length, gram_len] ranks of the ngram tokens
+    ngram_ranks = tf.gather(ranks, positions, axis=1)
+    valid = tf.logical_and(
+        tf.reduce_all(tf.gather(known, positions, axis=1), axis=-1),
+        in_range[tf.newaxis])
+
+    codes = tf.zeros_like(ngram_ranks[..., 0])
+    for k, table in enumerate(tables):
+      keys = codes * vocabulary_size + ngram_ranks[..., k]
+      codes, found = cls._search(tf.constant(table), keys)
+      valid = tf.logical_and(valid, found)
+
+    # Count the matched ngrams of each row at their output index
+    outputs = tf.gather(tf.constant(indexes, tf.int64), codes)
+    rows = tf.range(tf.shape(outputs, out_type=tf.int64)[0])[:, tf.newaxis]
+    bins = tf.boolean_mask(rows * size + outputs, valid)
+    batch_size = tf.shape(ranks)[0]
+    counts = tf.math.bincount(tf.cast(bins, tf.int32),
+                              minlength=batch_size * size,
+                              maxlength=batch_size * size)
+    return tf.reshape(counts, [batch_size, size])
 
   @classmethod
   def version_9(cls, node, **kwargs):
@@ -97,35 +139,23 @@ class TfIdfVectorizer(BackendHandler):
     pool_strings = node.attrs.get("pool_strings")
     weights = node.attrs.get("weights", np.ones(len(ngram_indexes)))
 
-    def process_ngram(input_t):
-      # This is the main method that processes and produces ngram counts
-      # for one row of inputs regardless of the operator input dimension.
-      size = len(ngram_indexes)
-      new_ngram_counts = np.append(ngram_counts, size)
-      result_ngram = np.zeros(size)
-      for i in range(len(new_ngram_counts) - 1):
-        gram_len = i + 1
-        count = new_ngram_counts[i + 1] - new_ngram_counts[i]
-        total_len = count * gram_len
-        if gram_len >= min_gram_len and gram_len <= max_gram_len:
-          idx = ngram_indexes[new_ngram_counts[i]:new_ngram_counts[i + 1]]
-          process_pool = pool_int64s[
-              new_ngram_counts[i]:new_ngram_counts[i] +
-              total_len] if pool_int64s is not None else pool_strings[
-                  new_ngram_counts[i]:new_ngram_counts[i] + total_len]
-          result = cls._calc_ngram(input_t, process_pool, gram_len,
-                                   max_skip_count)
-          idx = tf.constant(idx, shape=[len(idx), 1])
-          result_ngram = result_ngram + tf.scatter_nd(idx, result, [size])
-      return result_ngram
-
-    # The input can be either 1d or 2d. Need to loop through
-    # each element for 2d inputs
-    n = len(input_tensor.shape)
-    final_out = [
-        process_ngram(input_tensor[i]) for i in range(input_tensor.shape[0])
-    ] if n > 1 else process_ngram(input_tensor)
-    tf_out = tf.cast(final_out, tf.float32)
+    pool = pool_int64s if pool_int64s is not None else pool_strings
+    vocabulary, ngrams = cls._prepare_pool(pool, ngram_counts, ngram_indexes,
+                                           min_gram_len, max_gram_len)
+    size = len(ngram_indexes)
+
+    # The input can be either 1d or 2d. A 1d input is processed as a
+    # single row
+    rank = len(input_tensor.shape)
+    x = input_tensor if rank > 1 else tf.expand_dims(input_tensor, 0)
+    result = tf.zeros([tf.shape(x)[0], size], tf.int32)
+    if ngrams:
+      ranks, known = cls._search(tf.constant(vocabulary),
+                                 cls._encode_tokens(x))
+    for gram_len, tables, indexes in ngrams:
+      result += cls._count_ngrams(ranks, known, len(vocabulary), gram_len,
+                                  tables, indexes, max_skip_count, size)
+    tf_out = tf.cast(result if rank > 1 else result[0], tf.float32)
 
     # Apply the mode based of the TF output
     if mode == 'IDF':
@@ -1,5 +1,3 @@
-import copy
-
 import tensorflow as tf
 
 from onnx_tf.handlers.backend_handler import BackendHandler
@@ -13,7 +11,7 @@ class Unsqueeze(BackendHandler):
 
   @classmethod
   def _common(cls, node, **kwargs):
-    attrs = copy.deepcopy(node.attrs)
+    attrs = dict(node.attrs)
     axes = attrs.pop("axes")
     if len(axes) != 1:
       x = kwargs["tensor_dict"][node.inputs[0]]
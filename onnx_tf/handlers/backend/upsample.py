@@ -33,7 +33,7 @@ class Upsample(BackendHandler):
   def version_7(cls, node, **kwargs):
     x = kwargs["tensor_dict"][node.inputs[0]]
     x_shape = tf_shape(x)
-    attrs = copy.deepcopy(node.attrs)
+    attrs = dict(node.attrs)
     scales = attrs["scales"]
 
     assert_n_c_scale_is_one = tf.Assert(
@@ -64,7 +64,7 @@ class Upsample(BackendHandler):
   def version_9(cls, node, **kwargs):
     x = kwargs["tensor_dict"][node.inputs[0]]
     x_shape = tf_shape(x)
-    attrs = copy.deepcopy(node.attrs)
+    attrs = dict(node.attrs)
     scales = kwargs["tensor_dict"][node.inputs[1]]
 
     assert_n_c_scale_is_one = tf.Assert(
@@ -3,8 +3,9 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
-import copy
+from collections import namedtuple
 import inspect
+import threading
 
 import tensorflow as tf
 
@@ -14,8 +15,17 @@ from onnx_tf.common import get_data_format
 from onnx_tf.common import get_perm_from_formats
 from onnx_tf.common import get_variable_name
 from onnx_tf.common import sys_config
+from onnx_tf.common.tf_helper import is_eager_tensor
+from onnx_tf.common.tf_helper import tf_transpose
 from .handler import Handler
 
+# How a handler calls a Tensorflow function: the function to call, its
+# parameter names, and the default and rename maps of the attrs processor.
+TfFuncPlan = namedtuple("TfFuncPlan", ["func", "params", "default", "rename"])
+
+_tf_func_plans = {}
+_tf_func_plans_lock = threading.Lock()
+
 
 class BackendHandler(Handler):
   """ This class is base backend handler class.
@@ -73,17 +83,9 @@ class BackendHandler(Handler):
 
   @classmethod
   def get_attrs_processor_param(cls):
-    """ Get param for attrs processor.
-
-    :return: Dict.
-    """
-    return {}
-
-  @classmethod
-  def _process_attrs(cls, attrs):
-    """ Private method for processing attrs.
-    Param for this processor got from `get_attrs_processor_param`.
-    Param is dict contains two key: `default` and `raname`.
+    """ Get param for attrs processor, which processes the attrs given to
+    Tensorflow functions.
+    Param is dict contains two key: `default` and `rename`.
     First add default value to attrs if key does not exist.
     Second rename key to new key.
 
@@ -94,20 +96,27 @@ class BackendHandler(Handler):
 
       processed_attrs = {"axis": "1", "keepdims": True}
 
-    :param attrs: Process target attrs.
-    :return: Processed attrs.
+    :return: Dict.
     """
-    param = {"rename": {}, "default": {}}
-    param.update(cls.get_attrs_processor_param())
-
-    for k, v in param["default"].items():
-      attrs.setdefault(k, v)
-
-    for k, new_k in param["rename"].items():
-      if k in attrs:
-        attrs[new_k] = attrs.pop(k)
+    return {}
 
-    return attrs
+  @classmethod
+  def get_cast_map(cls, cast_map, auto_cast_map, **kwargs):
+    """ Get the cast map of the data types not natively supported by
+    Tensorflow.
+
+    :param cast_map: Dict of data type to the type it's cast to, or None if
+      it's not supported.
+    :param auto_cast_map: Dict of data type to the type it's cast to with a
+      loss of precision. They are not supported unless auto_cast is on.
+    :param kwargs: Other args, with the conversion context in ctx.
+    :return: Dict of data type to the type it's cast to, or None.
+    """
+    auto_cast = kwargs["ctx"].auto_cast
+    cast_map = dict(cast_map)
+    cast_map.update((dtype, cast_dtype if auto_cast else None)
+                    for dtype, cast_dtype in auto_cast_map.items())
+    return cast_map
 
   @classmethod
   def make_tensor_from_onnx_node(cls,
@@ -140,7 +149,9 @@ class BackendHandler(Handler):
     if inputs is None:
       inputs = [tensor_dict.get(inp, None) for inp in node.inputs]
     if attrs is None:
-      attrs = copy.deepcopy(node.attrs)
+      # attr values are shared with node.attrs and never written, only the
+      # dict itself is, so a shallow copy is enough
+      attrs = dict(node.attrs)
     name = name or node.name
     if name != "":
       attrs["name"] = name
@@ -150,24 +161,30 @@ class BackendHandler(Handler):
           "c_first_cuda_only and c_last_only can not both be True.")
 
     if c_first_cuda_only:
-      return cls.c_first_cuda_only(tf_func, inputs, attrs)
+      ctx = kwargs.get("ctx", None)
+      return cls.c_first_cuda_only(tf_func, inputs, attrs,
+                                   ctx.device if ctx else None)
     elif c_last_only:
       return cls.c_last_only(tf_func, inputs, attrs)
 
     return cls._run_tf_func(tf_func, inputs, attrs)
 
   @classmethod
-  def c_first_cuda_only(cls, tf_func, inputs, attrs):
+  def c_first_cuda_only(cls, tf_func, inputs, attrs, device=None):
     """ Handle operator that channel first is only supported by CUDA.
     When using CPU, two transposes should be added.
 
     :param tf_func: Callable Tf function.
     :param inputs: Inputs tensor.
     :param attrs: Attributes.
+    :param device: CUDA or CPU, default is sys_config.device.
     :return: Tensor.
     """
-    if sys_config.device == 'CPU':
-      return cls._tuck_transpose(tf_func, inputs, attrs)
+    device = device or sys_config.device
+    if device == 'CPU':
+      return cls._tuck_transpose(
+          tf_func, inputs, attrs,
+          get_data_format(len(inputs[0].get_shape()), device))
     return cls._run_tf_func(tf_func, inputs, attrs)
 
   @classmethod
@@ -195,43 +212,99 @@ class BackendHandler(Handler):
     post_perm = get_perm_from_formats(data_format[1], data_format[0])
     attrs["data_format"] = data_format[1]
     if pre_perm != list(range(x_rank)):
-      x_t = tf.transpose(x, perm=pre_perm)
+      x_t = tf_transpose(x, perm=pre_perm)
       y = cls._run_tf_func(tf_func, [x_t] + inputs[1:], attrs)
       y_t = tf.transpose(y, perm=post_perm)
       return y_t
     return cls._run_tf_func(tf_func, inputs, attrs)
 
+  @classmethod
+  def run_on_constants(cls, func, inputs, key, ctx=None):
+    """ Run a function of tensors, once and out of the traced function when
+    they are all constants of the model, like initializers.
+
+    The result is kept in ctx and reused when the model is traced again, so
+    transforms of constant weights are not part of the executed graph.
+
+    :param func: Callable of the input tensors returning a tensor or a list of
+      tensors.
+    :param inputs: List of input tensors.
+    :param key: Hashable naming the transform and its parameters, the result
+      is kept by key and the inputs.
+    :param ctx: ConversionContext of the model. Default is None, which means
+      func is always run in the traced function.
+    :return: The result of func.
+    """
+    if ctx is None or not all(is_eager_tensor(x) for x in inputs):
+      return func(*inputs)
+    constant_key = (key,) + tuple(x.ref() for x in inputs)
+    result = ctx.constants.get(constant_key, None)
+    if result is None:
+      with tf.init_scope():
+        result = func(*inputs)
+      ctx.constants[constant_key] = result
+    return result
+
+  @classmethod
+  def _get_tf_func_plan(cls, tf_func):
+    """ Get the plan to call a Tensorflow function from this handler.
+    It's computed once per handler and function, as the signature of the
+    function and get_attrs_processor_param don't change.
+
+    :param tf_func: Tensorflow function.
+    :return: TfFuncPlan.
+    """
+    key = (cls, tf_func)
+    plan = _tf_func_plans.get(key)
+    if plan is not None:
+      return plan
+
+    func = tf_func
+    if IS_PYTHON3:
+      params = list(inspect.signature(func).parameters.keys())
+    else:
+      # use closure to get args for function using decorator
+      if func.__closure__ is not None:
+        while "__wrapped__" in func.func_dict:
+          func = func.func_dict["__wrapped__"]
+      params = inspect.getargspec(func).args
+
+    param = {"rename": {}, "default": {}}
+    param.update(cls.get_attrs_processor_param())
+    plan = TfFuncPlan(func, tuple(params), dict(param["default"]),
+                      dict(param["rename"]))
+    with _tf_func_plans_lock:
+      return _tf_func_plans.setdefault(key, plan)
+
   @classmethod
   def _run_tf_func(cls, tf_func, inputs, attrs):
     """ Run Tensorflow function.
     Use only acceptable attributes of function from attrs.
+    attrs is not modified.
 
     :param tf_func: Tensorflow function.
     :param inputs: Inputs.
     :param attrs: Attributes.
     :return: Tensor.
     """
-    if IS_PYTHON3:
-      params = list(inspect.signature(tf_func).parameters.keys())
-    else:
-      # use closure to get args for function using decorator
-      if tf_func.__closure__ is not None:
-        while "__wrapped__" in tf_func.func_dict:
-          tf_func = tf_func.func_dict["__wrapped__"]
-        params = inspect.getargspec(tf_func).args
-      else:
-        params = inspect.getargspec(tf_func).args
+    plan = cls._get_tf_func_plan(tf_func)
 
-    attrs = cls._process_attrs(attrs)
+    # add the default attrs and rename them as get_attrs_processor_param
+    # gives, on a copy of attrs
+    attrs, call_attrs = dict(plan.default), attrs
+    attrs.update(call_attrs)
+    for k, new_k in plan.rename.items():
+      if k in attrs:
+        attrs[new_k] = attrs.pop(k)
 
-    if "name" in attrs.keys():
+    if "name" in attrs:
       attrs["name"] = "onnx_tf_prefix_" + attrs["name"]
 
-    attrs = {p: v for p, v in attrs.items() if p in params}
-    kwargs = dict(zip(params, inputs))
+    attrs = {p: v for p, v in attrs.items() if p in plan.params}
+    kwargs = dict(zip(plan.params, inputs))
     ambiguous_arguments = any(
         kwargs.get(p) is not None and v is not None for p, v in attrs.items())
     if ambiguous_arguments:
       raise TypeError('Ambiguous arguments for {}()'.format(tf_func.__name__))
     kwargs.update((p, v) for p, v in attrs.items() if v is not None)
-    return tf_func(**kwargs)
+    return plan.func(**kwargs)
@@ -22,6 +22,8 @@ class Handler(object):
   DOMAIN = defs.ONNX_DOMAIN
   VERSION = 0
   SINCE_VERSION = 0
+  # version_N method for SINCE_VERSION, resolved by get_all_backend_handlers
+  VERSION_HANDLE = None
   PARTIAL_SUPPORT = False
   PS_DESCRIPTION = ''
 
@@ -53,7 +55,8 @@ class Handler(object):
     :param kwargs: Other args.
     :return: TensorflowNode for backend.
     """
-    ver_handle = getattr(cls, "version_{}".format(cls.SINCE_VERSION), None)
+    ver_handle = cls.VERSION_HANDLE or getattr(
+        cls, "version_{}".format(cls.SINCE_VERSION), None)
     if ver_handle:
       cls.args_check(node, **kwargs)
       return ver_handle(node, **kwargs)
@@ -246,3 +246,164 @@ backend_partial_support = {
     'SplitToSequence': 'Scalar as the split input not supported.',
     'Upsample': 'Upsample required 4D input in Tensorflow.'
 }
+
+backend_handler_modules = {
+    '': {   'Abs': 'abs',
+            'Acos': 'acos',
+            'Acosh': 'acosh',
+            'Add': 'add',
+            'And': 'and',
+            'ArgMax': 'arg_max',
+            'ArgMin': 'arg_min',
+            'Asin': 'asin',
+            'Asinh': 'asinh',
+            'Atan': 'atan',
+            'Atanh': 'atanh',
+            'AveragePool': 'average_pool',
+            'BatchNormalization': 'batch_normalization',
+            'BitShift': 'bitshift',
+            'Cast': 'cast',
+            'Ceil': 'ceil',
+            'Celu': 'celu',
+            'Clip': 'clip',
+            'Compress': 'compress',
+            'Concat': 'concat',
+            'ConcatFromSequence': 'concat_from_sequence',
+            'Constant': 'constant',
+            'ConstantFill': 'constant_fill',
+            'ConstantOfShape': 'constant_of_shape',
+            'Conv': 'conv',
+            'ConvInteger': 'conv_integer',
+            'ConvTranspose': 'conv_transpose',
+            'Cos': 'cos',
+            'Cosh': 'cosh',
+            'CumSum': 'cumsum',
+            'DepthToSpace': 'depth_to_space',
+            'DequantizeLinear': 'dequantize_linear',
+            'Det': 'det',
+            'Div': 'div',
+            'Dropout': 'dropout',
+            'DynamicQuantizeLinear': 'dynamic_quantize_linear',
+            'Einsum': 'einsum',
+            'Elu': 'elu',
+            'Equal': 'equal',
+            'Erf': 'erf',
+            'Exp': 'exp',
+            'Expand': 'expand',
+            'EyeLike': 'eye_like',
+            'Flatten': 'flatten',
+            'Floor': 'floor',
+            'GRU': 'gru',
+            'Gather': 'gather',
+            'GatherElements': 'gather_elements',
+            'GatherND': 'gather_nd',
+            'Gemm': 'gemm',
+            'GlobalAveragePool': 'global_average_pool',
+            'GlobalLpPool': 'global_lp_pool',
+            'GlobalMaxPool': 'global_max_pool',
+            'Greater': 'greater',
+            'GreaterOrEqual': 'greater_or_equal',
+            'HardSigmoid': 'hard_sigmoid',
+            'Hardmax': 'hardmax',
+            'Identity': 'identity',
+            'If': 'if',
+            'ImageScaler': 'image_scaler',
+            'InstanceNormalization': 'instance_normalization',
+            'IsInf': 'is_inf',
+            'IsNaN': 'is_nan',
+            'LRN': 'lrn',
+            'LSTM': 'lstm',
+            'LeakyRelu': 'leaky_relu',
+            'Less': 'less',
+            'LessOrEqual': 'less_or_equal',
+            'Log': 'log',
+            'LogSoftmax': 'log_softmax',
+            'Loop': 'loop',
+            'LpNormalization': 'lp_normalization',
+            'LpPool': 'lp_pool',
+            'MatMul': 'mat_mul',
+            'MatMulInteger': 'mat_mul_integer',
+            'Max': 'max',
+            'MaxPool': 'max_pool',
+            'MaxUnpool': 'max_unpool',
+            'Mean': 'mean',
+            'MeanVarianceNormalization': 'mean_variance_normalization',
+            'Min': 'min',
+            'Mod': 'mod',
+            'Mul': 'mul',
+            'Neg': 'neg',
+            'NonMaxSuppression': 'non_max_suppression',
+            'NonZero': 'non_zero',
+            'Not': 'not',
+            'OneHot': 'onehot',
+            'Or': 'or',
+            'PRelu': 'p_relu',
+            'Pad': 'pad',
+            'Pow': 'pow',
+            'QLinearConv': 'q_linear_conv',
+            'QLinearMatMul': 'q_linear_mat_mul',
+            'QuantizeLinear': 'quantize_linear',
+            'RNN': 'rnn',
+            'RandomNormal': 'random_normal',
+            'RandomNormalLike': 'random_normal_like',
+            'RandomUniform': 'random_uniform',
+            'RandomUniformLike': 'random_uniform_like',
+            'Range': 'range',
+            'Reciprocal': 'reciprocal',
+            'ReduceL1': 'reduce_l1',
+            'ReduceL2': 'reduce_l2',
+            'ReduceLogSum': 'reduce_log_sum',
+            'ReduceLogSumExp': 'reduce_log_sum_exp',
+            'ReduceMax': 'reduce_max',
+            'ReduceMean': 'reduce_mean',
+            'ReduceMin': 'reduce_min',
+            'ReduceProd': 'reduce_prod',
+            'ReduceSum': 'reduce_sum',
+            'ReduceSumSquare': 'reduce_sum_square',
+            'Relu': 'relu',
+            'Reshape': 'reshape',
+            'Resize': 'resize',
+            'ReverseSequence': 'reverse_sequence',
+            'RoiAlign': 'roi_align',
+            'Round': 'round',
+            'Scan': 'scan',
+            'Scatter': 'scatter',
+            'ScatterElements': 'scatter_elements',
+            'ScatterND': 'scatter_nd',
+            'Selu': 'selu',
+            'SequenceAt': 'sequence_at',
+            'SequenceConstruct': 'sequence_construct',
+            'SequenceEmpty': 'sequence_empty',
+            'SequenceErase': 'sequence_erase',
+            'SequenceInsert': 'sequence_insert',
+            'SequenceLength': 'sequence_length',
+            'Shape': 'shape',
+            'Shrink': 'shrink',
+            'Sigmoid': 'sigmoid',
+            'Sign': 'sign',
+            'Sin': 'sin',
+            'Sinh': 'sinh',
+            'Size': 'size',
+            'Slice': 'slice',
+            'Softmax': 'softmax',
+            'Softplus': 'softplus',
+            'Softsign': 'softsign',
+            'SpaceToDepth': 'space_to_depth',
+            'Split': 'split',
+            'SplitToSequence': 'split_to_sequence',
+            'Sqrt': 'sqrt',
+            'Squeeze': 'squeeze',
+            'Sub': 'sub',
+            'Sum': 'sum',
+            'Tan': 'tan',
+            'Tanh': 'tanh',
+            'TfIdfVectorizer': 'tfidf_vectorizer',
+            'ThresholdedRelu': 'thresholded_relu',
+            'Tile': 'tile',
+            'TopK': 'top_k',
+            'Transpose': 'transpose',
+            'Unsqueeze': 'unsqueeze',
+            'Upsample': 'upsample',
+            'Where': 'where',
+            'Xor': 'xor'}
+}
@@ -190,6 +190,9 @@ class OnnxNode(object):
   more convenient to work with from Python.
   """
 
+  __slots__ = ("name", "op_type", "domain", "attrs", "inputs", "outputs",
+               "node_proto")
+
   def __init__(self, node):
     self.name = str(node.name)
     self.op_type = str(node.op_type)
@@ -3,20 +3,39 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import os
 import unittest
 import shutil
+import tempfile
+import threading
+import time
 
 import tensorflow as tf
 import numpy as np
 import onnx
+from onnx_tf.backend import fold_batch_norm
+from onnx_tf.backend import fold_constants
 from onnx_tf.backend import prepare
+from onnx_tf.backend import prepare_many
+from onnx_tf.backend_tf_module import BackendTFModule
+from onnx_tf.batching import DynamicBatcher
+from onnx_tf.conversion_cache import ConversionCache
 from onnx import helper
+from onnx import numpy_helper
 from onnx import TensorProto
 from onnx.backend.test.case.node.lstm import LSTM_Helper
 from onnx.backend.test.case.node.gru import GRU_Helper
 from onnx.backend.test.case.node.rnn import RNN_Helper
 
+from onnx_tf.common.handler_helper import get_all_backend_handlers
+from onnx_tf.common.handler_helper import get_backend_handler_modules
 from onnx_tf.common.legacy import legacy_onnx_pre_ver
+from onnx_tf.common.tf_helper import np_aligned_copy
+from onnx_tf.common.tf_helper import tf_tensor_from_value
+from onnx_tf.handlers.backend.reshape import Reshape
+from onnx_tf.opset_version import backend_handler_modules
 
 
 class TestModel(unittest.TestCase):
@@ -251,6 +270,1025 @@ class TestModel(unittest.TestCase):
     # clean up saved model folder
     shutil.rmtree(model_path)
 
+  def test_function_cache(self):
+    node_def = helper.make_node("Add", ["a", "b"], ["Y"])
+    graph_def = helper.make_graph(
+        [node_def],
+        name="test_function_cache",
+        inputs=[
+            helper.make_tensor_value_info("a", TensorProto.FLOAT, [None, 2]),
+            helper.make_tensor_value_info("b", TensorProto.FLOAT, [None, 2])
+        ],
+        outputs=[
+            helper.make_tensor_value_info("Y", TensorProto.FLOAT, [None, 2])
+        ])
+    tf_rep = prepare(
+        helper.make_model(graph_def,
+                          opset_imports=[helper.make_opsetid("", 11)]))
+    tf_rep.function_cache_size = 2
+
+    # inputs compatible with the signatures share one trace
+    for batch_size in [3, 1, 3]:
+      a = np.random.randn(batch_size, 2).astype(np.float32)
+      b = np.random.randn(batch_size, 2).astype(np.float32)
+      output = tf_rep.run({"a": a, "b": b})
+      np.testing.assert_almost_equal(output.Y, np.add(a, b))
+    info = tf_rep.cache_info()
+    self.assertEqual((info.hits, info.misses, info.retraces, info.currsize),
+                     (1, 2, 1, 2))
+
+    # inputs outside of the signatures are traced for their exact shapes
+    # and the least recently used entry is evicted
+    a = np.random.randn(2, 3).astype(np.float32)
+    b = np.random.randn(2, 3).astype(np.float32)
+    output = tf_rep.run({"a": a, "b": b})
+    np.testing.assert_almost_equal(output.Y, np.add(a, b))
+    info = tf_rep.cache_info()
+    self.assertEqual((info.hits, info.misses, info.retraces, info.currsize),
+                     (1, 3, 2, 2))
+
+    tf_rep.cache_clear()
+    self.assertEqual(tf_rep.cache_info().currsize, 0)
+
+    # a cached shape runs while a new shape is traced by another thread
+    a = np.random.randn(3, 2).astype(np.float32)
+    tf_rep.run({"a": a, "b": a})
+    cache = tf_rep.function_cache
+    trace = cache._trace
+    tracing, traced = threading.Event(), threading.Event()
+    released = []
+
+    def blocking_trace(specs):
+      tracing.set()
+      # times out if the cached shape waits for the trace
+      released.append(traced.wait(5))
+      return trace(specs)
+
+    cache._trace = blocking_trace
+    c = np.random.randn(2, 3).astype(np.float32)
+    with ThreadPoolExecutor(1) as executor:
+      future = executor.submit(tf_rep.run, {"a": c, "b": c})
+      self.assertTrue(tracing.wait(10))
+      output = tf_rep.run({"a": a, "b": a})
+      np.testing.assert_almost_equal(output.Y, np.add(a, a))
+      traced.set()
+      np.testing.assert_almost_equal(future.result().Y, np.add(c, c))
+    self.assertEqual(released, [True])
+    info = tf_rep.cache_info()
+    self.assertEqual((info.hits, info.misses, info.currsize), (1, 2, 2))
+
+    # a thread waiting for the trace of its key counts a miss, and the key
+    # counts a single retrace
+    tf_rep.cache_clear()
+    tracing.clear()
+    traced.clear()
+    d = np.random.randn(4, 3).astype(np.float32)
+    with ThreadPoolExecutor(2) as executor:
+      futures = [
+          executor.submit(tf_rep.run, {"a": d, "b": d}) for _ in range(2)
+      ]
+      self.assertTrue(tracing.wait(10))
+      deadline = time.time() + 10
+      while cache.cache_info().misses < 2 and time.time() < deadline:
+        time.sleep(0.01)
+      traced.set()
+      for future in futures:
+        np.testing.assert_almost_equal(future.result().Y, np.add(d, d))
+    info = tf_rep.cache_info()
+    self.assertEqual((info.hits, info.misses, info.retraces, info.currsize),
+                     (0, 2, 1, 1))
+
+    # a trace in flight during cache_clear isn't cached nor counted
+    tracing.clear()
+    traced.clear()
+    e = np.random.randn(5, 3).astype(np.float32)
+    with ThreadPoolExecutor(1) as executor:
+      future = executor.submit(tf_rep.run, {"a": e, "b": e})
+      self.assertTrue(tracing.wait(10))
+      tf_rep.cache_clear()
+      traced.set()
+      np.testing.assert_almost_equal(future.result().Y, np.add(e, e))
+    info = tf_rep.cache_info()
+    self.assertEqual((info.hits, info.misses, info.retraces, info.currsize),
+                     (0, 0, 0, 0))
+
+  def test_run_feed_and_return_tensors(self):
+    node_def = helper.make_node("Add", ["a", "b"], ["Y"])
+    graph_def = helper.make_graph(
+        [node_def],
+        name="test_run_feed",
+        inputs=[
+            helper.make_tensor_value_info("a", TensorProto.FLOAT, [None, 4]),
+            helper.make_tensor_value_info("b", TensorProto.FLOAT, [None, 4])
+        ],
+        outputs=[
+            helper.make_tensor_value_info("Y", TensorProto.FLOAT, [None, 4])
+        ])
+    tf_rep = prepare(
+        helper.make_model(graph_def,
+                          opset_imports=[helper.make_opsetid("", 11)]))
+
+    # numpy array aligned for TensorFlow, tf.Tensor and DLPack capsule
+    buf = np.empty(8 * 4 + 64, dtype=np.uint8)
+    offset = -buf.ctypes.data % 64
+    a = buf[offset:offset + 8 * 4].view(np.float32).reshape([2, 4])
+    a[:] = np.random.randn(2, 4)
+    b = np.random.randn(2, 4).astype(np.float32)
+    for b_feed in [
+        b, tf.constant(b),
+        tf.experimental.dlpack.to_dlpack(tf.constant(b))
+    ]:
+      output = tf_rep.run({"a": a, "b": b_feed})
+      np.testing.assert_almost_equal(output.Y, np.add(a, b))
+
+    output = tf_rep.run({"a": a, "b": b}, return_tensors=True)
+    self.assertIsInstance(output.Y, tf.Tensor)
+    np.testing.assert_almost_equal(output.Y.numpy(), np.add(a, b))
+
+    # the aligned array is fed in place, the tensor sees changes to it
+    tensor = tf_tensor_from_value(a)
+    a[0, 0] += 1.
+    self.assertEqual(tensor.numpy()[0, 0], a[0, 0])
+
+    # unaligned and read-only arrays are copied
+    unaligned = np_aligned_copy(np.zeros([9], np.float32))[1:].reshape([2, 4])
+    read_only = np_aligned_copy(np.zeros([2, 4], np.float32))
+    read_only.flags.writeable = False
+    for array in [unaligned, read_only]:
+      tensor = tf_tensor_from_value(array)
+      array.flags.writeable = True
+      array[0, 0] = 1.
+      self.assertEqual(tensor.numpy()[0, 0], 0.)
+
+  def test_dynamic_batcher(self):
+    node_def = helper.make_node("MatMul", ["X", "W"], ["Y"])
+    graph_def = helper.make_graph(
+        [node_def],
+        name="test_dynamic_batcher",
+        inputs=[
+            helper.make_tensor_value_info("X", TensorProto.FLOAT, ["N", 3]),
+            helper.make_tensor_value_info("W", TensorProto.FLOAT, [3, 2])
+        ],
+        outputs=[
+            helper.make_tensor_value_info("Y", TensorProto.FLOAT, ["N", 2])
+        ],
+        initializer=[
+            helper.make_tensor("W", TensorProto.FLOAT, [3, 2],
+                               np.arange(6).astype(float))
+        ])
+    tf_rep = prepare(
+        helper.make_model(graph_def,
+                          opset_imports=[helper.make_opsetid("", 11)]))
+    w = np.arange(6).reshape([3, 2]).astype(np.float32)
+
+    with DynamicBatcher(tf_rep, max_batch_size=4,
+                        batch_timeout=0.5) as batcher:
+      self.assertEqual(batcher.input_axes, {"X": 0})
+      self.assertEqual(batcher.output_axes, [0])
+      xs = [self._get_rnd([rows, 3]) for rows in [1, 2, 1, 3]]
+      futures = [batcher.submit(x) for x in xs]
+      for x, future in zip(xs, futures):
+        np.testing.assert_almost_equal(future.result().Y,
+                                       np.matmul(x, w),
+                                       decimal=5)
+    # the first three requests fill one batch, the last one runs alone
+    self.assertEqual(tf_rep.cache_info().misses, 2)
+    self.assertEqual(tf_rep.cache_info().retraces, 1)
+
+    # the batch axis of an output without dim_param is the one of the inputs
+    node_def = helper.make_node("Relu", ["X"], ["Y"])
+    graph_def = helper.make_graph(
+        [node_def],
+        name="test_dynamic_batcher",
+        inputs=[
+            helper.make_tensor_value_info("X", TensorProto.FLOAT, [None, 4])
+        ],
+        outputs=[
+            helper.make_tensor_value_info("Y", TensorProto.FLOAT, [None, 4])
+        ])
+    tf_rep = prepare(
+        helper.make_model(graph_def,
+                          opset_imports=[helper.make_opsetid("", 11)]))
+    with DynamicBatcher(tf_rep, max_batch_size=4,
+                        batch_timeout=0.5) as batcher:
+      self.assertEqual(batcher.output_axes, [0])
+      xs = [np_aligned_copy(self._get_rnd([1, 4])) for _ in range(4)]
+      expected = [np.maximum(x, 0) for x in xs]
+      futures = [batcher.submit(x) for x in xs]
+      # the inputs are copied on submit
+      for x in xs:
+        x[...] = -1
+      for y, future in zip(expected, futures):
+        np.testing.assert_almost_equal(future.result().Y, y)
+
+  def test_run_async(self):
+    node_def = helper.make_node("Relu", ["X"], ["Y"])
+    graph_def = helper.make_graph(
+        [node_def],
+        name="test_run_async",
+        inputs=[
+            helper.make_tensor_value_info("X", TensorProto.FLOAT, ["N", 4])
+        ],
+        outputs=[
+            helper.make_tensor_value_info("Y", TensorProto.FLOAT, ["N", 4])
+        ])
+    tf_rep = prepare(
+        helper.make_model(graph_def,
+                          opset_imports=[helper.make_opsetid("", 11)]))
+    tf_rep.max_pending = 2
+    tf_rep.executor = ThreadPoolExecutor(8)
+    xs = [self._get_rnd([1, 4]) for _ in range(8)]
+
+    # record the inputs of the runs and the most runs in flight at once
+    run = tf_rep.run
+    lock = threading.Lock()
+    runs = []
+    in_flight = [0, 0]
+
+    def recording_run(inputs, **kwargs):
+      with lock:
+        runs.append(inputs)
+        in_flight[0] += 1
+        in_flight[1] = max(in_flight)
+      try:
+        time.sleep(0.05)
+        return run(inputs, **kwargs)
+      finally:
+        with lock:
+          in_flight[0] -= 1
+
+    tf_rep.run = recording_run
+
+    async def run_all(batcher):
+      rep_outputs = await asyncio.gather(*[tf_rep.run_async(x) for x in xs])
+      # no more than max_pending runs are in flight
+      self.assertEqual(in_flight[1], 2)
+      batcher_outputs = await asyncio.gather(
+          *[batcher.run_async(x) for x in xs])
+      # a cancelled request is dropped from the queue
+      task = asyncio.ensure_future(batcher.run_async(xs[0]))
+      await asyncio.sleep(0)
+      task.cancel()
+      with self.assertRaises(asyncio.CancelledError):
+        await task
+      output = await batcher.run_async(xs[1])
+      np.testing.assert_almost_equal(output.Y, np.maximum(xs[1], 0))
+      self.assertEqual(runs[-1]["X"].shape[0], 1)
+      return rep_outputs, batcher_outputs
+
+    loop = asyncio.new_event_loop()
+    try:
+      with DynamicBatcher(tf_rep, max_batch_size=8, batch_timeout=1.,
+                          max_pending=8) as batcher:
+        rep_outputs, batcher_outputs = loop.run_until_complete(
+            run_all(batcher))
+    finally:
+      loop.close()
+      tf_rep.executor.shutdown()
+    for x, rep_output, batcher_output in zip(xs, rep_outputs,
+                                             batcher_outputs):
+      np.testing.assert_almost_equal(rep_output.Y, np.maximum(x, 0))
+      np.testing.assert_almost_equal(batcher_output.Y, np.maximum(x, 0))
+
+  def test_handlers_per_opset(self):
+    handlers_11 = get_all_backend_handlers({"": 11})
+    handlers_13 = get_all_backend_handlers({"": 13})
+    self.assertIs(handlers_13, get_all_backend_handlers({"": 13}))
+    self.assertEqual(handlers_11[""]["Reshape"].SINCE_VERSION, 5)
+    self.assertEqual(handlers_13[""]["Reshape"].SINCE_VERSION, 13)
+    self.assertTrue(issubclass(handlers_13[""]["Reshape"], Reshape))
+    self.assertEqual(Reshape.SINCE_VERSION, 0)
+    with self.assertRaises(TypeError):
+      handlers_13[""]["Reshape"] = Reshape
+
+  def test_backend_handler_modules(self):
+    # regenerate with gen_opset.py when handlers are added or moved
+    self.assertEqual(backend_handler_modules, get_backend_handler_modules())
+
+  def test_prepare_many(self):
+    node_def = helper.make_node("Equal", ["a", "b"], ["Y"])
+    graph_def = helper.make_graph(
+        [node_def],
+        name="test_prepare_many",
+        inputs=[
+            helper.make_tensor_value_info("a", TensorProto.UINT64, [None]),
+            helper.make_tensor_value_info("b", TensorProto.UINT64, [None])
+        ],
+        outputs=[helper.make_tensor_value_info("Y", TensorProto.BOOL, [None])])
+    model = helper.make_model(graph_def,
+                              opset_imports=[helper.make_opsetid("", 11)])
+    a = np.array([1, 2, 3], dtype=np.uint64)
+    b = np.array([1, 0, 3], dtype=np.uint64)
+
+    tf_reps = prepare_many([model, model], max_workers=2, auto_cast=True)
+    # auto_cast of the models is not changed by preparing another one
+    no_cast_rep = prepare(model, auto_cast=False)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+      outputs = list(
+          executor.map(lambda tf_rep: tf_rep.run({
+              "a": a,
+              "b": b
+          }), tf_reps))
+    for output in outputs:
+      np.testing.assert_array_equal(output.Y, np.equal(a, b))
+    with self.assertRaises(RuntimeError):
+      no_cast_rep.run({"a": a, "b": b})
+
+  def test_nodes_parsed_once(self):
+    pad = helper.make_node("Pad", ["x"], ["y"], pads=[1, 1, 1, 1], value=2.0)
+    identity = helper.make_node("Identity", ["y"], ["z"])
+    graph_def = helper.make_graph(
+        [pad, identity],
+        name="test_nodes_parsed_once",
+        inputs=[helper.make_tensor_value_info("x", TensorProto.FLOAT, [2, 3])],
+        outputs=[
+            helper.make_tensor_value_info("y", TensorProto.FLOAT, [4, 5]),
+            helper.make_tensor_value_info("z", TensorProto.FLOAT, [4, 5])
+        ])
+    model = helper.make_model(graph_def,
+                              opset_imports=[helper.make_opsetid("", 2)])
+    tf_rep = prepare(model)
+    ctx = tf_rep.tf_module.ctx
+    nodes = ctx.get_nodes(model.graph)
+    self.assertIs(nodes, ctx.get_nodes(tf_rep.tf_module.graph_def))
+
+    x = np.random.rand(2, 3).astype(np.float32)
+    y_ref = np.pad(x, 1, mode="constant", constant_values=2.0)
+    # the pruned run traces the Pad node again
+    np.testing.assert_almost_equal(tf_rep.run(x).z, y_ref)
+    np.testing.assert_almost_equal(tf_rep.run(x, outputs=["y"]).y, y_ref)
+    self.assertEqual(nodes[0].attrs["pads"], [1, 1, 1, 1])
+
+  def test_tf_func_plan(self):
+    depth_to_space = get_all_backend_handlers({"": 13})[""]["DepthToSpace"]
+    plan = depth_to_space._get_tf_func_plan(tf.nn.depth_to_space)
+    self.assertIs(plan, depth_to_space._get_tf_func_plan(tf.nn.depth_to_space))
+    self.assertEqual(plan.rename, {"blocksize": "block_size"})
+
+    attrs = {"blocksize": 2, "name": "depth_to_space"}
+    x = tf.reshape(tf.range(16, dtype=tf.float32), [1, 1, 1, 16])
+    y = depth_to_space._run_tf_func(tf.nn.depth_to_space, [x], attrs)
+    self.assertEqual(y.shape, [1, 2, 2, 4])
+    self.assertEqual(attrs, {"blocksize": 2, "name": "depth_to_space"})
+
+  def test_jit_compile(self):
+    graph_def = helper.make_graph(
+        [
+            helper.make_node("Relu", ["X"], ["X1"]),
+            # the data dependent output shape of NonZero is computed by
+            # tf.where, which XLA can't compile
+            helper.make_node("NonZero", ["X1"], ["X2"], name="non_zero"),
+            helper.make_node("Cast", ["X2"], ["X3"], to=TensorProto.FLOAT),
+            helper.make_node("Tanh", ["X3"], ["Y"])
+        ],
+        name="test_jit_compile",
+        inputs=[
+            helper.make_tensor_value_info("X", TensorProto.FLOAT,
+                                          [1, 2, 5, 5])
+        ],
+        outputs=[
+            helper.make_tensor_value_info("Y", TensorProto.FLOAT,
+                                          [4, None])
+        ])
+    model = helper.make_model(graph_def,
+                              opset_imports=[helper.make_opsetid("", 11)])
+    x = self._get_rnd([1, 2, 5, 5])
+    output_ref = prepare(model).run(x)
+
+    tf_rep = prepare(model, jit_compile=True)
+    output = tf_rep.run(x)
+    np.testing.assert_almost_equal(output.Y, output_ref.Y, decimal=5)
+    self.assertEqual(list(tf_rep.tf_module.xla_blocking_nodes), ["non_zero"])
+    self.assertIn("Where", tf_rep.tf_module.xla_blocking_nodes["non_zero"])
+    # the ops of adjacent nodes are marked for the same XLA cluster
+    concrete_func = tf_rep.get_function_cache().get(tf_rep.get_input_dict(x))
+    scopes = dict(
+        (op.type, op.get_attr("_XlaScope"))
+        for op in concrete_func.graph.get_operations()
+        if op.type in ["Relu", "Cast", "Tanh"] and op.get_attr("_XlaCompile"))
+    self.assertEqual(sorted(scopes), ["Cast", "Relu", "Tanh"])
+    self.assertEqual(len(set(scopes.values())), 1)
+
+  def test_run_and_export_pruned_outputs(self):
+    relu = helper.make_node("Relu", ["X"], ["logits"])
+    exp = helper.make_node("Exp", ["logits"], ["E"])
+    add = helper.make_node("Add", ["E", "B"], ["boxes"])
+    graph_def = helper.make_graph(
+        [relu, exp, add],
+        name="test_pruned_outputs",
+        inputs=[
+            helper.make_tensor_value_info("X", TensorProto.FLOAT, [None, 4]),
+            helper.make_tensor_value_info("B", TensorProto.FLOAT, [None, 4])
+        ],
+        outputs=[
+            helper.make_tensor_value_info("logits", TensorProto.FLOAT,
+                                          [None, 4]),
+            helper.make_tensor_value_info("boxes", TensorProto.FLOAT,
+                                          [None, 4])
+        ])
+    tf_rep = prepare(
+        helper.make_model(graph_def,
+                          opset_imports=[helper.make_opsetid("", 11)]))
+    x = np.random.randn(2, 4).astype(np.float32)
+    b = np.random.randn(2, 4).astype(np.float32)
+
+    nodes, inputs = tf_rep.tf_module.prune(["logits"])
+    self.assertEqual([node.node_proto for node in nodes], [relu])
+    self.assertEqual(inputs, ["X"])
+    output = tf_rep.run({"X": x}, outputs=["logits"])
+    self.assertEqual(output._fields, ("logits",))
+    np.testing.assert_almost_equal(output.logits, np.maximum(x, 0))
+    output = tf_rep.run([x, b], outputs=["E", "boxes"])
+    np.testing.assert_almost_equal(output.E,
+                                   np.exp(np.maximum(x, 0)),
+                                   decimal=5)
+    np.testing.assert_almost_equal(output.boxes,
+                                   np.exp(np.maximum(x, 0)) + b,
+                                   decimal=5)
+    with self.assertRaises(ValueError):
+      tf_rep.run([x, b], outputs=["unknown"])
+
+    model_path = "pruned_savedmodel"
+    tf_rep.export_graph(model_path, outputs=["logits"])
+    signature = tf.saved_model.load(model_path).signatures["serving_default"]
+    self.assertEqual(list(signature.structured_input_signature[1]), ["X"])
+    tf_output = signature(X=tf.constant(x))
+    np.testing.assert_almost_equal(tf_output["output_0"], np.maximum(x, 0))
+    shutil.rmtree(model_path)
+
+  def test_warmup(self):
+    node_def = helper.make_node("Add", ["a", "b"], ["Y"])
+    graph_def = helper.make_graph(
+        [node_def],
+        name="test_warmup",
+        inputs=[
+            helper.make_tensor_value_info("a", TensorProto.FLOAT, [None, 4]),
+            helper.make_tensor_value_info("b", TensorProto.FLOAT, [1, 4])
+        ],
+        outputs=[
+            helper.make_tensor_value_info("Y", TensorProto.FLOAT, [None, 4])
+        ])
+    tf_rep = prepare(
+        helper.make_model(graph_def,
+                          opset_imports=[helper.make_opsetid("", 11)]))
+    infos = tf_rep.warmup([{"a": [2, 4], "b": [1, 4]}, [[8, 4], [1, 4]]])
+    self.assertEqual(len(infos), 2)
+    self.assertEqual(infos[1].specs["a"].shape, [8, 4])
+    self.assertGreater(infos[0].trace_time, 0)
+    self.assertEqual(len(tf_rep.warmup_specs), 2)
+    with self.assertRaises(ValueError):
+      tf_rep.warmup([{"a": [None, 4], "b": [1, 4]}])
+
+    # warmed up shapes don't trace on run
+    retraces = tf_rep.cache_info().retraces
+    a = np.random.randn(8, 4).astype(np.float32)
+    b = np.random.randn(1, 4).astype(np.float32)
+    np.testing.assert_almost_equal(tf_rep.run([a, b]).Y, np.add(a, b))
+    self.assertEqual(tf_rep.cache_info().retraces, retraces)
+
+    model_path = "warmup_savedmodel"
+    tf_rep.export_graph(model_path)
+    signatures = tf.saved_model.load(model_path).signatures
+    self.assertEqual(sorted(signatures.keys()),
+                     ["serving_default", "warmup_0", "warmup_1"])
+    self.assertEqual(
+        signatures["warmup_1"].structured_input_signature[1]["a"].shape,
+        [8, 4])
+    shutil.rmtree(model_path)
+
+  def test_conversion_cache(self):
+    node_def = helper.make_node("Relu", ["X"], ["Y"])
+    graph_def = helper.make_graph(
+        [node_def],
+        name="test_conversion_cache",
+        inputs=[
+            helper.make_tensor_value_info("X", TensorProto.FLOAT, ["N", 4])
+        ],
+        outputs=[
+            helper.make_tensor_value_info("Y", TensorProto.FLOAT, ["N", 4])
+        ])
+    model = helper.make_model(graph_def,
+                              opset_imports=[helper.make_opsetid("", 11)])
+    cache_dir = tempfile.mkdtemp()
+    x = np.random.randn(3, 4).astype(np.float32)
+
+    tf_rep = prepare(model, cache_dir=cache_dir)
+    key = ConversionCache.get_key(model,
+                                  device="CPU",
+                                  strict=True,
+                                  auto_cast=False,
+                                  jit_compile=False)
+    self.assertEqual(os.listdir(cache_dir), [key])
+    self.assertNotEqual(
+        ConversionCache.get_key(model,
+                                device="CPU",
+                                strict=False,
+                                auto_cast=False,
+                                jit_compile=False), key)
+
+    cached_rep = prepare(model, cache_dir=cache_dir)
+    self.assertNotIsInstance(cached_rep.tf_module, BackendTFModule)
+    self.assertEqual(cached_rep.inputs, ["X"])
+    self.assertEqual(cached_rep.signatures["X"].shape.as_list(), [None, 4])
+    np.testing.assert_almost_equal(cached_rep.run(x).Y, tf_rep.run(x).Y)
+
+    # a loaded rep is exported, but has no ONNX graph to trace warmups from
+    export_dir = tempfile.mkdtemp()
+    cached_rep.export_graph(export_dir)
+    exported = tf.saved_model.load(export_dir)
+    np.testing.assert_almost_equal(
+        exported.signatures["serving_default"](X=tf.constant(x))["output_0"],
+        tf_rep.run(x).Y)
+    cached_rep.warmup([{"X": [2, 4]}])
+    with self.assertRaises(RuntimeError):
+      cached_rep.export_graph(export_dir)
+    shutil.rmtree(export_dir)
+
+    # entries older than cache_max_age are evicted and converted again
+    time.sleep(0.1)
+    tf_rep = prepare(model, cache_dir=cache_dir, cache_max_age=0.05)
+    self.assertIsInstance(tf_rep.tf_module, BackendTFModule)
+    self.assertEqual(os.listdir(cache_dir), [key])
+    cache = ConversionCache(cache_dir, max_bytes=0)
+    self.assertEqual(cache.evict(), [key])
+    self.assertEqual(os.listdir(cache_dir), [])
+    shutil.rmtree(cache_dir)
+
+  def test_profile(self):
+    then_branch = helper.make_graph(
+        [helper.make_node("Relu", ["X"], ["Y_then"], name="then_relu")],
+        "then_branch", [],
+        [helper.make_tensor_value_info("Y_then", TensorProto.FLOAT, [2, 3])])
+    else_branch = helper.make_graph(
+        [helper.make_node("Neg", ["X"], ["Y_else"], name="else_neg")],
+        "else_branch", [],
+        [helper.make_tensor_value_info("Y_else", TensorProto.FLOAT, [2, 3])])
+    graph_def = helper.make_graph(
+        [
+            helper.make_node("If", ["cond"], ["Y"],
+                             name="if",
+                             then_branch=then_branch,
+                             else_branch=else_branch)
+        ],
+        name="test_profile",
+        inputs=[
+            helper.make_tensor_value_info("cond", TensorProto.BOOL, []),
+            helper.make_tensor_value_info("X", TensorProto.FLOAT, [2, 3])
+        ],
+        outputs=[helper.make_tensor_value_info("Y", TensorProto.FLOAT, [2, 3])])
+    model = helper.make_model(graph_def,
+                              opset_imports=[helper.make_opsetid("", 13)])
+    self.assertIsNone(prepare(model).profiler)
+
+    tf_rep = prepare(model, profile=True)
+    self.assertEqual(tf_rep.profiler.records, [])
+    x = self._get_rnd([2, 3])
+    np.testing.assert_almost_equal(
+        tf_rep.run({
+            "cond": np.array(True),
+            "X": x
+        }).Y, np.maximum(x, 0))
+
+    report = tf_rep.profiler.get_report(sort_by="tf_ops")
+    nodes = dict([((node["graph"], node["name"]), node)
+                  for node in report["nodes"]])
+    self.assertEqual(sorted(nodes),
+                     [("", "if"), ("if", "else_neg"), ("if", "then_relu")])
+    self.assertGreaterEqual(nodes[("if", "then_relu")]["tf_ops"], 1)
+    if_node = nodes[("", "if")]
+    self.assertGreaterEqual(
+        if_node["time"], if_node["self_time"] +
+        nodes[("if", "then_relu")]["time"] + nodes[("if", "else_neg")]["time"]
+        - 1e-6)
+    self.assertEqual([node["tf_ops"] for node in report["nodes"]],
+                     sorted([node["tf_ops"] for node in report["nodes"]],
+                            reverse=True))
+    self.assertEqual(
+        sorted(handler["handler"] for handler in report["handlers"]),
+        ["If", "Neg", "Relu"])
+    self.assertIn("if/then_relu", tf_rep.profiler.format_table())
+    with self.assertRaises(ValueError):
+      tf_rep.profiler.get_report(sort_by="name")
+
+  def test_fold_constants(self):
+    graph_def = helper.make_graph(
+        [
+            helper.make_node("Shape", ["X"], ["shape"]),
+            helper.make_node("Gather", ["shape", "zero"], ["batch"], axis=0),
+            helper.make_node("Unsqueeze", ["batch"], ["batch_1d"], axes=[0]),
+            helper.make_node("Concat", ["batch_1d", "minus_one"],
+                             ["new_shape"],
+                             axis=0),
+            helper.make_node("Reshape", ["X", "new_shape"], ["X_2d"]),
+            helper.make_node("Cast", ["W_fp16"], ["W"], to=TensorProto.FLOAT),
+            helper.make_node("Add", ["X_2d", "W"], ["X_w"]),
+            helper.make_node("RandomUniformLike", ["X_w"], ["noise"]),
+            helper.make_node("Mul", ["noise", "zero_f"], ["zero_noise"]),
+            helper.make_node("Add", ["X_w", "zero_noise"], ["Y"])
+        ],
+        name="test_fold_constants",
+        inputs=[
+            helper.make_tensor_value_info("X", TensorProto.FLOAT, [2, 3, 4])
+        ],
+        outputs=[
+            helper.make_tensor_value_info("Y", TensorProto.FLOAT, [2, 12])
+        ],
+        initializer=[
+            numpy_helper.from_array(np.array(0, np.int64), "zero"),
+            numpy_helper.from_array(np.array([-1], np.int64), "minus_one"),
+            numpy_helper.from_array(np.array(0, np.float32), "zero_f"),
+            numpy_helper.from_array(np.arange(12).astype(np.float16), "W_fp16")
+        ])
+    model = helper.make_model(graph_def,
+                              opset_imports=[helper.make_opsetid("", 11)])
+
+    folded_model, num_folded = fold_constants(model)
+    self.assertEqual(num_folded, 5)
+    self.assertEqual([node.op_type for node in folded_model.graph.node],
+                     ["Reshape", "Add", "RandomUniformLike", "Mul", "Add"])
+    self.assertEqual(
+        sorted(init.name for init in folded_model.graph.initializer),
+        ["W", "new_shape", "zero_f"])
+    self.assertEqual(len(model.graph.node), 10)
+    _, num_folded = fold_constants(model, max_bytes=32)
+    self.assertEqual(num_folded, 4)
+
+    x = self._get_rnd([2, 3, 4])
+    np.testing.assert_almost_equal(
+        prepare(model, fold_constants=True).run(x).Y,
+        x.reshape([2, 12]) + np.arange(12),
+        decimal=5)
+
+  def test_fold_batch_norm(self):
+
+    def batch_norm(name, x, y, channels):
+      initializers = [
+          numpy_helper.from_array(self._get_rnd([channels]), name + param)
+          for param in ["_scale", "_bias", "_mean"]
+      ]
+      initializers.append(
+          numpy_helper.from_array(
+              np.random.uniform(0.5, 2., [channels]).astype(np.float32),
+              name + "_var"))
+      node = helper.make_node(
+          "BatchNormalization",
+          [x] + [initializer.name for initializer in initializers], [y],
+          epsilon=1e-3)
+      return node, initializers
+
+    nodes = [
+        helper.make_node("Conv", ["X", "W1", "B1"], ["C1"],
+                         pads=[1, 1, 1, 1],
+                         group=2),
+        helper.make_node("ConvTranspose", ["N1", "W2"], ["C2"],
+                         strides=[2, 2],
+                         group=2),
+        helper.make_node("Flatten", ["N2"], ["F"]),
+        helper.make_node("Gemm", ["F", "W3", "B3"], ["G"], beta=0.5,
+                         transB=1),
+        # C4 is also a graph output, its BatchNormalization is kept
+        helper.make_node("Conv", ["X", "W4"], ["C4"])
+    ]
+    initializers = [
+        numpy_helper.from_array(self._get_rnd(shape), name)
+        for name, shape in [("W1", [4, 2, 3, 3]), ("B1", [4]), (
+            "W2", [4, 3, 2, 2]), ("W3", [5, 6 * 4 * 4]), ("B3", [5]),
+                            ("W4", [4, 4, 1, 1])]
+    ]
+    for name, x, y, channels in [("bn1", "C1", "N1", 4),
+                                 ("bn2", "C2", "N2", 6),
+                                 ("bn3", "G", "Y", 5),
+                                 ("bn4", "C4", "Y4", 4)]:
+      node, bn_initializers = batch_norm(name, x, y, channels)
+      nodes.insert(
+          [i for i, n in enumerate(nodes) if x in n.output][0] + 1, node)
+      initializers.extend(bn_initializers)
+    graph_def = helper.make_graph(
+        nodes,
+        name="test_fold_batch_norm",
+        inputs=[
+            helper.make_tensor_value_info("X", TensorProto.FLOAT,
+                                          [2, 4, 2, 2])
+        ],
+        outputs=[
+            helper.make_tensor_value_info("Y", TensorProto.FLOAT, [2, 5]),
+            helper.make_tensor_value_info("Y4", TensorProto.FLOAT,
+                                          [2, 4, 2, 2]),
+            helper.make_tensor_value_info("C4", TensorProto.FLOAT,
+                                          [2, 4, 2, 2])
+        ],
+        initializer=initializers)
+    model = helper.make_model(graph_def,
+                              opset_imports=[helper.make_opsetid("", 11)])
+
+    folded_model, num_folded = fold_batch_norm(model)
+    self.assertEqual(num_folded, 3)
+    self.assertEqual([node.op_type for node in folded_model.graph.node], [
+        "Conv", "ConvTranspose", "Flatten", "Gemm", "Conv", "BatchNormalization"
+    ])
+    # the params of the folded nodes are replaced
+    names = set(init.name for init in folded_model.graph.initializer)
+    self.assertFalse(names & {"W1", "B1", "W2", "bn1_mean", "bn3_var"})
+    self.assertTrue({"W4", "bn4_mean"} <= names)
+    self.assertEqual(len(model.graph.node), 9)
+
+    x = self._get_rnd([2, 4, 2, 2])
+    output_ref = prepare(model).run(x)
+    output = prepare(model, fold_batch_norm=True).run(x)
+    for name in ["Y", "Y4", "C4"]:
+      np.testing.assert_almost_equal(output[name], output_ref[name], decimal=4)
+
+  def test_constant_conv_weights(self):
+    w1 = self._get_rnd([4, 2, 3, 3])
+    w2 = self._get_rnd([4, 3, 2, 2])
+    nodes = [
+        helper.make_node("Conv", ["X", "W1"], ["C1"],
+                         pads=[1, 1, 1, 1],
+                         group=2),
+        helper.make_node("ConvTranspose", ["C1", "W2"], ["Y"])
+    ]
+
+    def make_model(weights_as_inputs):
+      weights = [
+          helper.make_tensor_value_info("W1", TensorProto.FLOAT, w1.shape),
+          helper.make_tensor_value_info("W2", TensorProto.FLOAT, w2.shape)
+      ]
+      graph_def = helper.make_graph(
+          nodes,
+          name="test_constant_conv_weights",
+          inputs=[
+              helper.make_tensor_value_info("X", TensorProto.FLOAT,
+                                            [None, 4, 5, 5])
+          ] + (weights if weights_as_inputs else []),
+          outputs=[
+              helper.make_tensor_value_info("Y", TensorProto.FLOAT,
+                                            [None, 3, 6, 6])
+          ],
+          initializer=[] if weights_as_inputs else [
+              numpy_helper.from_array(w1, "W1"),
+              numpy_helper.from_array(w2, "W2")
+          ])
+      return helper.make_model(graph_def,
+                               opset_imports=[helper.make_opsetid("", 11)])
+
+    x = self._get_rnd([2, 4, 5, 5])
+    tf_rep = prepare(make_model(False))
+    output = tf_rep.run(x)
+    output_ref = prepare(make_model(True)).run({"X": x, "W1": w1, "W2": w2})
+    np.testing.assert_almost_equal(output.Y, output_ref.Y, decimal=5)
+
+    # the weights are transformed once, not by each trace
+    tf_rep.run(x[:1])
+    self.assertEqual(len(tf_rep.tf_module.ctx.constants), 2)
+    graph = tf_rep.tf_module.__call__.get_concrete_function(
+        X=tf.TensorSpec([None, 4, 5, 5], tf.float32)).graph
+    # no transpose or split of a constant in the graph
+    self.assertEqual([
+        op.type
+        for op in graph.get_operations()
+        if op.type in ["Transpose", "Split"] and
+        op.inputs[0 if op.type == "Transpose" else 1].op.type == "Const"
+    ], [])
+
+  def test_grouped_conv(self):
+    # depthwise and grouped Conv and ConvTranspose nodes, compared with the
+    # same nodes with block diagonal weights and a single group
+    weights = {
+        "W1": (self._get_rnd([8, 1, 3, 3]), 8),
+        "W2": (self._get_rnd([4, 4, 1, 1]), 2),
+        "W3": (self._get_rnd([4, 1, 3, 3]), 4),
+        "W4": (self._get_rnd([4, 3, 2, 2]), 2)
+    }
+
+    def make_model(grouped, dtype):
+      nodes = [
+          helper.make_node("Conv", ["X", "W1"], ["C1"],
+                           pads=[1, 1, 1, 1],
+                           strides=[2, 2],
+                           group=8 if grouped else 1),
+          helper.make_node("Conv", ["C1", "W2"], ["C2"],
+                           group=2 if grouped else 1),
+          helper.make_node("ConvTranspose", ["C2", "W3"], ["C3"],
+                           strides=[2, 2],
+                           group=4 if grouped else 1),
+          helper.make_node("ConvTranspose", ["C3", "W4"], ["Y"],
+                           group=2 if grouped else 1)
+      ]
+      initializers = []
+      for name, (w, group) in weights.items():
+        if not grouped:
+          # (M x C/group) or (C x M/group) blocks on the diagonal
+          dense = np.zeros([w.shape[0], w.shape[1] * group] +
+                           list(w.shape[2:]), np.float32)
+          rows = w.shape[0] // group
+          for g in range(group):
+            dense[g * rows:(g + 1) * rows, g * w.shape[1]:(g + 1) *
+                  w.shape[1]] = w[g * rows:(g + 1) * rows]
+          w = dense
+        initializers.append(numpy_helper.from_array(w.astype(dtype), name))
+      elem_type = helper.np_dtype_to_tensor_dtype(np.dtype(dtype))
+      graph_def = helper.make_graph(
+          nodes,
+          name="test_grouped_conv",
+          inputs=[
+              helper.make_tensor_value_info("X", elem_type, [None, 8, 7, 7])
+          ],
+          outputs=[
+              helper.make_tensor_value_info("Y", elem_type, [None, 6, 10, 10])
+          ],
+          initializer=initializers)
+      return helper.make_model(graph_def,
+                               opset_imports=[helper.make_opsetid("", 11)])
+
+    x = self._get_rnd([2, 8, 7, 7])
+    # the groups are split by default, and convolved by a single op with
+    # native_grouped_conv if TF supports it for the dtype
+    for dtype in [np.float32, np.float64]:
+      output_ref = prepare(make_model(False, dtype)).run(x.astype(dtype))
+      for native_grouped_conv in [False, True]:
+        tf_rep = prepare(make_model(True, dtype),
+                         native_grouped_conv=native_grouped_conv)
+        output = tf_rep.run(x.astype(dtype))
+        self.assertEqual(output.Y.dtype, dtype)
+        np.testing.assert_almost_equal(output.Y, output_ref.Y, decimal=4)
+
+        # the depthwise convolutions aren't split into groups
+        graph = tf_rep.tf_module.__call__.get_concrete_function(
+            X=tf.TensorSpec([None, 8, 7, 7], dtype)).graph
+        op_types = [op.type for op in graph.get_operations()]
+        self.assertIn("DepthwiseConv2dNative", op_types)
+        self.assertIn("DepthwiseConv2dNativeBackpropInput", op_types)
+        if not native_grouped_conv:
+          self.assertIn("Split", op_types)
+
+  def test_conv_pads(self):
+    # zero pads of Pad nodes and of the convolutions themselves
+    nodes = [
+        helper.make_node("Pad", ["X", "P1"], ["X1"]),
+        helper.make_node("Conv", ["X1", "W1"], ["C1"], pads=[1, 0, 1, 2]),
+        helper.make_node("Pad", ["C1", "P2", "V"], ["C2"]),
+        helper.make_node("Conv", ["C2", "W2"], ["Y"], group=2)
+    ]
+    p1 = np.array([0, 0, 2, 1, 0, 0, 0, 3], np.int64)
+    p2 = np.array([0, 0, 1, 1, 0, 0, 1, 1], np.int64)
+    w1 = self._get_rnd([4, 2, 3, 3])
+    w2 = self._get_rnd([4, 2, 3, 3])
+
+    def make_model(pads_as_inputs):
+      pads = [
+          helper.make_tensor_value_info("P1", TensorProto.INT64, [8]),
+          helper.make_tensor_value_info("P2", TensorProto.INT64, [8])
+      ]
+      graph_def = helper.make_graph(
+          nodes,
+          name="test_conv_pads",
+          inputs=[
+              helper.make_tensor_value_info("X", TensorProto.FLOAT,
+                                            [None, 2, 5, 5])
+          ] + (pads if pads_as_inputs else []),
+          outputs=[
+              helper.make_tensor_value_info("Y", TensorProto.FLOAT,
+                                            [None, 4, 7, 9])
+          ],
+          initializer=[
+              numpy_helper.from_array(w1, "W1"),
+              numpy_helper.from_array(w2, "W2"),
+              numpy_helper.from_array(np.array(0, np.float32), "V")
+          ] + ([] if pads_as_inputs else [
+              numpy_helper.from_array(p1, "P1"),
+              numpy_helper.from_array(p2, "P2")
+          ]))
+      return helper.make_model(graph_def,
+                               opset_imports=[helper.make_opsetid("", 11)])
+
+    x = self._get_rnd([2, 2, 5, 5])
+    tf_rep = prepare(make_model(False))
+    output = tf_rep.run(x)
+    output_ref = prepare(make_model(True)).run({"X": x, "P1": p1, "P2": p2})
+    np.testing.assert_almost_equal(output.Y, output_ref.Y, decimal=5)
+
+    # the pads are done by the convolutions, not by pad ops
+    graph = tf_rep.tf_module.__call__.get_concrete_function(
+        X=tf.TensorSpec([None, 2, 5, 5], tf.float32)).graph
+    ops = [tensor.op for tensor in graph.outputs]
+    fetched = {}
+    while ops:
+      op = ops.pop()
+      if op.name not in fetched:
+        fetched[op.name] = op.type
+        ops.extend(tensor.op for tensor in op.inputs)
+    self.assertNotIn("Pad", fetched.values())
+    self.assertNotIn("PadV2", fetched.values())
+
+  def test_optimize_layout(self):
+    # a residual block, whose activations stay channels last on CPU from the
+    # first Conv to the last Relu
+    nodes = [
+        helper.make_node("Conv", ["X", "W1", "B1"], ["C1"], pads=[1, 1, 1, 1]),
+        helper.make_node("BatchNormalization", ["C1", "S", "B", "M", "V"],
+                         ["N1"]),
+        helper.make_node("Relu", ["N1"], ["R1"]),
+        helper.make_node("MaxPool", ["R1"], ["P1"],
+                         kernel_shape=[2, 2],
+                         strides=[2, 2]),
+        helper.make_node("Conv", ["P1", "W2"], ["C2"], pads=[1, 1, 1, 1]),
+        helper.make_node("Add", ["C2", "P1"], ["A2"]),
+        helper.make_node("Relu", ["A2"], ["Y"])
+    ]
+    initializers = [
+        numpy_helper.from_array(self._get_rnd(shape), name)
+        for name, shape in [("W1", [4, 3, 3, 3]), ("B1", [4]), (
+            "S", [4]), ("B", [4]), ("M", [4]), ("W2", [4, 4, 3, 3])]
+    ]
+    initializers.append(
+        numpy_helper.from_array(np.array([1., 2., .5, 1.5], np.float32),
+                                "V"))
+    graph_def = helper.make_graph(
+        nodes,
+        name="test_optimize_layout",
+        inputs=[
+            helper.make_tensor_value_info("X", TensorProto.FLOAT,
+                                          [1, 3, 8, 8])
+        ],
+        outputs=[
+            helper.make_tensor_value_info("Y", TensorProto.FLOAT,
+                                          [1, 4, 4, 4])
+        ],
+        initializer=initializers)
+    model = helper.make_model(graph_def,
+                              opset_imports=[helper.make_opsetid("", 11)])
+
+    def count_transposes(tf_rep):
+      # the transposes the output depends on, unused ones are pruned
+      graph = tf_rep.tf_module.__call__.get_concrete_function(
+          X=tf.TensorSpec([1, 3, 8, 8], tf.float32)).graph
+      ops = [tensor.op for tensor in graph.outputs]
+      seen = set()
+      while ops:
+        op = ops.pop()
+        if op.name not in seen:
+          seen.add(op.name)
+          ops.extend(tensor.op for tensor in op.inputs)
+      return len([
+          name for name in seen if graph.get_operation_by_name(name).type ==
+          "Transpose"
+      ])
+
+    x = self._get_rnd([1, 3, 8, 8])
+    tf_rep = prepare(model)
+    tf_rep_ref = prepare(model, optimize_layout=False)
+    np.testing.assert_almost_equal(tf_rep.run(x).Y,
+                                   tf_rep_ref.run(x).Y,
+                                   decimal=5)
+    # no transpose pair around BatchNormalization, Relu and Add
+    self.assertEqual(count_transposes(tf_rep_ref) - count_transposes(tf_rep),
+                     3)
+
+  def test_external_data(self):
+    w = self._get_rnd([16, 32]).astype(np.float32)
+    b = np.arange(32, dtype=np.int64)
+    graph_def = helper.make_graph(
+        [
+            helper.make_node("MatMul", ["X", "W"], ["XW"]),
+            helper.make_node("Cast", ["B"], ["B_float"], to=TensorProto.FLOAT),
+            helper.make_node("Add", ["XW", "B_float"], ["Y"])
+        ],
+        name="test_external_data",
+        inputs=[
+            helper.make_tensor_value_info("X", TensorProto.FLOAT, [None, 16])
+        ],
+        outputs=[
+            helper.make_tensor_value_info("Y", TensorProto.FLOAT, [None, 32])
+        ],
+        initializer=[
+            numpy_helper.from_array(w, "W"),
+            numpy_helper.from_array(b, "B")
+        ])
+    model_dir = tempfile.mkdtemp()
+    model_path = os.path.join(model_dir, "model.onnx")
+    onnx.save(helper.make_model(graph_def,
+                                opset_imports=[helper.make_opsetid("", 11)]),
+              model_path,
+              save_as_external_data=True,
+              location="model.data",
+              size_threshold=0)
+    x = self._get_rnd([2, 16]).astype(np.float32)
+    expected = np.matmul(x, w) + b
+
+    tf_rep = prepare(model_path)
+    np.testing.assert_almost_equal(tf_rep.run(x).Y, expected, decimal=5)
+    model = onnx.load(model_path, load_external_data=False)
+    tf_rep = prepare(model, external_data_dir=model_dir)
+    np.testing.assert_almost_equal(tf_rep.run(x).Y, expected, decimal=5)
+
+    # a ModelProto with its external_data_dir is checked too
+    with self.assertRaises(onnx.checker.ValidationError):
+      prepare(model, external_data_dir=tempfile.gettempdir())
+    model.graph.node[0].op_type = "NotAnOp"
+    with self.assertRaises(onnx.checker.ValidationError):
+      prepare(model, external_data_dir=model_dir)
+    shutil.rmtree(model_dir)
+
   def test_argmax_node_bfloat(self):
     X = np.random.randn(2, 8).astype(np.float32)
     Y_ref = np.argmax(X, axis=0)
@@ -1741,7 +1741,8 @@ class TestNode(unittest.TestCase):
                     count_include_pad=None,
                     pooling_type="MAX",
                     input_dtype=np.float32,
-                    p=None):
+                    p=None,
+                    decimal=7):
 
     for device in self._get_device_list():
       op = "MaxPool" if pooling_type.upper().startswith("MAX") else \
@@ -1797,7 +1798,8 @@ class TestNode(unittest.TestCase):
 
       np.testing.assert_almost_equal(output["Y"],
                                      test_output,
-                                     decimal=5 if pooling_type == "LP" else 7)
+                                     decimal=5
+                                     if pooling_type == "LP" else decimal)
 
       # set pads and ceil_mode values back to the original values for the 2nd loop
       pads = orig_pads
@@ -2193,6 +2195,38 @@ class TestNode(unittest.TestCase):
                        auto_pad=auto_pad,
                        pooling_type="AVG")
 
+  def test_average_pool_2d_same_lower(self):
+    kernel_shape = [3, 3]
+    strides = [2, 2]
+    auto_pad = "SAME_LOWER"
+
+    input_shape = [10, 3, 23, 23]
+    self._test_pooling(input_shape=input_shape,
+                       kernel_shape=kernel_shape,
+                       strides=strides,
+                       auto_pad=auto_pad,
+                       pooling_type="AVG",
+                       decimal=6)
+
+  def test_average_pool_2d_ceil_pads(self):
+    if legacy_opset_pre_ver(10):
+      raise unittest.SkipTest("ONNX version {} doesn't support ceil mode.".format(
+          defs.onnx_opset_version()))
+
+    kernel_shape = [3, 3]
+    strides = [2, 2]
+    pads = [1, 1, 1, 1]
+    ceil_mode = 1
+
+    input_shape = [10, 3, 23, 23]
+    self._test_pooling(input_shape=input_shape,
+                       kernel_shape=kernel_shape,
+                       strides=strides,
+                       pads=pads,
+                       ceil_mode=ceil_mode,
+                       pooling_type="AVG",
+                       decimal=6)
+
   def test_average_pool_3d(self):
     kernel_shape = [3, 3, 3]
     strides = [2, 2, 2]
@@ -2203,6 +2237,19 @@ class TestNode(unittest.TestCase):
                        strides=strides,
                        pooling_type="AVG")
 
+  def test_average_pool_3d_pads(self):
+    kernel_shape = [3, 3, 3]
+    strides = [2, 2, 2]
+    pads = [1, 0, 1, 1, 1, 0]
+
+    input_shape = [2, 3, 11, 11, 11]
+    self._test_pooling(input_shape=input_shape,
+                       kernel_shape=kernel_shape,
+                       strides=strides,
+                       pads=pads,
+                       pooling_type="AVG",
+                       decimal=6)
+
   def test_lp2_pool_2d(self):
     kernel_shape = [1, 2]
     strides = [1, 2]
@@ -2367,6 +2414,47 @@ class TestNode(unittest.TestCase):
     output = run_node(node_def, [x])
     np.testing.assert_almost_equal(output["Y"], np.negative(x))
 
+  def test_non_max_suppression(self):
+    if legacy_opset_pre_ver(10):
+      raise unittest.SkipTest(
+          "ONNX version {} doesn't support NonMaxSuppression.".format(
+              defs.onnx_opset_version()))
+    node_def = helper.make_node("NonMaxSuppression", [
+        "boxes", "scores", "max_output_boxes_per_class", "iou_threshold",
+        "score_threshold"
+    ], ["selected_indices"])
+    corners = self._get_rnd_float32(0, 10, shape=[2, 50, 2])
+    sizes = self._get_rnd_float32(0, 5, shape=[2, 50, 2])
+    boxes = np.concatenate([corners, corners + sizes], 2)
+    scores = self._get_rnd_float32(shape=[2, 3, 50])
+    max_output_boxes_per_class = np.array([10], np.int64)
+    iou_threshold = np.array([0.3], np.float32)
+    score_threshold = np.array([0.2], np.float32)
+    output = run_node(node_def, [
+        boxes, scores, max_output_boxes_per_class, iou_threshold,
+        score_threshold
+    ])
+    # the boxes selected for each batch and class in turn
+    expected = [[b, c, i]
+                for b in range(2)
+                for c in range(3)
+                for i in tf.image.non_max_suppression(
+                    boxes[b], scores[b, c], 10, 0.3, 0.2).numpy()]
+    np.testing.assert_array_equal(output["selected_indices"], expected)
+
+    # the padding of the selected boxes doesn't grow with a huge
+    # max_output_boxes_per_class
+    output = run_node(node_def, [
+        boxes, scores,
+        np.array([10**9], np.int64), iou_threshold, score_threshold
+    ])
+    expected = [[b, c, i]
+                for b in range(2)
+                for c in range(3)
+                for i in tf.image.non_max_suppression(
+                    boxes[b], scores[b, c], 50, 0.3, 0.2).numpy()]
+    np.testing.assert_array_equal(output["selected_indices"], expected)
+
   def test_non_zero(self):
     if legacy_opset_pre_ver(9):
       raise unittest.SkipTest("ONNX version {} doesn't support NonZero.".format(
@@ -4039,6 +4127,21 @@ class TestNode(unittest.TestCase):
     mode = 'TF'
     run_test_strings()
 
+    # test 1d inputs, max_skip=1, output contains 1-grams, 2-grams and 3-grams
+    # mapped to the output in reverse order
+    x = np.array([1, 2, 3, 1, 2, 3, 4]).astype(np.int64)
+    y = np.array([1., 2., 1., 2., 1., 2.]).astype(np.float32)
+    ngram_counts = np.array([0, 2, 6]).astype(np.int64)
+    ngram_indexes = np.array([5, 4, 3, 2, 1, 0]).astype(np.int64)
+    pool_int64s = np.array([1, 4, 1, 2, 3, 4, 1, 2, 3, 2, 3,
+                            1]).astype(np.int64)
+    min_gram_len = 1
+    max_gram_len = 3
+    max_skip = 1
+    mode = 'TF'
+    weights = np.ones(6)
+    run_test_ints()
+
   def test_thresholded_relu(self):
     alpha = 2.0
     node_def = helper.make_node("ThresholdedRelu", ["X"], ["Y"], alpha=alpha)